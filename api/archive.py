@@ -0,0 +1,362 @@
+"""Cold tier for finalized orders: compressed column blocks plus a background compaction task."""
+import bisect
+import hashlib
+import heapq
+import json
+import os
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from api.models import OrderStatus, PaymentMethod, PaymentStatus
+from api.records import OrderRecord, OrderLine, PaymentRecord
+from api.storage import storage, InMemoryStorage
+
+
+# Configuration
+ARCHIVE_AFTER_SECONDS = float(os.getenv("ARCHIVE_AFTER_SECONDS", "0"))  # 0 keeps every order in memory
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "60"))
+ARCHIVE_BLOCK_SIZE = int(os.getenv("ARCHIVE_BLOCK_SIZE", "1024"))  # orders per compressed block
+ARCHIVE_CACHE_BLOCKS = int(os.getenv("ARCHIVE_CACHE_BLOCKS", "8"))  # decoded blocks kept for reads
+
+FINALIZED_STATUSES = (OrderStatus.PAID, OrderStatus.CANCELLED)
+
+Row = Tuple[OrderRecord, Optional[PaymentRecord]]
+
+
+def _digest(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class _DigestIndex:
+    """Sorted 64-bit id digests with the number of the block holding each id (12 bytes per id)."""
+    
+    def __init__(self):
+        # Published as one tuple so readers never pair new keys with old blocks
+        self._arrays = (array("Q"), array("I"))
+    
+    def __len__(self) -> int:
+        return len(self._arrays[0])
+    
+    def add(self, entries: Iterable[Tuple[str, int]]) -> None:
+        """Index (id, block) pairs. Called by one writer at a time."""
+        keys, blocks = self._arrays
+        merged = list(heapq.merge(zip(keys, blocks), sorted((_digest(i), block) for i, block in entries)))
+        self._arrays = (array("Q", [key for key, _ in merged]), array("I", [block for _, block in merged]))
+    
+    def blocks_for(self, value: str) -> List[int]:
+        """Blocks that may hold the id (digest collisions are resolved by the caller)."""
+        keys, blocks = self._arrays
+        key = _digest(value)
+        found = []
+        pos = bisect.bisect_left(keys, key)
+        while pos < len(keys) and keys[pos] == key:
+            found.append(blocks[pos])
+            pos += 1
+        return found
+
+
+class _DecodedBlock:
+    """A block's columns plus lookup tables, built when the block is first read."""
+    
+    __slots__ = ("columns", "order_rows", "payment_rows", "payment_of_order")
+    
+    def __init__(self, columns: dict):
+        self.columns = columns
+        self.order_rows = {order_id: row for row, order_id in enumerate(columns["id"])}
+        self.payment_rows = {payment_id: row for row, payment_id in enumerate(columns["paymentId"])}
+        self.payment_of_order = {order_row: row for row, order_row in enumerate(columns["paymentOrder"])}
+    
+    def order(self, row: int) -> OrderRecord:
+        c = self.columns
+        return OrderRecord(
+            c["id"][row], c["userId"][row], tuple(OrderLine(pid, qty) for pid, qty in c["items"][row]),
+            c["totalAmount"][row], c["currency"][row], OrderStatus(c["status"][row]),
+            datetime.fromisoformat(c["createdAt"][row]),
+        )
+    
+    def payment(self, row: int) -> PaymentRecord:
+        c = self.columns
+        return PaymentRecord(
+            c["paymentId"][row], c["id"][c["paymentOrder"][row]], c["amount"][row], c["paymentCurrency"][row],
+            PaymentMethod(c["method"][row]), PaymentStatus(c["paymentStatus"][row]), c["providerRef"][row],
+            datetime.fromisoformat(c["paymentCreatedAt"][row]),
+        )
+
+
+class ColdStore:
+    """
+    Archived orders and their payments, packed into compressed column blocks.
+    
+    Each block holds up to ARCHIVE_BLOCK_SIZE orders as zlib-compressed
+    JSON columns (ids, user ids and product ids repeat a lot, so they
+    compress well). Orders and payments are found through sorted digest
+    arrays, so what stays in memory per archived order is its share of a
+    compressed block plus two 12-byte index entries. Listings use each
+    block's (createdAt, id) key range and a digest index of the users with
+    orders in it. The most recently read blocks are kept decoded in a
+    small LRU. Records read from here are fresh copies; archived orders
+    are final and never updated.
+    """
+    
+    def __init__(self, cache_blocks: int = ARCHIVE_CACHE_BLOCKS):
+        self.cache_blocks = cache_blocks
+        self._blocks: List[bytes] = []
+        self._orders = _DigestIndex()  # order id -> block
+        self._payments = _DigestIndex()  # payment id -> block
+        self._users = _DigestIndex()  # user id -> each block holding their orders
+        self._ranges: List[Tuple[Tuple[str, str], Tuple[str, str]]] = []  # block -> (lowest, highest) order key
+        self._write_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._cache: "OrderedDict[int, _DecodedBlock]" = OrderedDict()
+        self.raw_bytes = 0  # JSON size of every block before compression
+    
+    @property
+    def order_count(self) -> int:
+        return len(self._orders)
+    
+    @property
+    def payment_count(self) -> int:
+        return len(self._payments)
+    
+    @property
+    def block_count(self) -> int:
+        return len(self._blocks)
+    
+    @property
+    def compressed_bytes(self) -> int:
+        return sum(len(block) for block in self._blocks)
+    
+    def add(self, rows: List[Row], block_size: int = ARCHIVE_BLOCK_SIZE) -> int:
+        """Pack rows into new blocks and make them readable. Returns the compressed size written."""
+        written = 0
+        order_entries, payment_entries, user_entries = [], [], []
+        with self._write_lock:
+            for start in range(0, len(rows), block_size):
+                chunk = rows[start:start + block_size]
+                raw = _encode_block(chunk)
+                block = zlib.compress(raw)
+                # Appended before indexing, so an indexed block always exists
+                number = len(self._blocks)
+                self._blocks.append(block)
+                keys = [_order_key(order) for order, _ in chunk]
+                self._ranges.append((min(keys), max(keys)))
+                self.raw_bytes += len(raw)
+                written += len(block)
+                for order, payment in chunk:
+                    order_entries.append((order.id, number))
+                    if payment is not None:
+                        payment_entries.append((payment.id, number))
+                user_entries += [(user_id, number) for user_id in {order.userId for order, _ in chunk}]
+            self._orders.add(order_entries)
+            self._payments.add(payment_entries)
+            self._users.add(user_entries)
+        return written
+    
+    def get_order(self, order_id: str) -> Optional[OrderRecord]:
+        for number in self._orders.blocks_for(order_id):
+            block = self._block(number)
+            row = block.order_rows.get(order_id)
+            if row is not None:
+                return block.order(row)
+        return None
+    
+    def get_payment(self, payment_id: str) -> Optional[PaymentRecord]:
+        for number in self._payments.blocks_for(payment_id):
+            block = self._block(number)
+            row = block.payment_rows.get(payment_id)
+            if row is not None:
+                return block.payment(row)
+        return None
+    
+    def get_payment_by_order(self, order_id: str) -> Optional[PaymentRecord]:
+        for number in self._orders.blocks_for(order_id):
+            block = self._block(number)
+            row = block.order_rows.get(order_id)
+            if row is not None:
+                payment_row = block.payment_of_order.get(row)
+                return block.payment(payment_row) if payment_row is not None else None
+        return None
+    
+    def query_orders(self, user_id: Optional[str] = None, status: Optional[str] = None,
+                     after: Optional[tuple] = None, limit: int = 20,
+                     newest_first: bool = True) -> List[OrderRecord]:
+        """
+        Up to `limit` archived orders past the `after` key, in key order,
+        optionally for one user and status. Blocks are read best bound
+        first, stopping once no unread block can reach the page.
+        """
+        ranges = list(self._ranges)
+        numbers = set(self._users.blocks_for(user_id)) if user_id is not None else range(len(ranges))
+        if newest_first:
+            candidates = sorted((n for n in numbers if after is None or ranges[n][0] < after),
+                                key=lambda n: ranges[n][1], reverse=True)
+        else:
+            candidates = sorted((n for n in numbers if after is None or ranges[n][1] > after),
+                                key=lambda n: ranges[n][0])
+        status = OrderStatus(status).value if status is not None else None
+        found: List[Tuple[Tuple[str, str], int, int]] = []  # (key, block, row)
+        for number in candidates:
+            if len(found) >= limit:
+                bound = ranges[number][1] if newest_first else ranges[number][0]
+                if (bound < found[-1][0]) if newest_first else (bound > found[-1][0]):
+                    break
+            columns = self._block(number).columns
+            for row, key in enumerate(zip(columns["createdAt"], columns["id"])):
+                if after is not None and ((key >= after) if newest_first else (key <= after)):
+                    continue
+                if user_id is not None and columns["userId"][row] != user_id:
+                    continue
+                if status is not None and columns["status"][row] != status:
+                    continue
+                found.append((key, number, row))
+            found.sort(reverse=newest_first)
+            del found[limit:]
+        return [self._block(number).order(row) for _, number, row in found]
+    
+    def rows(self) -> Iterator[Row]:
+        """Every archived (order, payment) pair, decoding block by block (bypasses the cache)."""
+        for number in range(len(self._blocks)):
+            block = _DecodedBlock(json.loads(zlib.decompress(self._blocks[number])))
+            for row in range(len(block.columns["id"])):
+                payment_row = block.payment_of_order.get(row)
+                yield block.order(row), block.payment(payment_row) if payment_row is not None else None
+    
+    def _block(self, number: int) -> _DecodedBlock:
+        with self._cache_lock:
+            block = self._cache.get(number)
+            if block is not None:
+                self._cache.move_to_end(number)
+                return block
+        block = _DecodedBlock(json.loads(zlib.decompress(self._blocks[number])))
+        if self.cache_blocks > 0:
+            with self._cache_lock:
+                self._cache[number] = block
+                while len(self._cache) > self.cache_blocks:
+                    self._cache.popitem(last=False)
+        return block
+
+
+def _order_key(order: OrderRecord) -> Tuple[str, str]:
+    return InMemoryStorage._order_key(order)
+
+
+def _encode_block(rows: List[Row]) -> bytes:
+    columns: Dict[str, list] = {name: [] for name in (
+        "id", "userId", "items", "totalAmount", "currency", "status", "createdAt",
+        "paymentId", "paymentOrder", "amount", "paymentCurrency", "method", "paymentStatus",
+        "providerRef", "paymentCreatedAt",
+    )}
+    for row, (order, payment) in enumerate(rows):
+        columns["id"].append(order.id)
+        columns["userId"].append(order.userId)
+        columns["items"].append([[line.productId, line.qty] for line in order.items])
+        columns["totalAmount"].append(order.totalAmount)
+        columns["currency"].append(order.currency)
+        columns["status"].append(OrderStatus(order.status).value)
+        columns["createdAt"].append(order.createdAt.isoformat(timespec="microseconds"))
+        if payment is not None:
+            columns["paymentId"].append(payment.id)
+            columns["paymentOrder"].append(row)
+            columns["amount"].append(payment.amount)
+            columns["paymentCurrency"].append(payment.currency)
+            columns["method"].append(PaymentMethod(payment.method).value)
+            columns["paymentStatus"].append(PaymentStatus(payment.status).value)
+            columns["providerRef"].append(payment.providerRef)
+            columns["paymentCreatedAt"].append(payment.createdAt.isoformat(timespec="microseconds"))
+    return json.dumps(columns, separators=(",", ":")).encode("utf-8")
+
+
+class OrderArchiver:
+    """
+    Background compaction of finalized orders into a ColdStore.
+    
+    Every ARCHIVE_INTERVAL_SECONDS, PAID and CANCELLED orders created more
+    than ARCHIVE_AFTER_SECONDS ago are packed together with their payments
+    into cold blocks, then dropped from the storage's dicts and order
+    indexes, so heap use follows the number of active orders. A PAID
+    order waits until its payment is recorded, so the pair is archived
+    together. get_order, get_payment and get_payment_by_order fall back to
+    the cold store, and query_orders merges archived orders into its pages.
+    """
+    
+    def __init__(self, store: InMemoryStorage, after_seconds: float = ARCHIVE_AFTER_SECONDS,
+                 interval_seconds: float = ARCHIVE_INTERVAL_SECONDS, block_size: int = ARCHIVE_BLOCK_SIZE):
+        self.store = store
+        self.after_seconds = after_seconds
+        self.interval_seconds = interval_seconds
+        self.block_size = block_size
+        self.cold = ColdStore()
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.last_run: Dict[str, float] = {}
+    
+    @property
+    def enabled(self) -> bool:
+        return self.after_seconds > 0
+    
+    def start(self) -> None:
+        """Attach the cold store to the storage and start the compaction thread."""
+        if not isinstance(self.store, InMemoryStorage):
+            raise ValueError("Order archival needs an in-memory storage engine")
+        self.store.cold = self.cold
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="order-archiver", daemon=True)
+        self._thread.start()
+    
+    def compact(self, now: Optional[datetime] = None) -> Dict[str, float]:
+        """Archive every finalized order older than the threshold now. Returns this run's stats."""
+        with self._run_lock:
+            started = time.perf_counter()
+            self.store.cold = self.cold
+            cutoff = (now or datetime.utcnow()) - timedelta(seconds=self.after_seconds)
+            rows = self.store.finalized_orders(cutoff, FINALIZED_STATUSES)
+            # Published to the cold store before leaving memory, so reads never miss
+            written = self.cold.add(rows, self.block_size) if rows else 0
+            moved = self.store.drop_orders(order.id for order, _ in rows)
+            self.runs += 1
+            self.last_run = {
+                "orders": moved,
+                "payments": sum(1 for _, payment in rows if payment is not None),
+                "compressed_bytes": written,
+                "seconds": time.perf_counter() - started,
+            }
+            return self.last_run
+    
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+    
+    def stats(self) -> Dict[str, float]:
+        cold = self.cold
+        compressed = cold.compressed_bytes
+        return {
+            "runs": self.runs,
+            "hot_orders": len(self.store.orders),
+            "cold_orders": cold.order_count,
+            "cold_payments": cold.payment_count,
+            "blocks": cold.block_count,
+            "compressed_bytes": compressed,
+            "compression_ratio": cold.raw_bytes / compressed if compressed else 0.0,
+            "last_run": dict(self.last_run),
+        }
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            run = self.compact()
+            if run["orders"]:
+                stats = self.stats()
+                print(f"✓ Archived {run['orders']} orders ({run['payments']} payments, "
+                      f"{run['compressed_bytes']:,} bytes) in {run['seconds'] * 1000:.0f} ms; "
+                      f"{stats['hot_orders']} in memory, {stats['cold_orders']} archived")
+
+
+archiver = OrderArchiver(storage)
@@ -1,11 +1,18 @@
 """Authentication and authorization logic."""
+import asyncio
+import os
+import threading
+import time
 import jwt
 import bcrypt
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from api.models import UserInternal, UserRole
+from api.models import UserRole
+from api.records import UserRecord
 from api.storage import storage
 
 
@@ -13,15 +20,82 @@ from api.storage import storage
 SECRET_KEY = "your-secret-key-change-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))  # 0 disables the cache
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
 
 security = HTTPBearer()
 
 
+class TokenCache:
+    """
+    Bounded LRU cache of already verified bearer tokens.
+    
+    Keyed on the raw token string (signature included), so only a token that
+    passed jwt.decode once can ever hit. Entries expire after the TTL or at
+    the token's own `exp`, whichever comes first.
+    """
+    
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, ttl_seconds: float = TOKEN_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, dict, UserRecord]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, token: str) -> Optional[Tuple[dict, UserRecord]]:
+        """Return (claims, user) for a cached, unexpired token, else None."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, claims, user = entry
+            if time.time() >= expires_at:
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return claims, user
+    
+    def put(self, token: str, claims: dict, user: UserRecord) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if "exp" in claims:
+            expires_at = min(expires_at, float(claims["exp"]))
+        with self._lock:
+            self._entries[token] = (expires_at, claims, user)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache()
+
+
+# bcrypt blocks for tens of milliseconds; at most PASSWORD_HASH_WORKERS run at once.
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
     # Bcrypt requires bytes
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -33,6 +107,18 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
 
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the bcrypt worker pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the bcrypt worker pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, verify_password, plain_password, hashed_password)
+
+
 def create_access_token(user_id: str, role: str) -> str:
     """Create JWT access token."""
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -55,16 +141,20 @@ def decode_token(token: str) -> dict:
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has expired"
         )
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserInternal:
-    """Dependency to get current authenticated user."""
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserRecord:
+    """Dependency to get the current authenticated user, as its stored UserRecord."""
     token = credentials.credentials
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached[1]
+    
     payload = decode_token(token)
     user_id = payload.get("sub")
     
@@ -81,12 +171,13 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail="User not found"
         )
     
+    token_cache.put(token, payload, user)
     return user
 
 
 def require_role(required_role: UserRole):
     """Dependency factory to require specific role."""
-    def role_checker(user: UserInternal = Depends(get_current_user)) -> UserInternal:
+    def role_checker(user: UserRecord = Depends(get_current_user)) -> UserRecord:
         if user.role != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -96,7 +187,7 @@ def require_role(required_role: UserRole):
     return role_checker
 
 
-def require_customer(user: UserInternal = Depends(get_current_user)) -> UserInternal:
+def require_customer(user: UserRecord = Depends(get_current_user)) -> UserRecord:
     """Require customer role."""
     if user.role != UserRole.CUSTOMER:
         raise HTTPException(
@@ -106,7 +197,7 @@ def require_customer(user: UserInternal = Depends(get_current_user)) -> UserInte
     return user
 
 
-def require_admin(user: UserInternal = Depends(get_current_user)) -> UserInternal:
+def require_admin(user: UserRecord = Depends(get_current_user)) -> UserRecord:
     """Require admin role."""
     if user.role != UserRole.ADMIN:
         raise HTTPException(
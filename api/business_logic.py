@@ -1,7 +1,13 @@
 """Business logic validation and rules."""
-from typing import List, Tuple
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 from fastapi import HTTPException, status
-from api.models import OrderItem, Order, OrderStatus, Payment, PaymentStatus
+from pydantic import ValidationError
+from api.models import (
+    OrderItem, OrderStatus, Payment, PaymentStatus, Product,
+    ProductCreateRequest, ProductUpdateRequest, ProductBulkRowError, ErrorDetail
+)
+from api.records import OrderLine, OrderRecord, ProductRecord
 from api.storage import storage
 
 
@@ -10,20 +16,80 @@ MIN_CART_TOTAL = 50.0
 MAX_CART_TOTAL = 5000.0
 MIN_QTY = 1
 MAX_QTY = 10
+BULK_CHUNK_SIZE = 1000
 
 
-def validate_and_calculate_order(items: List[OrderItem]) -> Tuple[float, str]:
+def place_order(items: List[OrderItem]) -> Tuple[float, str]:
     """
-    Validate order items and calculate total.
+    Validate, price and reserve stock for an order in a single storage call.
+    Validation and pricing run against the same product snapshot that the
+    reservation decrements, so there is no check-then-act window.
     Returns (total_amount, currency).
-    Raises HTTPException if validation fails.
+    Raises HTTPException if validation fails or stock is insufficient.
     """
+    _require_items(items)
+    priced = {}
+    
+    def check(products: Dict[str, Optional[ProductRecord]]) -> None:
+        priced["total"] = _price_items(items, products)
+    
+    failed_product_id = storage.reserve_many(((item.productId, item.qty) for item in items), check=check)
+    if failed_product_id is not None:
+        _raise_insufficient_stock(items, failed_product_id)
+    return priced["total"]
+
+
+def place_orders(carts: List[List[OrderItem]]) -> List[Union[Tuple[float, str], HTTPException]]:
+    """
+    Batch version of place_order: validate, price and reserve stock for many
+    independent carts in one storage call. Returns, per cart, either
+    (total_amount, currency) or the HTTPException that cart failed with.
+    """
+    priced: Dict[int, Tuple[float, str]] = {}
+    
+    def check(index: int, products: Dict[str, Optional[ProductRecord]]) -> None:
+        _require_items(carts[index])
+        priced[index] = _price_items(carts[index], products)
+    
+    outcomes = storage.reserve_batch(
+        [[(item.productId, item.qty) for item in items] for items in carts],
+        check=check,
+    )
+    results: List[Union[Tuple[float, str], HTTPException]] = []
+    try:
+        for index, outcome in enumerate(outcomes):
+            if outcome is None:
+                results.append(priced[index])
+            elif isinstance(outcome, HTTPException):
+                results.append(outcome)
+            elif isinstance(outcome, Exception):
+                raise outcome
+            else:
+                try:
+                    _raise_insufficient_stock(carts[index], outcome)
+                except HTTPException as exc:
+                    results.append(exc)
+    except BaseException:
+        # No order gets created for any cart, so give back what the others reserved
+        storage.release_many(
+            (item.productId, item.qty)
+            for index, outcome in enumerate(outcomes) if outcome is None
+            for item in carts[index]
+        )
+        raise
+    return results
+
+
+def _require_items(items: List[OrderItem]) -> None:
     if not items:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Order must contain at least one item"
         )
-    
+
+
+def _price_items(items: List[OrderItem], products: Dict[str, Optional[ProductRecord]]) -> Tuple[float, str]:
+    """Apply per-item and cart-total rules to a product snapshot. Returns (total_amount, currency)."""
     total_amount = 0.0
     currency = "TRY"
     
@@ -36,7 +102,7 @@ def validate_and_calculate_order(items: List[OrderItem]) -> Tuple[float, str]:
             )
         
         # Get product
-        product = storage.get_product(item.productId)
+        product = products.get(item.productId)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -75,44 +141,22 @@ def validate_and_calculate_order(items: List[OrderItem]) -> Tuple[float, str]:
     return total_amount, currency
 
 
-def reserve_stock(items: List[OrderItem]) -> None:
-    """
-    Reserve stock for order items.
-    Raises HTTPException if stock is insufficient.
-    """
-    reserved = []
-    
-    try:
-        for item in items:
-            success = storage.decrease_stock(item.productId, item.qty)
-            if not success:
-                # Rollback
-                for rollback_item in reserved:
-                    storage.increase_stock(rollback_item.productId, rollback_item.qty)
-                
-                product = storage.get_product(item.productId)
-                available = product.stock if product else 0
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail=f"Insufficient stock for product {item.productId}. Available: {available}, Requested: {item.qty}"
-                )
-            reserved.append(item)
-    except HTTPException:
-        raise
-    except Exception as e:
-        # Rollback on any error
-        for rollback_item in reserved:
-            storage.increase_stock(rollback_item.productId, rollback_item.qty)
-        raise
+def _raise_insufficient_stock(items: List[OrderItem], product_id: str) -> None:
+    product = storage.get_product(product_id)
+    available = product.stock if product else 0
+    requested = sum(item.qty for item in items if item.productId == product_id)
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Insufficient stock for product {product_id}. Available: {available}, Requested: {requested}"
+    )
 
 
-def release_stock(items: List[OrderItem]) -> None:
+def release_stock(items: Iterable[OrderLine]) -> None:
     """Release stock when order is cancelled."""
-    for item in items:
-        storage.increase_stock(item.productId, item.qty)
+    storage.release_many((item.productId, item.qty) for item in items)
 
 
-def validate_order_cancellation(order: Order) -> None:
+def validate_order_cancellation(order: OrderRecord) -> None:
     """
     Validate if order can be cancelled.
     Raises HTTPException if cancellation is not allowed.
@@ -130,7 +174,26 @@ def validate_order_cancellation(order: Order) -> None:
         )
 
 
-def validate_payment_creation(order: Order) -> None:
+def change_order_status(order: OrderRecord, to_status: OrderStatus) -> OrderRecord:
+    """
+    Move a validated order from its current status to `to_status` through
+    the storage's conditional transition and return the updated order.
+    Raises HTTPException 409 if a concurrent request changed the status
+    first, so only one cancellation or payment of an order takes effect.
+    """
+    updated = storage.transition_order(order.id, order.status, to_status)
+    if updated is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "code": "INVALID_ORDER_STATUS",
+                "message": f"Order {order.id} is no longer {OrderStatus(order.status).value}",
+            }
+        )
+    return updated
+
+
+def validate_payment_creation(order: OrderRecord) -> None:
     """
     Validate if payment can be created for order.
     Raises HTTPException if payment creation is not allowed.
@@ -150,7 +213,7 @@ def validate_payment_creation(order: Order) -> None:
         )
 
 
-def process_payment(order: Order, payment: Payment) -> None:
+def process_payment(order: OrderRecord, payment: Payment) -> None:
     """
     Process payment and update order status.
     This is a simplified version - in production, this would integrate with a payment provider.
@@ -167,6 +230,72 @@ def process_payment(order: Order, payment: Payment) -> None:
     # Mark payment as captured
     payment.status = PaymentStatus.CAPTURED
     
-    # Update order status to PAID
-    order.status = OrderStatus.PAID
-    storage.update_order(order.id, order)
+    # Update order status to PAID (only one of several concurrent payments gets past this)
+    change_order_status(order, OrderStatus.PAID)
+
+
+def upsert_product_chunk(rows: List[Tuple[int, Any, Optional[str]]]) -> Tuple[int, int, List[ProductBulkRowError]]:
+    """
+    Validate one chunk of bulk-import rows and upsert the valid ones in a
+    single storage transaction. Rows are (index, row, parse_error).
+    A row with an "id" of an existing product is a partial update
+    (ProductUpdateRequest fields); any other row must be a full
+    ProductCreateRequest. Returns (created, updated, row_errors).
+    Catalog caches are not invalidated here; the caller does it once.
+    """
+    errors: List[ProductBulkRowError] = []
+    prepared = []
+    indexes = []
+    for index, row, parse_error in rows:
+        if parse_error is not None:
+            errors.append(_row_error(index, "VALIDATION_ERROR", parse_error))
+            continue
+        try:
+            prepared.append(_prepare_product_row(row))
+            indexes.append(index)
+        except ValidationError as exc:
+            details = [{"loc": err.get("loc"), "msg": err.get("msg"), "type": err.get("type")} for err in exc.errors()]
+            errors.append(_row_error(index, "VALIDATION_ERROR", "Invalid row", details))
+        except ValueError as exc:
+            errors.append(_row_error(index, "VALIDATION_ERROR", str(exc)))
+    
+    created = updated = 0
+    outcomes = storage.upsert_products(prepared, bump_version=False) if prepared else []
+    for index, (product_id, _, _), outcome in zip(indexes, prepared, outcomes):
+        if outcome == "created":
+            created += 1
+        elif outcome == "updated":
+            updated += 1
+        else:
+            errors.append(_row_error(
+                index, "NOT_FOUND",
+                f"Product {product_id} not found and row is not a complete product"
+            ))
+    return created, updated, errors
+
+
+def _prepare_product_row(row: Any) -> Tuple[str, Optional[Product], dict]:
+    """Turn a raw row into a storage upsert tuple (product_id, product_if_new, changes)."""
+    if not isinstance(row, dict):
+        raise ValueError("Row must be a JSON object")
+    
+    product_id = row.get("id")
+    fields = {key: value for key, value in row.items() if key != "id"}
+    if product_id is None:
+        create = ProductCreateRequest.model_validate(fields)
+        product_id = str(uuid.uuid4())
+        return product_id, Product(id=product_id, **create.model_dump()), {}
+    if not isinstance(product_id, str) or not product_id:
+        raise ValueError("id must be a non-empty string")
+    
+    update = ProductUpdateRequest.model_validate(fields)
+    changes = {key: value for key, value in update.model_dump(exclude_unset=True).items() if value is not None}
+    try:
+        new_product = Product(id=product_id, **ProductCreateRequest.model_validate(fields).model_dump())
+    except ValidationError:
+        new_product = None  # only usable as an update
+    return product_id, new_product, changes
+
+
+def _row_error(index: int, code: str, message: str, details: Optional[List[dict]] = None) -> ProductBulkRowError:
+    return ProductBulkRowError(index=index, error=ErrorDetail(code=code, message=message, details=details))
@@ -0,0 +1,62 @@
+"""Pre-encoded, versioned cache of the public product catalog."""
+import hashlib
+import threading
+from typing import List, Optional, Tuple
+from pydantic import TypeAdapter
+from api.models import Product
+from api.storage import storage
+
+
+_PRODUCT_LIST = TypeAdapter(List[Product])
+
+
+class CatalogCache:
+    """
+    Holds the JSON bytes and ETag of the active-product listing.
+    
+    The entry is tagged with the storage catalog_version read *before* the
+    listing was taken, so any product write or stock change made afterwards
+    moves the version and forces a rebuild on the next read.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entry: Optional[Tuple[int, bytes, str]] = None  # (version, body, etag)
+        self.hits = 0
+        self.rebuilds = 0
+    
+    def get(self) -> Tuple[bytes, str]:
+        """Return (body, etag) for the current active catalog."""
+        entry = self._entry
+        version = storage.catalog_version
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1], entry[2]
+        
+        with self._lock:
+            entry = self._entry
+            if entry is not None and entry[0] == storage.catalog_version:
+                self.hits += 1
+                return entry[1], entry[2]
+            version = storage.catalog_version
+            body = _PRODUCT_LIST.dump_json([p.to_model() for p in storage.list_products(active_only=True)])
+            etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+            self._entry = (version, body, etag)
+            self.rebuilds += 1
+            return body, etag
+    
+    def invalidate(self) -> None:
+        self._entry = None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak If-None-Match comparison against a single ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+catalog_cache = CatalogCache()
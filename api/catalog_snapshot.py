@@ -0,0 +1,191 @@
+"""Binary, memory-mapped product catalog snapshots for fast replica startup."""
+import bisect
+import mmap
+import os
+import struct
+import threading
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, Optional
+from api.models import Product
+from api.records import ProductRecord
+
+
+# Configuration
+CATALOG_SNAPSHOT = os.getenv("CATALOG_SNAPSHOT", "")  # path of a snapshot to serve at startup
+
+# File layout: header, fixed-width records sorted by id (UTF-8 byte order), string table.
+# Header fields: magic, format version, record count, string table size.
+# Record fields: id, name, currency as (offset, length) into the string table, then price, stock, isActive.
+_MAGIC = b"PCAT"
+_FORMAT_VERSION = 2
+_HEADER = struct.Struct("<4sHIQ")
+_RECORD = struct.Struct("<IHIHIHdq?")
+
+
+def write_catalog_snapshot(path: str, products: Iterable[Product]) -> int:
+    """Write products to a catalog snapshot file. Returns the number of records."""
+    rows = sorted(((p.id.encode("utf-8"), p) for p in products), key=lambda row: row[0])
+    strings = bytearray()
+    offsets: Dict[bytes, int] = {}  # shared entries for repeated names/currencies
+    
+    def intern(value: bytes):
+        offset = offsets.get(value)
+        if offset is None:
+            offset = offsets[value] = len(strings)
+            strings.extend(value)
+        return offset, len(value)
+    
+    records = bytearray()
+    for id_bytes, product in rows:
+        records += _RECORD.pack(
+            *intern(id_bytes), *intern(product.name.encode("utf-8")), *intern(product.currency.encode("utf-8")),
+            product.price, product.stock, product.isActive,
+        )
+    with open(path + ".tmp", "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(rows), len(strings)))
+        f.write(records)
+        f.write(strings)
+    os.replace(path + ".tmp", path)
+    return len(rows)
+
+
+class MappedCatalog:
+    """
+    Read-only view of a catalog snapshot file through mmap.
+    
+    Opening only maps the file and checks the header and the file size;
+    records are decoded on demand, and ids are found by binary search over
+    the id-sorted records, so nothing proportional to the catalog size
+    happens up front. Raises ValueError for a file of another format or
+    version, or one whose size does not match its header (truncated).
+    """
+    
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise ValueError(f"{path} is too short to be a catalog snapshot")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, strings_size = _HEADER.unpack_from(self._mm, 0)
+        self._strings = _HEADER.size + self.count * _RECORD.size
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {_FORMAT_VERSION} catalog snapshot")
+        if len(self._mm) != self._strings + strings_size:
+            size = len(self._mm)
+            self._mm.close()
+            raise ValueError(f"{path} is truncated or corrupt: "
+                             f"header describes {self._strings + strings_size} bytes, file has {size}")
+        self._ids = _SlotIds(self)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def find(self, product_id: str) -> Optional[int]:
+        """Slot of the product with this id, or None."""
+        key = product_id.encode("utf-8")
+        slot = bisect.bisect_left(self._ids, key)
+        if slot < self.count and self._ids[slot] == key:
+            return slot
+        return None
+    
+    def product_at(self, slot: int) -> ProductRecord:
+        """Decode one record into a new ProductRecord (trusted data, no validation)."""
+        id_off, id_len, name_off, name_len, cur_off, cur_len, price, stock, is_active = \
+            _RECORD.unpack_from(self._mm, _HEADER.size + slot * _RECORD.size)
+        return ProductRecord(
+            id=self._string(id_off, id_len),
+            name=self._string(name_off, name_len),
+            price=price,
+            currency=self._string(cur_off, cur_len),
+            stock=stock,
+            isActive=is_active,
+        )
+    
+    def id_at(self, slot: int) -> str:
+        return self._ids[slot].decode("utf-8")
+    
+    def close(self) -> None:
+        self._mm.close()
+    
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings + offset
+        return self._mm[start:start + length].decode("utf-8")
+
+
+class _SlotIds:
+    """Sequence of raw id bytes by slot, for bisect."""
+    
+    def __init__(self, catalog: MappedCatalog):
+        self._catalog = catalog
+    
+    def __len__(self) -> int:
+        return self._catalog.count
+    
+    def __getitem__(self, slot: int) -> bytes:
+        catalog = self._catalog
+        id_off, id_len = _RECORD.unpack_from(catalog._mm, _HEADER.size + slot * _RECORD.size)[:2]
+        start = catalog._strings + id_off
+        return catalog._mm[start:start + id_len]
+
+
+class LazyProducts(MutableMapping):
+    """
+    Product map backed by a MappedCatalog.
+    
+    A catalog product becomes a ProductRecord the first time it is looked
+    up and is kept from then on, so in-place stock changes stick. Products
+    written after startup live only in the materialized dict.
+    """
+    
+    def __init__(self, catalog: MappedCatalog):
+        self.catalog = catalog
+        self._loaded: Dict[str, ProductRecord] = {}
+        self._extra = 0  # products not present in the catalog file
+        self._lock = threading.Lock()  # guards _extra
+    
+    def get(self, product_id: str, default=None) -> Optional[ProductRecord]:
+        product = self._loaded.get(product_id)
+        if product is not None:
+            return product
+        slot = self.catalog.find(product_id)
+        if slot is None:
+            return default
+        # setdefault keeps a single object per id when two readers race
+        return self._loaded.setdefault(product_id, self.catalog.product_at(slot))
+    
+    def __getitem__(self, product_id: str) -> ProductRecord:
+        product = self.get(product_id)
+        if product is None:
+            raise KeyError(product_id)
+        return product
+    
+    def __setitem__(self, product_id: str, product: ProductRecord):
+        if product_id not in self._loaded and self.catalog.find(product_id) is None:
+            with self._lock:
+                self._extra += 1
+        self._loaded[product_id] = product
+    
+    def __delitem__(self, product_id: str):
+        raise TypeError("Products cannot be deleted")
+    
+    def __contains__(self, product_id) -> bool:
+        return product_id in self._loaded or self.catalog.find(product_id) is not None
+    
+    def __len__(self) -> int:
+        return self.catalog.count + self._extra
+    
+    def __iter__(self) -> Iterator[str]:
+        for slot in range(self.catalog.count):
+            yield self.catalog.id_at(slot)
+        for product_id in list(self._loaded):
+            if self.catalog.find(product_id) is None:
+                yield product_id
+    
+    def values(self):
+        """Every product, materializing the whole catalog on first call."""
+        if len(self._loaded) < len(self):
+            for slot in range(self.catalog.count):
+                product_id = self.catalog.id_at(slot)
+                if product_id not in self._loaded:
+                    self._loaded.setdefault(product_id, self.catalog.product_at(slot))
+        return self._loaded.values()
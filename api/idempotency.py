@@ -0,0 +1,118 @@
+"""Idempotency-Key handling: in-flight tracking and bounded response replay."""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, Response, status
+
+
+# Configuration
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+
+
+class IdempotencyEntry:
+    """State of one (user, key) pair: in flight until `done` resolves."""
+    
+    __slots__ = ("fingerprint", "expires_at", "done", "status_code", "body", "error")
+    
+    def __init__(self, fingerprint: str, expires_at: float):
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+        self.done: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.status_code: Optional[int] = None
+        self.body: Optional[bytes] = None
+        self.error: Optional[HTTPException] = None
+    
+    def replay(self) -> Response:
+        """Re-issue the recorded outcome (cached bytes or the same 4xx error)."""
+        if self.error is not None:
+            raise HTTPException(status_code=self.error.status_code, detail=self.error.detail)
+        return Response(
+            content=self.body,
+            status_code=self.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+
+class IdempotencyStore:
+    """
+    Records the outcome of requests carrying an Idempotency-Key.
+    
+    The first request for a (user, key) pair owns the entry and runs the
+    operation; duplicates arriving while it is in flight wait for it and then
+    replay its response. Entries live for IDEMPOTENCY_TTL_SECONDS and the
+    oldest are evicted beyond IDEMPOTENCY_MAX_ENTRIES. Must be used from the
+    event loop thread.
+    """
+    
+    def __init__(self, ttl_seconds: float = IDEMPOTENCY_TTL_SECONDS, max_entries: int = IDEMPOTENCY_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], IdempotencyEntry]" = OrderedDict()
+        self.replays = 0
+        self.evicted = 0
+    
+    def begin(self, user_id: str, key: str, fingerprint: str) -> Tuple[IdempotencyEntry, bool]:
+        """Return (entry, is_owner). Raises 422 if the key was used for a different request."""
+        now = time.monotonic()
+        self._purge_expired(now)
+        entry = self._entries.get((user_id, key))
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used with a different request body"
+                )
+            return entry, False
+        
+        entry = IdempotencyEntry(fingerprint, now + self.ttl_seconds)
+        self._entries[(user_id, key)] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+        return entry, True
+    
+    def complete(self, entry: IdempotencyEntry, status_code: int, body: bytes) -> None:
+        entry.status_code = status_code
+        entry.body = body
+        entry.done.set_result(True)
+    
+    def fail(self, entry: IdempotencyEntry, error: HTTPException) -> None:
+        """Record a client error so retries get the same answer."""
+        entry.error = error
+        entry.done.set_result(True)
+    
+    def abandon(self, user_id: str, key: str, entry: IdempotencyEntry) -> None:
+        """Forget an entry whose request crashed, letting waiters and retries run it again."""
+        if self._entries.get((user_id, key)) is entry:
+            del self._entries[(user_id, key)]
+        entry.done.set_result(False)
+    
+    async def wait(self, entry: IdempotencyEntry) -> bool:
+        """Wait for the owning request; False if it was abandoned."""
+        completed = await asyncio.shield(entry.done)
+        if completed:
+            self.replays += 1
+        return completed
+    
+    def clear(self) -> None:
+        self._entries.clear()
+        self.replays = 0
+        self.evicted = 0
+    
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "replays": self.replays, "evicted": self.evicted}
+    
+    def _purge_expired(self, now: float) -> None:
+        # Entries are inserted in expiry order (constant TTL), so expired ones sit at the front
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now:
+                break
+            del self._entries[key]
+
+
+payment_idempotency = IdempotencyStore()
@@ -1,26 +1,39 @@
 """FastAPI application implementing OpenAPI v1 specification."""
+import functools
+import json
 import uuid
 from datetime import datetime
-from typing import List
-from fastapi import FastAPI, Depends, HTTPException, status, Header, Request
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+from fastapi import FastAPI, Depends, HTTPException, status, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 
 from api.models import (
     UserRegisterRequest, UserPublic, LoginRequest, LoginResponse,
-    Product, ProductCreateRequest, ProductUpdateRequest,
+    Product, ProductCreateRequest, ProductUpdateRequest, ProductSort, ProductBulkResponse,
     Order, OrderCreateRequest, OrderStatus,
+    OrderBatchCreateRequest, OrderBatchResult, OrderBatchResponse, ErrorDetail,
     Payment, PaymentCreateRequest, PaymentStatus,
     UserInternal, UserRole
 )
-from api.storage import storage
+from api.records import UserRecord
+from api.storage import storage, VersionConflict
 from api.auth import (
-    hash_password, verify_password, create_access_token,
+    hash_password_async, verify_password_async, create_access_token,
     get_current_user, require_admin, require_customer
 )
+from api.rate_limit import login_limiter
+from api.catalog_cache import catalog_cache, etag_matches
+from api.pagination import MAX_PAGE_SIZE, NAME_KEY, ORDER_KEY, PRICE_KEY, encode_cursor, decode_cursor
+from api.idempotency import payment_idempotency
+from api.persistence import persistence
+from api.archive import archiver
+from api.catalog_snapshot import CATALOG_SNAPSHOT, MappedCatalog, LazyProducts
 from api.business_logic import (
-    validate_and_calculate_order, reserve_stock, release_stock,
-    validate_order_cancellation, validate_payment_creation, process_payment
+    place_order, place_orders, release_stock, upsert_product_chunk, BULK_CHUNK_SIZE,
+    validate_order_cancellation, validate_payment_creation, process_payment, change_order_status
 )
 
 
@@ -38,13 +51,18 @@ async def add_request_id(request: Request, call_next):
     response.headers["X-Request-Id"] = request_id
     return response
 
+_PRODUCT_LIST = TypeAdapter(List[Product])
+_ORDER_LIST = TypeAdapter(List[Order])
+
 STATUS_CODE_TO_CODE = {
     400: "BAD_REQUEST",
     401: "UNAUTHORIZED",
     403: "FORBIDDEN",
     404: "NOT_FOUND",
     409: "CONFLICT",
+    412: "PRECONDITION_FAILED",
     422: "VALIDATION_ERROR",
+    429: "TOO_MANY_REQUESTS",
     500: "INTERNAL_ERROR",
 }
 
@@ -69,6 +87,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
             "error": {"code": code, "message": message, "details": details},
             "requestId": request_id,
         },
+        headers=exc.headers,
     )
 
 
@@ -104,6 +123,32 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
     )
 
 
+# ========== Storage Calls ==========
+def _storage_route(handler: Callable) -> Callable:
+    """
+    Register a handler written as a plain def that calls the storage. With
+    a blocking engine (SQLite) FastAPI runs it in its threadpool; with an
+    in-memory engine it is wrapped in a coroutine and runs on the event
+    loop, since those calls never wait and a thread hop would only add
+    latency.
+    """
+    if storage.blocking:
+        return handler
+    
+    @functools.wraps(handler)
+    async def inline(*args, **kwargs):
+        return handler(*args, **kwargs)
+    
+    return inline
+
+
+async def _run_storage(call: Callable, *args):
+    """call(*args) from an async handler, in the threadpool when the storage engine blocks."""
+    if storage.blocking:
+        return await run_in_threadpool(call, *args)
+    return call(*args)
+
+
 # ========== Health ==========
 @app.get("/health", tags=["Health"])
 async def health_check():
@@ -116,7 +161,7 @@ async def health_check():
 async def register(request: UserRegisterRequest):
     """Register a new user."""
     # Check if user already exists
-    existing_user = storage.get_user_by_email(request.email)
+    existing_user = await _run_storage(storage.get_user_by_email, request.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -127,25 +172,36 @@ async def register(request: UserRegisterRequest):
     user = UserInternal(
         id=str(uuid.uuid4()),
         email=request.email,
-        password_hash=hash_password(request.password),
+        password_hash=await hash_password_async(request.password),
         role=request.role
     )
-    storage.add_user(user)
+    # Re-checked atomically: another request may have registered the email while hashing
+    if not await _run_storage(storage.add_user_if_absent, user):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User with this email already exists"
+        )
     
     return UserPublic(id=user.id, email=user.email, role=user.role)
 
 
 @app.post("/auth/login", response_model=LoginResponse, tags=["Auth"])
-async def login(request: LoginRequest):
+async def login(request: LoginRequest, http_request: Request):
     """Login and get access token."""
-    user = storage.get_user_by_email(request.email)
+    client_ip = http_request.client.host if http_request.client else "unknown"
+    # Reject throttled emails/IPs before spending any time in bcrypt
+    attempt = login_limiter.check(request.email, client_ip)
+    
+    user = await _run_storage(storage.get_user_by_email, request.email)
     
-    if not user or not verify_password(request.password, user.password_hash):
+    if not user or not await verify_password_async(request.password, user.password_hash):
+        # check() already counted this attempt as a failure
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
     
+    login_limiter.record_success(attempt)
     access_token = create_access_token(user.id, user.role.value)
     
     return LoginResponse(
@@ -157,26 +213,111 @@ async def login(request: LoginRequest):
 
 # ========== Product Endpoints ==========
 @app.get("/products", response_model=List[Product], tags=["Products"])
-async def list_products():
-    """List all active products. No authentication required."""
-    products = storage.list_products(active_only=True)
-    return products
+@_storage_route
+def list_products(
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    minPrice: Optional[float] = Query(None, ge=0),
+    maxPrice: Optional[float] = Query(None, ge=0),
+    inStock: Optional[bool] = None,
+    namePrefix: Optional[str] = None,
+    sort: Optional[ProductSort] = None,
+):
+    """
+    List active products. No authentication required.
+    Without query parameters the whole catalog is returned; with any of
+    them the result is filtered/sorted and, if `limit` is set, paged with
+    the cursor returned in the X-Next-Cursor header.
+    """
+    if any(v is not None for v in (limit, cursor, minPrice, maxPrice, inStock, namePrefix, sort)):
+        sort = sort or ProductSort.NAME
+        sort_by = sort.value.lstrip("-")
+        page, next_key = storage.query_products(
+            sort_by=sort_by,
+            descending=sort.value.startswith("-"),
+            after=decode_cursor(cursor, f"products:{sort.value}", PRICE_KEY if sort_by == "price" else NAME_KEY),
+            limit=limit,
+            min_price=minPrice,
+            max_price=maxPrice,
+            name_prefix=namePrefix,
+            in_stock=inStock,
+        )
+        headers = {}
+        if next_key is not None:
+            headers["X-Next-Cursor"] = encode_cursor(f"products:{sort.value}", next_key)
+        return Response(content=_PRODUCT_LIST.dump_json([p.to_model() for p in page]), media_type="application/json", headers=headers)
+    
+    # Served from pre-encoded bytes; response_model only documents the schema
+    body, etag = catalog_cache.get()
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 @app.get("/products/{id}", response_model=Product, tags=["Products"])
-async def get_product(id: str):
+@_storage_route
+def get_product(id: str, response: Response):
     """Get a specific product by ID. No authentication required."""
-    product = storage.get_product(id)
+    product, version = storage.get_product_with_version(id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Product {id} not found"
         )
-    return product
+    response.headers["ETag"] = _product_etag(version)
+    return product.to_model()
+
+
+@app.patch("/products/{id}", response_model=Product, tags=["Products"])
+@_storage_route
+def update_product(
+    id: str,
+    request: ProductUpdateRequest,
+    response: Response,
+    if_match: Optional[str] = Header(None, alias="If-Match"),
+    user: UserRecord = Depends(require_admin)
+):
+    """
+    Partially update a product in place. Admin only.
+    Send the ETag from a previous GET/PATCH in If-Match to make the update
+    conditional; a concurrent change in between yields 412.
+    """
+    changes = {field: value for field, value in request.model_dump(exclude_unset=True).items() if value is not None}
+    try:
+        product, version = storage.patch_product(id, changes, expected_version=_parse_if_match(if_match))
+    except VersionConflict as exc:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"Product {id} has been modified since the given ETag",
+            headers={"ETag": _product_etag(exc.current_version)}
+        )
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Product {id} not found"
+        )
+    response.headers["ETag"] = _product_etag(version)
+    return product.to_model()
+
+
+def _product_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def _parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Version from an If-Match header; None means unconditional, -1 never matches."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        return -1
 
 
 @app.post("/products", response_model=Product, status_code=status.HTTP_201_CREATED, tags=["Products"])
-async def create_product(request: ProductCreateRequest, user: UserInternal = Depends(require_admin)):
+@_storage_route
+def create_product(request: ProductCreateRequest, user: UserRecord = Depends(require_admin)):
     """Create a new product. Admin only."""
     product = Product(
         id=str(uuid.uuid4()),
@@ -190,15 +331,79 @@ async def create_product(request: ProductCreateRequest, user: UserInternal = Dep
     return product
 
 
+@app.post("/products:bulk", response_model=ProductBulkResponse, tags=["Products"])
+async def bulk_upsert_products(http_request: Request, user: UserRecord = Depends(require_admin)):
+    """
+    Bulk import/upsert products. Admin only.
+    Accepts a JSON array or an NDJSON stream (Content-Type: application/x-ndjson)
+    of product rows. Rows are validated and upserted in chunks; invalid rows
+    are reported individually without failing the rest of the batch.
+    """
+    created = updated = 0
+    errors = []
+    chunk = []
+    async for row in _iter_bulk_rows(http_request):
+        chunk.append(row)
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            chunk_created, chunk_updated, chunk_errors = await _run_storage(upsert_product_chunk, chunk)
+            created, updated = created + chunk_created, updated + chunk_updated
+            errors.extend(chunk_errors)
+            chunk = []
+    if chunk:
+        chunk_created, chunk_updated, chunk_errors = await _run_storage(upsert_product_chunk, chunk)
+        created, updated = created + chunk_created, updated + chunk_updated
+        errors.extend(chunk_errors)
+    
+    await _run_storage(storage.invalidate_catalog)
+    errors.sort(key=lambda row_error: row_error.index)
+    return ProductBulkResponse(created=created, updated=updated, failed=len(errors), errors=errors)
+
+
+async def _iter_bulk_rows(http_request: Request) -> AsyncIterator[Tuple[int, Any, Optional[str]]]:
+    """Yield (index, row, parse_error) from a JSON-array or NDJSON request body."""
+    content_type = http_request.headers.get("content-type", "")
+    if "ndjson" not in content_type and "jsonl" not in content_type:
+        try:
+            rows = json.loads(await http_request.body())
+        except ValueError:
+            rows = None
+        if not isinstance(rows, list):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Request body must be a JSON array of product rows"
+            )
+        for index, row in enumerate(rows):
+            yield index, row, None
+        return
+    
+    # NDJSON: parse line by line as the body streams in
+    index = 0
+    buffer = b""
+    async for data in http_request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_ndjson_line(index, line)
+                index += 1
+    if buffer.strip():
+        yield _parse_ndjson_line(index, buffer)
+
+
+def _parse_ndjson_line(index: int, line: bytes) -> Tuple[int, Any, Optional[str]]:
+    try:
+        return index, json.loads(line), None
+    except ValueError:
+        return index, None, "Invalid JSON"
+
+
 # ========== Order Endpoints ==========
 @app.post("/orders", response_model=Order, status_code=status.HTTP_201_CREATED, tags=["Orders"])
-async def create_order(request: OrderCreateRequest, user: UserInternal = Depends(require_customer)):
+@_storage_route
+def create_order(request: OrderCreateRequest, user: UserRecord = Depends(require_customer)):
     """Create a new order. Customer only."""
-    # Validate and calculate total
-    total_amount, currency = validate_and_calculate_order(request.items)
-    
-    # Reserve stock
-    reserve_stock(request.items)
+    # Validate, price and reserve stock against one product snapshot
+    total_amount, currency = place_order(request.items)
     
     # Create order
     order = Order(
@@ -215,8 +420,85 @@ async def create_order(request: OrderCreateRequest, user: UserInternal = Depends
     return order
 
 
+@app.post("/orders:batch", response_model=OrderBatchResponse, tags=["Orders"])
+@_storage_route
+def create_orders_batch(request: OrderBatchCreateRequest, user: UserRecord = Depends(require_customer)):
+    """
+    Create many orders in one call. Customer only.
+    Each order succeeds or fails on its own (same rules and error codes as
+    POST /orders); stock for all of them is reserved in one storage pass.
+    """
+    carts = [order_request.items for order_request in request.orders]
+    outcomes = place_orders(carts)
+    
+    created_at = datetime.utcnow()
+    results: List[OrderBatchResult] = []
+    orders: List[Order] = []
+    for index, (items, outcome) in enumerate(zip(carts, outcomes)):
+        if isinstance(outcome, HTTPException):
+            results.append(OrderBatchResult(
+                index=index,
+                status=outcome.status_code,
+                error=ErrorDetail(
+                    code=STATUS_CODE_TO_CODE.get(outcome.status_code, "HTTP_ERROR"),
+                    message=str(outcome.detail),
+                ),
+            ))
+            continue
+        total_amount, currency = outcome
+        order = Order(
+            id=str(uuid.uuid4()),
+            userId=user.id,
+            items=items,
+            totalAmount=total_amount,
+            currency=currency,
+            status=OrderStatus.CREATED,
+            createdAt=created_at
+        )
+        orders.append(order)
+        results.append(OrderBatchResult(index=index, status=status.HTTP_201_CREATED, order=order))
+    storage.add_orders(orders)
+    
+    return OrderBatchResponse(results=results)
+
+
+@app.get("/orders", response_model=List[Order], tags=["Orders"])
+@_storage_route
+def list_orders(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    order_status: Optional[OrderStatus] = Query(None, alias="status"),
+    userId: Optional[str] = None,
+    user: UserRecord = Depends(get_current_user),
+):
+    """
+    List orders, newest first. Customers see only their own orders; admins
+    see all orders and may filter by userId. The next page's cursor is
+    returned in the X-Next-Cursor header.
+    """
+    if user.role != UserRole.ADMIN:
+        if userId is not None and userId != user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You can only view your own orders"
+            )
+        userId = user.id
+    
+    page, next_key = storage.query_orders(
+        user_id=userId,
+        status=order_status,
+        after=decode_cursor(cursor, "orders", ORDER_KEY),
+        limit=limit,
+    )
+    headers = {}
+    if next_key is not None:
+        headers["X-Next-Cursor"] = encode_cursor("orders", next_key)
+    return Response(content=_ORDER_LIST.dump_json([o.to_model() for o in page]), media_type="application/json", headers=headers)
+
+
 @app.get("/orders/{id}", response_model=Order, tags=["Orders"])
-async def get_order(id: str, user: UserInternal = Depends(get_current_user)):
+@_storage_route
+def get_order(id: str, user: UserRecord = Depends(get_current_user)):
     """Get order by ID."""
     order = storage.get_order(id)
     if not order:
@@ -232,11 +514,12 @@ async def get_order(id: str, user: UserInternal = Depends(get_current_user)):
             detail="You can only view your own orders"
         )
     
-    return order
+    return order.to_model()
 
 
 @app.post("/orders/{id}/cancel", response_model=Order, tags=["Orders"])
-async def cancel_order(id: str, user: UserInternal = Depends(require_customer)):
+@_storage_route
+def cancel_order(id: str, user: UserRecord = Depends(require_customer)):
     """Cancel an order. Customer only."""
     order = storage.get_order(id)
     if not order:
@@ -255,24 +538,54 @@ async def cancel_order(id: str, user: UserInternal = Depends(require_customer)):
     # Validate cancellation
     validate_order_cancellation(order)
     
-    # Release stock
+    # Update order status, then release stock: only the request that wins the transition gives it back
+    cancelled = change_order_status(order, OrderStatus.CANCELLED)
     release_stock(order.items)
     
-    # Update order status
-    order.status = OrderStatus.CANCELLED
-    storage.update_order(id, order)
-    
-    return order
+    return cancelled.to_model()
 
 
 # ========== Payment Endpoints ==========
 @app.post("/payments", response_model=Payment, status_code=status.HTTP_201_CREATED, tags=["Payments"])
 async def create_payment(
     request: PaymentCreateRequest,
-    user: UserInternal = Depends(get_current_user),
+    user: UserRecord = Depends(get_current_user),
     idempotency_key: str = Header(None, alias="Idempotency-Key")
 ):
-    """Create a payment for an order."""
+    """
+    Create a payment for an order.
+    With an Idempotency-Key, retries (including concurrent duplicates) get
+    the first request's response replayed instead of running it again.
+    """
+    if not idempotency_key:
+        return await _run_storage(_create_payment, request, user)
+    
+    fingerprint = f"{request.orderId}:{request.method.value}"
+    while True:
+        entry, is_owner = payment_idempotency.begin(user.id, idempotency_key, fingerprint)
+        if is_owner:
+            break
+        if await payment_idempotency.wait(entry):
+            return entry.replay()
+    
+    try:
+        payment = await _run_storage(_create_payment, request, user)
+    except HTTPException as exc:
+        if exc.status_code >= 500:
+            payment_idempotency.abandon(user.id, idempotency_key, entry)
+        else:
+            payment_idempotency.fail(entry, exc)
+        raise
+    except BaseException:
+        payment_idempotency.abandon(user.id, idempotency_key, entry)
+        raise
+    
+    body = payment.model_dump_json().encode("utf-8")
+    payment_idempotency.complete(entry, status.HTTP_201_CREATED, body)
+    return Response(content=body, status_code=status.HTTP_201_CREATED, media_type="application/json")
+
+
+def _create_payment(request: PaymentCreateRequest, user: UserRecord) -> Payment:
     # Get order
     order = storage.get_order(request.orderId)
     if not order:
@@ -313,7 +626,8 @@ async def create_payment(
 
 
 @app.get("/payments/{id}", response_model=Payment, tags=["Payments"])
-async def get_payment(id: str, user: UserInternal = Depends(get_current_user)):
+@_storage_route
+def get_payment(id: str, user: UserRecord = Depends(get_current_user)):
     """Get payment by ID."""
     payment = storage.get_payment(id)
     if not payment:
@@ -330,17 +644,35 @@ async def get_payment(id: str, user: UserInternal = Depends(get_current_user)):
             detail="You can only view payments for your own orders"
         )
     
-    return payment
+    return payment.to_model()
 
 
 # ========== Startup Event ==========
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database with sample products."""
-    # Create some sample products for testing
+    """Load the catalog snapshot and persisted state and start order archival if configured, otherwise seed sample products."""
+    if CATALOG_SNAPSHOT:
+        storage.load_catalog(LazyProducts(MappedCatalog(CATALOG_SNAPSHOT)))
+        print(f"✓ Mapped {storage.product_count()} products from {CATALOG_SNAPSHOT}")
+    if persistence.enabled:
+        replayed = persistence.open()
+        if storage.product_count():
+            print(f"✓ Restored {storage.product_count()} products from {persistence.directory} "
+                  f"({replayed} log records replayed)")
+    if archiver.enabled:
+        archiver.start()
+    if storage.product_count():
+        return  # already populated (or another worker sharing the storage seeded it)
+    seed_sample_products()
+    print(f"✓ Initialized {storage.product_count()} sample products")
+
+
+def seed_sample_products():
+    """Add the sample products used by the test suite, always with the same ids and stock."""
+    # Fixed ids keep concurrent seeding idempotent
     sample_products = [
         Product(
-            id=str(uuid.uuid4()),
+            id=_sample_product_id("Laptop"),
             name="Laptop",
             price=15000.0,
             currency="TRY",
@@ -348,7 +680,7 @@ async def startup_event():
             isActive=True
         ),
         Product(
-            id=str(uuid.uuid4()),
+            id=_sample_product_id("Mouse"),
             name="Mouse",
             price=150.0,
             currency="TRY",
@@ -356,7 +688,7 @@ async def startup_event():
             isActive=True
         ),
         Product(
-            id=str(uuid.uuid4()),
+            id=_sample_product_id("Keyboard"),
             name="Keyboard",
             price=500.0,
             currency="TRY",
@@ -364,7 +696,7 @@ async def startup_event():
             isActive=True
         ),
         Product(
-            id=str(uuid.uuid4()),
+            id=_sample_product_id("Monitor"),
             name="Monitor",
             price=3000.0,
             currency="TRY",
@@ -375,8 +707,18 @@ async def startup_event():
     
     for product in sample_products:
         storage.add_product(product)
-    
-    print(f"✓ Initialized {len(sample_products)} sample products")
+
+
+def _sample_product_id(name: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"sample-product:{name}"))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop order archival, flush the write-ahead log and close the storage before the process exits."""
+    archiver.stop()
+    persistence.close()
+    storage.close()
 
 
 if __name__ == "__main__":
@@ -22,6 +22,13 @@ class PaymentMethod(str, Enum):
     TRANSFER = "TRANSFER"
 
 
+class ProductSort(str, Enum):
+    NAME = "name"
+    NAME_DESC = "-name"
+    PRICE = "price"
+    PRICE_DESC = "-price"
+
+
 class PaymentStatus(str, Enum):
     INITIATED = "INITIATED"
     CAPTURED = "CAPTURED"
@@ -90,6 +97,18 @@ class ProductUpdateRequest(BaseModel):
     isActive: Optional[bool] = None
 
 
+class ProductBulkRowError(BaseModel):
+    index: int
+    error: ErrorDetail
+
+
+class ProductBulkResponse(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    errors: List[ProductBulkRowError]
+
+
 # ========== Order Models ==========
 class OrderItem(BaseModel):
     productId: str
@@ -110,6 +129,21 @@ class OrderCreateRequest(BaseModel):
     items: List[OrderItem] = Field(..., min_length=1)
 
 
+class OrderBatchCreateRequest(BaseModel):
+    orders: List[OrderCreateRequest] = Field(..., min_length=1, max_length=100)
+
+
+class OrderBatchResult(BaseModel):
+    index: int
+    status: int
+    order: Optional[Order] = None
+    error: Optional[ErrorDetail] = None
+
+
+class OrderBatchResponse(BaseModel):
+    results: List[OrderBatchResult]
+
+
 # ========== Payment Models ==========
 class Payment(BaseModel):
     id: str
@@ -0,0 +1,54 @@
+"""Opaque cursor helpers for keyset-paginated listings."""
+import base64
+import json
+import math
+from typing import Optional
+from fastapi import HTTPException, status
+
+
+MAX_PAGE_SIZE = 100
+
+# Element types of each listing's sort key, checked when a cursor is decoded
+NAME_KEY = (str, str)  # (casefolded name, product id)
+PRICE_KEY = (float, str)  # (price, product id)
+ORDER_KEY = (str, str)  # (createdAt ISO timestamp, order id)
+
+
+def encode_cursor(kind: str, key: tuple) -> str:
+    """Encode the sort key of the last returned item as an opaque cursor."""
+    raw = json.dumps([kind, list(key)], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], kind: str, key_types: tuple) -> Optional[tuple]:
+    """
+    Decode a cursor produced by encode_cursor for the same listing kind.
+    The key must have one element of each of `key_types`, so a forged
+    cursor gets a 400 instead of breaking the index lookup.
+    """
+    if cursor is None:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_kind, key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError):
+        cursor_kind, key = None, None
+    if cursor_kind != kind or not isinstance(key, list) or not _key_matches(key, key_types):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return tuple(key)
+
+
+def _key_matches(key: list, key_types: tuple) -> bool:
+    if len(key) != len(key_types):
+        return False
+    for value, expected in zip(key, key_types):
+        if expected is float:
+            # JSON numbers decode as int or float; bool is an int subclass
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                return False
+        elif not isinstance(value, expected):
+            return False
+    return True
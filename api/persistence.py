@@ -0,0 +1,300 @@
+"""Optional durability for the in-memory storage: write-ahead log plus periodic snapshots."""
+import glob
+import json
+import os
+import threading
+from datetime import datetime
+from operator import attrgetter
+from typing import Dict, List, Optional
+from api.models import UserInternal, UserRole, Product, Order, OrderStatus, Payment, PaymentMethod, PaymentStatus
+from api.records import UserRecord, ProductRecord, OrderRecord, OrderLine, PaymentRecord
+from api.storage import storage, InMemoryStorage
+
+
+# Configuration
+PERSIST_DIR = os.getenv("PERSIST_DIR", "")  # empty keeps the storage purely in memory
+PERSIST_FSYNC_MS = float(os.getenv("PERSIST_FSYNC_MS", "10"))
+PERSIST_SNAPSHOT_EVERY = int(os.getenv("PERSIST_SNAPSHOT_EVERY", "100000"))  # log records between snapshots
+
+SNAPSHOT_FILE = "snapshot.json"
+
+# Log and snapshot rows hold a record's fields in __slots__ order
+_user_row = attrgetter(*UserRecord.__slots__)
+_product_row = attrgetter(*ProductRecord.__slots__)
+_order_row = attrgetter(*OrderRecord.__slots__)
+_payment_row = attrgetter(*PaymentRecord.__slots__)
+
+
+class WriteAheadLog:
+    """
+    Append-only log of storage mutations, one JSON record per line.
+    
+    Storage writers only append to an in-memory buffer while holding their
+    own locks; the flusher writes the whole buffer and fsyncs it in one go
+    (group commit), so a crash loses at most one flush interval of writes.
+    Appending captures a record's field values as a tuple, since products
+    and orders are later mutated in place; the JSON encoding is left to the
+    flusher, outside the storage locks.
+    """
+    
+    def __init__(self, path: str):
+        self._lock = threading.Lock()  # guards the buffer
+        self._io_lock = threading.Lock()  # serializes writes and segment switches
+        self._buffer: List[tuple] = []
+        self._file = open(path, "ab")
+        self.records = 0  # since the segment was opened
+        self.fsyncs = 0
+    
+    def user(self, user: UserRecord) -> None:
+        self._append(("user", _user_row(user)))
+    
+    def product(self, product: ProductRecord) -> None:
+        self._append(("product", _product_row(product)))
+    
+    def patch(self, product_id: str, changes: dict) -> None:
+        self._append(("patch", dict(changes), product_id))
+    
+    def stock(self, deltas: Dict[str, int]) -> None:
+        """Signed stock changes per product id."""
+        self._append(("stock", deltas))
+    
+    def order(self, order: OrderRecord) -> None:
+        self._append(("order", _order_row(order)))
+    
+    def payment(self, payment: PaymentRecord) -> None:
+        self._append(("payment", _payment_row(payment)))
+    
+    def flush(self) -> None:
+        """Write and fsync everything appended so far."""
+        with self._io_lock:
+            self._flush_locked()
+    
+    def rotate(self, path: str) -> None:
+        """Finish the current segment and continue in a new file."""
+        with self._io_lock:
+            self._flush_locked()
+            self._file.close()
+            self._file = open(path, "ab")
+            self.records = 0
+    
+    def close(self) -> None:
+        with self._io_lock:
+            self._flush_locked()
+            self._file.close()
+    
+    def _append(self, entry: tuple) -> None:
+        with self._lock:
+            self._buffer.append(entry)
+            self.records += 1
+    
+    def _flush_locked(self) -> None:
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        lines = [
+            _dumps({"op": entry[0], "v": entry[1], "id": entry[2]} if len(entry) == 3 else {"op": entry[0], "v": entry[1]})
+            for entry in batch
+        ]
+        self._file.write(("\n".join(lines) + "\n").encode("utf-8"))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.fsyncs += 1
+
+
+class StoragePersistence:
+    """
+    Makes an InMemoryStorage survive restarts.
+    
+    The directory holds `snapshot.json` plus numbered log segments
+    (`wal-<n>.log`). A snapshot records the first segment that is not part
+    of it; restoring loads the snapshot and replays that segment and every
+    later one. A background thread group-commits the log every
+    PERSIST_FSYNC_MS and takes a new snapshot once PERSIST_SNAPSHOT_EVERY
+    records have accumulated, after which older segments are deleted.
+    """
+    
+    def __init__(self, store: InMemoryStorage, directory: str = PERSIST_DIR,
+                 fsync_ms: float = PERSIST_FSYNC_MS, snapshot_every: int = PERSIST_SNAPSHOT_EVERY):
+        self.store = store
+        self.directory = directory
+        self.fsync_interval = fsync_ms / 1000
+        self.snapshot_every = snapshot_every
+        self._wal: Optional[WriteAheadLog] = None
+        self._segment = 0
+        self._snapshot_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.replayed = 0
+        self.snapshots = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+    
+    def open(self) -> int:
+        """Restore the storage from disk, then start journaling. Returns the number of log records replayed."""
+        if not isinstance(self.store, InMemoryStorage):
+            raise ValueError("Persistence needs an in-memory storage engine")
+        os.makedirs(self.directory, exist_ok=True)
+        self._restore()
+        self._segment += 1
+        self._wal = WriteAheadLog(self._segment_path(self._segment))
+        self.store.journal = self._wal
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="storage-wal", daemon=True)
+        self._thread.start()
+        return self.replayed
+    
+    def snapshot(self) -> None:
+        """Write a compact snapshot of the whole storage and drop the log it covers."""
+        with self._snapshot_lock:
+            with self.store.freeze():
+                state = self._dump_state()
+                self._segment += 1
+                self._wal.rotate(self._segment_path(self._segment))
+            state["segment"] = self._segment
+            
+            path = os.path.join(self.directory, SNAPSHOT_FILE)
+            with open(path + ".tmp", "wb") as f:
+                f.write(_dumps(state).encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            for number, old in self._segments():
+                if number < self._segment:
+                    os.remove(old)
+            self.snapshots += 1
+    
+    def close(self) -> None:
+        """Stop the flusher and make every appended record durable."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.store.journal = None
+        self._wal.close()
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "segment": self._segment,
+            "replayed": self.replayed,
+            "snapshots": self.snapshots,
+            "fsyncs": self._wal.fsyncs if self._wal else 0,
+        }
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.fsync_interval):
+            self._wal.flush()
+            if self._wal.records >= self.snapshot_every:
+                self.snapshot()
+    
+    def _dump_state(self) -> Dict[str, list]:
+        # Caller holds every storage lock; rows are encoded after it lets go
+        store = self.store
+        orders, payments = list(store.orders.values()), list(store.payments.values())
+        if store.cold is not None:
+            # Archived orders only live in the cold store (see api.archive)
+            for order, payment in store.cold.rows():
+                orders.append(order)
+                if payment is not None:
+                    payments.append(payment)
+        return {
+            "users": [_user_row(user) for user in store.users.values()],
+            "products": [_product_row(product) for product in store.products.values()],
+            "orders": [_order_row(order) for order in orders],
+            "payments": [_payment_row(payment) for payment in payments],
+        }
+    
+    def _restore(self) -> None:
+        store = self.store
+        first_segment = 0
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                state = json.load(f)
+            first_segment = state["segment"]
+            for row in state["users"]:
+                store.add_user(_load("user", row))
+            products = [_load("product", row) for row in state["products"]]
+            store.upsert_products([(product.id, product, {}) for product in products])
+            store.add_orders([_load("order", row) for row in state["orders"]])
+            for row in state["payments"]:
+                store.add_payment(_load("payment", row))
+        self._segment = first_segment
+        
+        for number, segment_path in self._segments():
+            self._segment = max(self._segment, number)
+            if number >= first_segment:
+                self._replay(segment_path)
+    
+    def _replay(self, path: str) -> None:
+        store = self.store
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn write at the tail of the last segment
+                op, value = record["op"], record["v"]
+                if op == "stock":
+                    store.release_many(value.items())  # signed deltas
+                elif op == "patch":
+                    store.patch_product(record["id"], value)
+                elif op == "product":
+                    store.add_product(_load(op, value))
+                elif op == "order":
+                    store.add_order(_load(op, value))
+                elif op == "payment":
+                    store.add_payment(_load(op, value))
+                elif op == "user":
+                    store.add_user(_load(op, value))
+                self.replayed += 1
+    
+    def _segments(self) -> List:
+        """(number, path) of every log segment on disk, oldest first."""
+        found = []
+        for path in glob.glob(os.path.join(self.directory, "wal-*.log")):
+            number = os.path.basename(path)[len("wal-"):-len(".log")]
+            if number.isdigit():
+                found.append((int(number), path))
+        return sorted(found)
+    
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"wal-{number:08d}.log")
+
+
+def _encode_value(value):
+    # Everything else in a row is a str (enums included), number, bool or tuple
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a log row")
+
+
+# One shared encoder: json.dumps with options would build a new one per record
+_dumps = json.JSONEncoder(separators=(",", ":"), default=_encode_value).encode
+
+
+def _load(kind: str, value):
+    """Record from a log/snapshot row, or API model from the JSON object that older files hold."""
+    if isinstance(value, dict):
+        return _MODELS[kind].model_validate(value)
+    if kind == "user":
+        id, email, password_hash, role = value
+        return UserRecord(id, email, password_hash, UserRole(role))
+    if kind == "product":
+        return ProductRecord(*value)
+    if kind == "order":
+        id, user_id, items, total_amount, currency, order_status, created_at = value
+        return OrderRecord(id, user_id, tuple(OrderLine(*line) for line in items), total_amount, currency,
+                           OrderStatus(order_status), datetime.fromisoformat(created_at))
+    id, order_id, amount, currency, method, payment_status, provider_ref, created_at = value
+    return PaymentRecord(id, order_id, amount, currency, PaymentMethod(method), PaymentStatus(payment_status),
+                         provider_ref, datetime.fromisoformat(created_at))
+
+
+_MODELS = {"user": UserInternal, "product": Product, "order": Order, "payment": Payment}
+
+
+persistence = StoragePersistence(storage)
@@ -0,0 +1,136 @@
+"""Sliding-window rate limiting for failed login attempts."""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, NamedTuple, Optional, Tuple
+from fastapi import HTTPException, status
+
+
+# Configuration
+LOGIN_WINDOW_SECONDS = float(os.getenv("LOGIN_WINDOW_SECONDS", "60"))
+LOGIN_MAX_FAILURES_PER_EMAIL = int(os.getenv("LOGIN_MAX_FAILURES_PER_EMAIL", "5"))
+LOGIN_MAX_FAILURES_PER_IP = int(os.getenv("LOGIN_MAX_FAILURES_PER_IP", "50"))
+LOGIN_LIMITER_MAX_KEYS = int(os.getenv("LOGIN_LIMITER_MAX_KEYS", "100000"))
+
+
+class SlidingWindowLimiter:
+    """
+    Per-key sliding-window event log.
+    
+    A key is blocked once `limit` events were recorded within the last
+    `window_seconds`. Each key keeps at most `limit` timestamps and at most
+    `max_keys` keys are tracked (least recently touched keys are evicted),
+    so memory stays bounded under credential-stuffing bursts.
+    """
+    
+    def __init__(self, limit: int, window_seconds: float, max_keys: int = LOGIN_LIMITER_MAX_KEYS):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._events: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        self.rejected = 0
+        self.evicted = 0
+    
+    def acquire(self, key: str) -> Tuple[float, Optional[float]]:
+        """
+        Record an event for `key` unless it is blocked, in one step. Returns
+        (0, stamp) once recorded (pass the stamp to refund() to take the
+        event back), or (seconds until `key` may try again, None).
+        """
+        now = time.monotonic()
+        with self._lock:
+            events = self._events.get(key)
+            if events is None:
+                events = self._events[key] = deque(maxlen=self.limit)
+                while len(self._events) > self.max_keys:
+                    self._events.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._events.move_to_end(key)
+                if len(events) >= self.limit:
+                    wait = self.window_seconds - (now - events[0])
+                    if wait > 0:
+                        self.rejected += 1
+                        return wait, None
+            events.append(now)
+            return 0.0, now
+    
+    def refund(self, key: str, stamp: float) -> None:
+        """Take back an event recorded by acquire() (a no-op once it has aged out)."""
+        with self._lock:
+            events = self._events.get(key)
+            if events is not None:
+                try:
+                    events.remove(stamp)
+                except ValueError:
+                    pass
+    
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._events.pop(key, None)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._events.clear()
+            self.rejected = 0
+            self.evicted = 0
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"keys": len(self._events), "rejected": self.rejected, "evicted": self.evicted}
+
+
+class LoginAttempt(NamedTuple):
+    """A login attempt counted by LoginRateLimiter.check()."""
+    email: str
+    client_ip: str
+    ip_stamp: float
+
+
+class LoginRateLimiter:
+    """Fast-fail guard for /auth/login keyed by email and by client IP."""
+    
+    def __init__(self):
+        self.by_email = SlidingWindowLimiter(LOGIN_MAX_FAILURES_PER_EMAIL, LOGIN_WINDOW_SECONDS)
+        self.by_ip = SlidingWindowLimiter(LOGIN_MAX_FAILURES_PER_IP, LOGIN_WINDOW_SECONDS)
+    
+    def check(self, email: str, client_ip: str) -> LoginAttempt:
+        """
+        Count a failed attempt against the email and the client IP before any
+        password hashing, or raise 429 if either is over its limit. The
+        attempt stays counted unless record_success() hands it back, so
+        concurrent attempts cannot all get past before the first failure
+        is known.
+        """
+        email = email.lower()
+        wait, email_stamp = self.by_email.acquire(email)
+        ip_stamp = None
+        if not wait:
+            wait, ip_stamp = self.by_ip.acquire(client_ip)
+            if wait:
+                self.by_email.refund(email, email_stamp)
+        if wait > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many failed login attempts. Try again later.",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+        return LoginAttempt(email, client_ip, ip_stamp)
+    
+    def record_success(self, attempt: LoginAttempt) -> None:
+        """Forget the email's failures and refund the attempt's IP slot."""
+        self.by_email.reset(attempt.email)
+        self.by_ip.refund(attempt.client_ip, attempt.ip_stamp)
+    
+    def clear(self) -> None:
+        self.by_email.clear()
+        self.by_ip.clear()
+    
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {"email": self.by_email.stats(), "ip": self.by_ip.stats()}
+
+
+login_limiter = LoginRateLimiter()
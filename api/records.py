@@ -0,0 +1,103 @@
+"""Slim internal records kept by the storage engines, converted to API models at the response boundary."""
+from datetime import datetime
+from typing import NamedTuple, Tuple
+from api.models import (
+    UserInternal, UserRole, Product, Order, OrderItem, OrderStatus,
+    Payment, PaymentMethod, PaymentStatus
+)
+
+
+class OrderLine(NamedTuple):
+    productId: str
+    qty: int
+
+
+class UserRecord:
+    __slots__ = ("id", "email", "password_hash", "role")
+    
+    def __init__(self, id: str, email: str, password_hash: str, role: UserRole):
+        self.id = id
+        self.email = email
+        self.password_hash = password_hash
+        self.role = role
+    
+    @classmethod
+    def from_model(cls, user) -> "UserRecord":
+        return cls(user.id, user.email, user.password_hash, user.role)
+    
+    def to_model(self) -> UserInternal:
+        return UserInternal.model_construct(id=self.id, email=self.email, password_hash=self.password_hash, role=self.role)
+
+
+class ProductRecord:
+    __slots__ = ("id", "name", "price", "currency", "stock", "isActive")
+    
+    def __init__(self, id: str, name: str, price: float, currency: str, stock: int, isActive: bool):
+        self.id = id
+        self.name = name
+        self.price = price
+        self.currency = currency
+        self.stock = stock
+        self.isActive = isActive
+    
+    @classmethod
+    def from_model(cls, product) -> "ProductRecord":
+        return cls(product.id, product.name, product.price, product.currency, product.stock, product.isActive)
+    
+    def to_model(self) -> Product:
+        return Product.model_construct(
+            id=self.id, name=self.name, price=self.price, currency=self.currency,
+            stock=self.stock, isActive=self.isActive,
+        )
+
+
+class OrderRecord:
+    __slots__ = ("id", "userId", "items", "totalAmount", "currency", "status", "createdAt")
+    
+    def __init__(self, id: str, userId: str, items: Tuple[OrderLine, ...], totalAmount: float,
+                 currency: str, status: OrderStatus, createdAt: datetime):
+        self.id = id
+        self.userId = userId
+        self.items = items
+        self.totalAmount = totalAmount
+        self.currency = currency
+        self.status = status
+        self.createdAt = createdAt
+    
+    @classmethod
+    def from_model(cls, order) -> "OrderRecord":
+        items = tuple(OrderLine(item.productId, item.qty) for item in order.items)
+        return cls(order.id, order.userId, items, order.totalAmount, order.currency, order.status, order.createdAt)
+    
+    def to_model(self) -> Order:
+        return Order.model_construct(
+            id=self.id, userId=self.userId,
+            items=[OrderItem.model_construct(productId=line.productId, qty=line.qty) for line in self.items],
+            totalAmount=self.totalAmount, currency=self.currency, status=self.status, createdAt=self.createdAt,
+        )
+
+
+class PaymentRecord:
+    __slots__ = ("id", "orderId", "amount", "currency", "method", "status", "providerRef", "createdAt")
+    
+    def __init__(self, id: str, orderId: str, amount: float, currency: str, method: PaymentMethod,
+                 status: PaymentStatus, providerRef: str, createdAt: datetime):
+        self.id = id
+        self.orderId = orderId
+        self.amount = amount
+        self.currency = currency
+        self.method = method
+        self.status = status
+        self.providerRef = providerRef
+        self.createdAt = createdAt
+    
+    @classmethod
+    def from_model(cls, payment) -> "PaymentRecord":
+        return cls(payment.id, payment.orderId, payment.amount, payment.currency, payment.method,
+                   payment.status, payment.providerRef, payment.createdAt)
+    
+    def to_model(self) -> Payment:
+        return Payment.model_construct(
+            id=self.id, orderId=self.orderId, amount=self.amount, currency=self.currency, method=self.method,
+            status=self.status, providerRef=self.providerRef, createdAt=self.createdAt,
+        )
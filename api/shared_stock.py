@@ -0,0 +1,462 @@
+"""Product stock counters in shared memory, layered over the SQLite engine for running several worker processes."""
+import fcntl
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Dict, Iterable, List, MutableMapping, Optional, Tuple
+from api.records import ProductRecord
+from api.sqlite_storage import SQLITE_PATH, SQLiteStorage
+from api.storage import InMemoryStorage, VersionConflict
+
+
+# Configuration
+SHARED_STOCK_NAME = os.getenv("SHARED_STOCK_NAME", "ecommerce-stock")
+SHARED_STOCK_SLOTS = int(os.getenv("SHARED_STOCK_SLOTS", "65536"))
+SHARED_STOCK_STRIPES = int(os.getenv("SHARED_STOCK_STRIPES", "64"))
+
+# Layout: header (magic, stripes, slots, used), one generation counter per stripe,
+# then slots of (16-byte blake2b digest of the product id, int64 stock, int64 stock changes).
+_MAGIC = b"STK2"
+_HEADER = struct.Struct("<4siqq")
+_COUNTER = struct.Struct("<q")
+_SLOT = struct.Struct("<16sqq")
+_EMPTY = bytes(16)
+
+
+class SharedStockCounters:
+    """
+    Fixed-size hash table of stock counters in a named shared-memory segment.
+    
+    Every worker process attaches to the same segment by name, so a
+    product's stock lives in exactly one place. Each slot belongs to one of
+    the lock stripes; a stripe is a thread lock (for threads of this
+    process) plus a byte-range fcntl lock on a lock file (for the other
+    processes). take() locks every stripe involved, in order, checks all
+    counters and only then decrements them, which gives atomic
+    compare-and-decrement for whole carts.
+    """
+    
+    def __init__(self, name: str = SHARED_STOCK_NAME, slots: int = SHARED_STOCK_SLOTS,
+                 stripes: int = SHARED_STOCK_STRIPES):
+        self.name = name
+        self.slots = slots
+        self.stripes = stripes
+        self._slots_offset = _HEADER.size + stripes * _COUNTER.size
+        self._generations = struct.Struct(f"<{stripes}q")
+        size = self._slots_offset + slots * _SLOT.size
+        self._lock_fd = os.open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        self._alloc_lock = threading.Lock()
+        self._stripe_locks = [threading.Lock() for _ in range(stripes)]
+        try:
+            self._shm = self._open_segment(create=True, size=size)
+            _HEADER.pack_into(self._shm.buf, 0, _MAGIC, stripes, slots, 0)
+        except FileExistsError:
+            self._shm = self._open_segment(create=False)
+            self._check_header()
+        self._buf = self._shm.buf
+    
+    def register(self, product_id: str, initial_stock: int) -> int:
+        """Slot of a product, claiming one with `initial_stock` if no process has yet."""
+        key = hashlib.blake2b(product_id.encode("utf-8"), digest_size=16).digest()
+        slot = int.from_bytes(key[:8], "little") % self.slots
+        with self._alloc_lock:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, 1, 0)
+            try:
+                for _ in range(self.slots):
+                    stored = _SLOT.unpack_from(self._buf, self._slot_offset(slot))[0]
+                    if stored == key:
+                        return slot
+                    if stored == _EMPTY:
+                        _SLOT.pack_into(self._buf, self._slot_offset(slot), key, initial_stock, 0)
+                        magic, stripes, slots, used = _HEADER.unpack_from(self._buf, 0)
+                        _HEADER.pack_into(self._buf, 0, magic, stripes, slots, used + 1)
+                        return slot
+                    slot = (slot + 1) % self.slots
+            finally:
+                fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, 1, 0)
+        raise RuntimeError(f"Shared stock table {self.name} is full ({self.slots} slots)")
+    
+    def get(self, slot: int) -> int:
+        # An aligned 8-byte read never observes a half-written counter
+        return _COUNTER.unpack_from(self._buf, self._slot_offset(slot) + 16)[0]
+    
+    def changes(self, slot: int) -> int:
+        """How many times add() or take() changed the slot's stock."""
+        return _COUNTER.unpack_from(self._buf, self._slot_offset(slot) + 24)[0]
+    
+    def set(self, slot: int, stock: int) -> None:
+        """Overwrite a slot's stock (a product write, so not counted by changes())."""
+        with self._locked([slot]):
+            self._write(slot, stock, counted=False)
+    
+    def add(self, deltas: Dict[int, int]) -> None:
+        """Add signed quantities to several slots atomically."""
+        with self._locked(deltas):
+            for slot, delta in deltas.items():
+                self._write(slot, self.get(slot) + delta)
+    
+    def take(self, wanted: Dict[int, int]) -> Optional[int]:
+        """
+        Decrease several counters all-or-nothing. Returns None on success,
+        otherwise the first slot without enough stock (nothing changes).
+        """
+        with self._locked(wanted):
+            for slot, qty in wanted.items():
+                if self.get(slot) < qty:
+                    return slot
+            for slot, qty in wanted.items():
+                self._write(slot, self.get(slot) - qty)
+            return None
+    
+    def clear(self) -> None:
+        """Free every slot, e.g. between tests; only for a segment no other process is using."""
+        table_size = self.slots * _SLOT.size
+        with self._alloc_lock:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, 1, 0)
+            try:
+                with self._locked(range(self.stripes)):
+                    self._buf[self._slots_offset:self._slots_offset + table_size] = bytes(table_size)
+                    magic, stripes, slots, _ = _HEADER.unpack_from(self._buf, 0)
+                    _HEADER.pack_into(self._buf, 0, magic, stripes, slots, 0)
+                    generations = self._generations.unpack_from(self._buf, _HEADER.size)
+                    self._generations.pack_into(self._buf, _HEADER.size, *(g + 1 for g in generations))
+            finally:
+                fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, 1, 0)
+    
+    def generation(self) -> int:
+        """Changes whenever any counter changes, in any process."""
+        return sum(self._generations.unpack_from(self._buf, _HEADER.size))
+    
+    def used(self) -> int:
+        return _HEADER.unpack_from(self._buf, 0)[3]
+    
+    def close(self) -> None:
+        self._buf.release()
+        self._shm.close()
+        os.close(self._lock_fd)
+    
+    def unlink(self) -> None:
+        """
+        Remove the segment; processes still attached keep their mapping.
+        The segment outlives the workers, so call this between deployments
+        to start from the catalog's own stock again.
+        """
+        shm = shared_memory.SharedMemory(name=self.name)
+        if sys.version_info < (3, 13):
+            # unlink() unregisters from the resource tracker, so balance _open_segment's unregister
+            resource_tracker.unregister(shm._name, "shared_memory")
+            resource_tracker.register(shm._name, "shared_memory")
+        shm.close()
+        shm.unlink()
+    
+    def _open_segment(self, create: bool, size: int = 0) -> shared_memory.SharedMemory:
+        if sys.version_info >= (3, 13):
+            return shared_memory.SharedMemory(name=self.name, create=create, size=size, track=False)
+        shm = shared_memory.SharedMemory(name=self.name, create=create, size=size)
+        # Otherwise the resource tracker unlinks the segment when this worker exits
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+    
+    def _check_header(self) -> None:
+        deadline = time.monotonic() + 5
+        while True:
+            magic, stripes, slots, _ = _HEADER.unpack_from(self._shm.buf, 0)
+            if magic == _MAGIC:
+                break
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Shared stock segment {self.name} was never initialized")
+            time.sleep(0.01)  # the creating process is still writing the header
+        if (stripes, slots) != (self.stripes, self.slots):
+            raise ValueError(f"Shared stock segment {self.name} has {slots} slots / {stripes} stripes, "
+                             f"expected {self.slots} / {self.stripes}")
+    
+    def _slot_offset(self, slot: int) -> int:
+        return self._slots_offset + slot * _SLOT.size
+    
+    def _write(self, slot: int, stock: int, counted: bool = True) -> None:
+        # Caller holds the slot's stripe
+        _COUNTER.pack_into(self._buf, self._slot_offset(slot) + 16, stock)
+        if counted:
+            _COUNTER.pack_into(self._buf, self._slot_offset(slot) + 24, self.changes(slot) + 1)
+        stripe_offset = _HEADER.size + (slot % self.stripes) * _COUNTER.size
+        _COUNTER.pack_into(self._buf, stripe_offset, _COUNTER.unpack_from(self._buf, stripe_offset)[0] + 1)
+    
+    def _locked(self, slots: Iterable[int]) -> "_StripeGuard":
+        return _StripeGuard(self, sorted({slot % self.stripes for slot in slots}))
+
+
+class _StripeGuard:
+    """Holds a sorted set of stripes, thread lock first, then the file range lock."""
+    
+    def __init__(self, counters: SharedStockCounters, stripes: List[int]):
+        self._counters = counters
+        self._stripes = stripes
+    
+    def __enter__(self):
+        counters = self._counters
+        for stripe in self._stripes:
+            counters._stripe_locks[stripe].acquire()
+            fcntl.lockf(counters._lock_fd, fcntl.LOCK_EX, 1, 1 + stripe)
+    
+    def __exit__(self, *exc_info):
+        counters = self._counters
+        for stripe in reversed(self._stripes):
+            fcntl.lockf(counters._lock_fd, fcntl.LOCK_UN, 1, 1 + stripe)
+            counters._stripe_locks[stripe].release()
+
+
+
+
+class SharedStockStorage(SQLiteStorage):
+    """
+    SQLite storage whose stock lives in shared counters, for running
+    several worker processes on one box (`uvicorn --workers N`).
+    
+    Users, orders, payments and the catalog are the SQLite engine's, so
+    every worker sees all of them, but reserving and releasing stock only
+    touches the counters: checkouts take a counter stripe instead of
+    SQLite's single write lock. The counters are authoritative for stock;
+    products read from SQLite get theirs overlaid, and a product's version
+    adds the stock changes its slot has counted to the SQLite version.
+    Product writes hold the product's stripe around the SQLite transaction,
+    so they are atomic with respect to reservations in any process.
+    
+    The products table's stock column is only written by product writes
+    and by close(), so a new segment (e.g. after a reboot) starts from the
+    stock of the last worker to shut down.
+    """
+    
+    def __init__(self, counters: Optional[SharedStockCounters] = None, path: str = SQLITE_PATH):
+        super().__init__(path)
+        self.counters = counters or SharedStockCounters()
+        self._slots: Dict[str, int] = {}  # product id -> counter slot, cached per process
+    
+    def close(self) -> None:
+        """Write the counted stock back to SQLite, then detach from the segment and the database."""
+        self.sync_stock()
+        self.counters.close()
+        super().close()
+    
+    @property
+    def catalog_version(self) -> int:
+        return super().catalog_version + self.counters.generation()
+    
+    # ========== Products ==========
+    def add_product(self, product: ProductRecord) -> ProductRecord:
+        slot = self._register(product.id, product.stock)
+        with self.counters._locked([slot]):
+            super().add_product(product)
+            self.counters._write(slot, product.stock, counted=False)
+        return product
+    
+    def get_product(self, product_id: str) -> Optional[ProductRecord]:
+        product = super().get_product(product_id)
+        self._count_stock([product])
+        return product
+    
+    def get_products(self, product_ids: Iterable[str]) -> Dict[str, Optional[ProductRecord]]:
+        products = super().get_products(product_ids)
+        self._count_stock(products.values())
+        return products
+    
+    def get_product_with_version(self, product_id: str) -> Tuple[Optional[ProductRecord], int]:
+        product, version = super().get_product_with_version(product_id)
+        if product is None:
+            return None, 0
+        self._count_stock([product])
+        return product, version + self.counters.changes(self._slots[product_id])
+    
+    def update_product(self, product_id: str, product: ProductRecord) -> Optional[ProductRecord]:
+        slot = self._slot_of(product_id)
+        if slot is None:
+            return None
+        with self.counters._locked([slot]):
+            if super().update_product(product_id, product) is None:
+                return None
+            self.counters._write(slot, product.stock, counted=False)
+        return product
+    
+    def patch_product(self, product_id: str, changes: dict,
+                      expected_version: Optional[int] = None) -> Tuple[Optional[ProductRecord], int]:
+        """Same contract as SQLiteStorage.patch_product, with versions that include stock changes."""
+        slot = self._slot_of(product_id)
+        if slot is None:
+            return None, 0
+        with self.counters._locked([slot]):
+            stock_changes = self.counters.changes(slot)
+            if expected_version is not None:
+                expected_version -= stock_changes
+            try:
+                product, version = super().patch_product(product_id, changes, expected_version)
+            except VersionConflict as exc:
+                raise VersionConflict(exc.current_version + stock_changes)
+            if product is None:
+                return None, 0
+            if "stock" in changes:
+                self.counters._write(slot, changes["stock"], counted=False)
+            product.stock = self.counters.get(slot)
+        return product, version + stock_changes
+    
+    def upsert_products(self, rows: List[Tuple[str, Optional[ProductRecord], dict]],
+                        bump_version: bool = True) -> List[str]:
+        """Same contract as SQLiteStorage.upsert_products; stock set by a row goes to the counters."""
+        slots = {}
+        for product_id, new_product, _ in rows:
+            slot = self._slot_of(product_id)
+            if slot is None and new_product is not None:
+                slot = self._register(product_id, new_product.stock)
+            if slot is not None:
+                slots[product_id] = slot
+        with self.counters._locked(slots.values()):
+            outcomes = super().upsert_products(rows, bump_version)
+            for (product_id, new_product, changes), outcome in zip(rows, outcomes):
+                if outcome == "created":
+                    self.counters._write(slots[product_id], new_product.stock, counted=False)
+                elif outcome == "updated" and "stock" in changes:
+                    self.counters._write(slots[product_id], changes["stock"], counted=False)
+        return outcomes
+    
+    def load_catalog(self, products: MutableMapping):
+        """
+        Replace every product with the given {id: Product} map. Products
+        another worker has already registered keep their counted stock, so
+        workers loading the same catalog at startup do not undo each
+        other's sales.
+        """
+        super().load_catalog(products)
+        for product in products.values():
+            self._register(product.id, product.stock)
+    
+    def list_products(self, active_only: bool = True) -> List[ProductRecord]:
+        products = super().list_products(active_only)
+        self._count_stock(products)
+        return products
+    
+    def query_products(self, sort_by: str = "name", descending: bool = False,
+                       after: Optional[tuple] = None, limit: Optional[int] = None,
+                       min_price: Optional[float] = None, max_price: Optional[float] = None,
+                       name_prefix: Optional[str] = None,
+                       in_stock: Optional[bool] = None) -> Tuple[List[ProductRecord], Optional[tuple]]:
+        """
+        Same contract as SQLiteStorage.query_products. The stock column is
+        stale, so `in_stock` is applied to the counted stock, reading
+        further index pages until the page is full.
+        """
+        filters = dict(sort_by=sort_by, descending=descending, min_price=min_price,
+                       max_price=max_price, name_prefix=name_prefix)
+        if in_stock is None:
+            page, next_key = super().query_products(after=after, limit=limit, **filters)
+            self._count_stock(page)
+            return page, next_key
+        matched: List[ProductRecord] = []
+        while True:
+            batch, after = super().query_products(after=after, limit=limit, **filters)
+            self._count_stock(batch)
+            matched += [product for product in batch if (product.stock > 0) == in_stock]
+            if limit is not None and len(matched) > limit:
+                return matched[:limit], InMemoryStorage._index_key(matched[limit - 1], sort_by)
+            if after is None:
+                return matched, None
+    
+    def decrease_stock(self, product_id: str, qty: int) -> bool:
+        """Decrease product stock. Returns True if successful, False if insufficient stock."""
+        return self.reserve_many([(product_id, qty)]) is None
+    
+    def increase_stock(self, product_id: str, qty: int):
+        """Increase product stock (e.g., when order is cancelled)."""
+        self.release_many([(product_id, qty)])
+    
+    def reserve_many(self, items: Iterable[Tuple[str, int]],
+                     check: Optional[Callable[[Dict[str, Optional[ProductRecord]]], None]] = None) -> Optional[str]:
+        """
+        Atomically decrease stock for several (product_id, qty) lines (see
+        InMemoryStorage.reserve_many). `check` sees the products as read
+        while their stripes are held, so no product write can land between
+        the snapshot it validates and prices and the stock taken.
+        """
+        wanted = InMemoryStorage._aggregate(items)
+        slots = {}
+        for product_id in wanted:
+            slot = self._slot_of(product_id)
+            if slot is not None:
+                slots[product_id] = slot
+        with self.counters._locked(slots.values()):
+            products = super().get_products(wanted)
+            for product_id in wanted:
+                if product_id not in slots:
+                    products[product_id] = None  # created after the slots were looked up; not locked
+            self._count_stock(products.values())
+            if check is not None:
+                check(products)
+            for product_id, qty in wanted.items():
+                if product_id not in slots or self.counters.get(slots[product_id]) < qty:
+                    return product_id
+            for product_id, qty in wanted.items():
+                self.counters._write(slots[product_id], self.counters.get(slots[product_id]) - qty)
+        return None
+    
+    def reserve_batch(self, carts: List[Iterable[Tuple[str, int]]],
+                      check: Optional[Callable[[int, Dict[str, Optional[ProductRecord]]], None]] = None) -> List:
+        """Reserve stock for many independent carts, each all-or-nothing (see InMemoryStorage.reserve_batch)."""
+        results = []
+        for index, items in enumerate(carts):
+            cart_check = (lambda products, i=index: check(i, products)) if check is not None else None
+            try:
+                results.append(self.reserve_many(items, cart_check))
+            except Exception as exc:
+                results.append(exc)
+        return results
+    
+    def release_many(self, items: Iterable[Tuple[str, int]]):
+        """Atomically give back stock for several (product_id, qty) lines."""
+        deltas = {}
+        for product_id, qty in InMemoryStorage._aggregate(items).items():
+            slot = self._slot_of(product_id)
+            if slot is not None:
+                deltas[slot] = qty
+        self.counters.add(deltas)
+    
+    # ========== Maintenance ==========
+    def reset(self) -> None:
+        """
+        Delete all data and free every shared counter, e.g. between tests;
+        only for a database and segment no other process is using.
+        """
+        super().reset()
+        self.counters.clear()
+        self._slots.clear()
+    
+    def sync_stock(self) -> None:
+        """Copy the counted stock of every product this process used into the products table."""
+        with self._transaction() as conn:
+            conn.executemany("UPDATE products SET stock = ? WHERE id = ?",
+                             ((self.counters.get(slot), pid) for pid, slot in self._slots.items()))
+    
+    # ========== Helpers ==========
+    def _register(self, product_id: str, stock: int) -> int:
+        """Counter slot of a product; a new counter starts at `stock` unless another worker registered it first."""
+        slot = self._slots.get(product_id)
+        if slot is None:
+            slot = self._slots[product_id] = self.counters.register(product_id, stock)
+        return slot
+    
+    def _slot_of(self, product_id: str) -> Optional[int]:
+        """Counter slot of a stored product, None if there is no such product."""
+        slot = self._slots.get(product_id)
+        if slot is None:
+            product = SQLiteStorage.get_product(self, product_id)
+            if product is None:
+                return None
+            slot = self._register(product_id, product.stock)
+        return slot
+    
+    def _count_stock(self, products: Iterable[Optional[ProductRecord]]) -> None:
+        """Overlay the counted stock on products just read from SQLite."""
+        for product in products:
+            if product is not None:
+                product.stock = self.counters.get(self._register(product.id, product.stock))
@@ -0,0 +1,550 @@
+"""SQLite storage engine: state shared by every worker process on one node."""
+import json
+import os
+import queue
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, MutableMapping, Optional, Tuple
+from api.models import UserRole, OrderStatus, PaymentMethod, PaymentStatus
+from api.records import UserRecord, ProductRecord, OrderRecord, OrderLine, PaymentRecord
+from api.storage import InMemoryStorage, VersionConflict, _MAX_ID
+
+
+# Configuration
+SQLITE_PATH = os.getenv("SQLITE_PATH", "ecommerce.db")
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+SQLITE_BUSY_TIMEOUT_SECONDS = float(os.getenv("SQLITE_BUSY_TIMEOUT_SECONDS", "5"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    role TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    price REAL NOT NULL,
+    currency TEXT NOT NULL,
+    stock INTEGER NOT NULL CHECK (stock >= 0),
+    is_active INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS products_by_price ON products (price, id) WHERE is_active;
+CREATE INDEX IF NOT EXISTS products_by_name ON products (name_key, id) WHERE is_active;
+CREATE TABLE IF NOT EXISTS orders (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    items TEXT NOT NULL,
+    total_amount REAL NOT NULL,
+    currency TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_by_time ON orders (created_at, id);
+CREATE INDEX IF NOT EXISTS orders_by_user ON orders (user_id, created_at, id);
+CREATE TABLE IF NOT EXISTS payments (
+    id TEXT PRIMARY KEY,
+    order_id TEXT NOT NULL,
+    amount REAL NOT NULL,
+    currency TEXT NOT NULL,
+    method TEXT NOT NULL,
+    status TEXT NOT NULL,
+    provider_ref TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+DROP INDEX IF EXISTS payments_by_order;
+CREATE UNIQUE INDEX IF NOT EXISTS payments_one_per_order ON payments (order_id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('catalog_version', 0);
+"""
+
+# Statements are fixed strings so each pooled connection's statement cache keeps them prepared
+_USER_COLUMNS = "id, email, password_hash, role"
+_PRODUCT_COLUMNS = "id, name, price, currency, stock, is_active"
+_ORDER_COLUMNS = "id, user_id, items, total_amount, currency, status, created_at"
+_PAYMENT_COLUMNS = "id, order_id, amount, currency, method, status, provider_ref, created_at"
+
+_UPSERT_USER = f"INSERT OR REPLACE INTO users ({_USER_COLUMNS}) VALUES (?, ?, ?, ?)"
+_INSERT_USER = f"INSERT OR IGNORE INTO users ({_USER_COLUMNS}) VALUES (?, ?, ?, ?)"
+_USER_BY_EMAIL = f"SELECT {_USER_COLUMNS} FROM users WHERE email = ?"
+_USER_BY_ID = f"SELECT {_USER_COLUMNS} FROM users WHERE id = ?"
+
+_UPSERT_PRODUCT = (
+    "INSERT INTO products (id, name, name_key, price, currency, stock, is_active) VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (id) DO UPDATE SET name = excluded.name, name_key = excluded.name_key, price = excluded.price, "
+    "currency = excluded.currency, stock = excluded.stock, is_active = excluded.is_active, version = version + 1"
+)
+_REPLACE_PRODUCT = (
+    "UPDATE products SET name = ?, name_key = ?, price = ?, currency = ?, stock = ?, is_active = ?, "
+    "version = version + 1 WHERE id = ?"
+)
+_PRODUCT_BY_ID = f"SELECT {_PRODUCT_COLUMNS}, version FROM products WHERE id = ?"
+_TAKE_STOCK = "UPDATE products SET stock = stock - ?, version = version + 1 WHERE id = ? AND stock >= ?"
+_GIVE_STOCK = "UPDATE products SET stock = stock + ?, version = version + 1 WHERE id = ?"
+_CATALOG_VERSION = "SELECT value FROM meta WHERE key = 'catalog_version'"
+_BUMP_CATALOG = "UPDATE meta SET value = value + 1 WHERE key = 'catalog_version'"
+
+_UPSERT_ORDER = f"INSERT OR REPLACE INTO orders ({_ORDER_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)"
+_UPDATE_ORDER = (
+    "UPDATE orders SET user_id = ?, items = ?, total_amount = ?, currency = ?, status = ?, created_at = ? "
+    "WHERE id = ?"
+)
+_TRANSITION_ORDER = "UPDATE orders SET status = ? WHERE id = ? AND status = ?"
+_ORDER_BY_ID = f"SELECT {_ORDER_COLUMNS} FROM orders WHERE id = ?"
+
+_INSERT_PAYMENT = f"INSERT INTO payments ({_PAYMENT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+_PAYMENT_BY_ID = f"SELECT {_PAYMENT_COLUMNS} FROM payments WHERE id = ?"
+_PAYMENT_BY_ORDER = f"SELECT {_PAYMENT_COLUMNS} FROM payments WHERE order_id = ? ORDER BY rowid DESC LIMIT 1"
+
+_PRODUCT_FIELDS = {"name": "name", "price": "price", "currency": "currency", "stock": "stock", "isActive": "is_active"}
+
+
+class ConnectionPool:
+    """Fixed set of SQLite connections handed out to one thread at a time."""
+    
+    def __init__(self, path: str, size: int = SQLITE_POOL_SIZE,
+                 busy_timeout: float = SQLITE_BUSY_TIMEOUT_SECONDS):
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all: List[sqlite3.Connection] = []
+        for _ in range(size):
+            conn = sqlite3.connect(
+                path, timeout=busy_timeout, isolation_level=None,
+                check_same_thread=False, cached_statements=256,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._all.append(conn)
+            self._idle.put(conn)
+    
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+    
+    def close(self) -> None:
+        for conn in self._all:
+            conn.close()
+
+
+class SQLiteStorage:
+    """
+    Storage engine backed by one SQLite database in WAL mode.
+    
+    Every uvicorn worker on the node opens the same file, so they all see
+    one catalog and one set of orders. Writes run in BEGIN IMMEDIATE
+    transactions; stock is only ever taken with a conditional UPDATE
+    (`stock >= qty`), so reservations cannot oversell even across
+    processes. The catalog version lives in the database too, which keeps
+    every worker's catalog cache coherent.
+    """
+    
+    blocking = True
+    
+    def __init__(self, path: str = SQLITE_PATH, pool_size: int = SQLITE_POOL_SIZE):
+        self.path = path
+        with sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        conn.close()
+        self._pool = ConnectionPool(path, pool_size)
+    
+    def close(self) -> None:
+        self._pool.close()
+    
+    @property
+    def catalog_version(self) -> int:
+        with self._pool.connection() as conn:
+            return conn.execute(_CATALOG_VERSION).fetchone()[0]
+    
+    # ========== Users ==========
+    def add_user(self, user: UserRecord) -> UserRecord:
+        with self._transaction() as conn:
+            conn.execute(_UPSERT_USER, _user_row(user))
+        return user
+    
+    def add_user_if_absent(self, user: UserRecord) -> bool:
+        """Insert user unless the email is already registered. Returns True if inserted."""
+        with self._transaction() as conn:
+            return conn.execute(_INSERT_USER, _user_row(user)).rowcount == 1
+    
+    def get_user_by_email(self, email: str) -> Optional[UserRecord]:
+        return self._fetch_one(_USER_BY_EMAIL, (email,), _to_user)
+    
+    def get_user_by_id(self, user_id: str) -> Optional[UserRecord]:
+        return self._fetch_one(_USER_BY_ID, (user_id,), _to_user)
+    
+    # ========== Products ==========
+    def add_product(self, product: ProductRecord) -> ProductRecord:
+        with self._transaction() as conn:
+            conn.execute(_UPSERT_PRODUCT, _product_row(product))
+            conn.execute(_BUMP_CATALOG)
+        return product
+    
+    def get_product(self, product_id: str) -> Optional[ProductRecord]:
+        return self._fetch_one(_PRODUCT_BY_ID, (product_id,), _to_product)
+    
+    def get_products(self, product_ids: Iterable[str]) -> Dict[str, Optional[ProductRecord]]:
+        """Look up several products at once (missing ids map to None)."""
+        with self._pool.connection() as conn:
+            return self._get_products(conn, product_ids)
+    
+    def get_product_with_version(self, product_id: str) -> Tuple[Optional[ProductRecord], int]:
+        """Return (product, version); version changes on every write to the product."""
+        with self._pool.connection() as conn:
+            row = conn.execute(_PRODUCT_BY_ID, (product_id,)).fetchone()
+        if row is None:
+            return None, 0
+        return _to_product(row), row[6]
+    
+    def update_product(self, product_id: str, product: ProductRecord) -> Optional[ProductRecord]:
+        with self._transaction() as conn:
+            name, name_key, price, currency, stock, is_active = _product_row(product)[1:]
+            cursor = conn.execute(_REPLACE_PRODUCT, (name, name_key, price, currency, stock, is_active, product_id))
+            if cursor.rowcount == 0:
+                return None
+            conn.execute(_BUMP_CATALOG)
+        return product
+    
+    def upsert_products(self, rows: List[Tuple[str, Optional[ProductRecord], dict]],
+                        bump_version: bool = True) -> List[str]:
+        """
+        Apply a chunk of upserts in one transaction (see InMemoryStorage.upsert_products).
+        Returns "updated", "created" or "missing" per row.
+        """
+        outcomes = []
+        with self._transaction() as conn:
+            for product_id, new_product, changes in rows:
+                if self._apply_changes(conn, product_id, changes):
+                    outcomes.append("updated")
+                elif new_product is not None:
+                    conn.execute(_UPSERT_PRODUCT, _product_row(new_product))
+                    outcomes.append("created")
+                else:
+                    outcomes.append("missing")
+            if bump_version:
+                conn.execute(_BUMP_CATALOG)
+        return outcomes
+    
+    def load_catalog(self, products: MutableMapping):
+        """Replace every product with the given {id: Product} map."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM products")
+            conn.executemany(_UPSERT_PRODUCT, (_product_row(p) for p in products.values()))
+            conn.execute(_BUMP_CATALOG)
+    
+    def invalidate_catalog(self):
+        """Mark every catalog-derived cache stale."""
+        with self._transaction() as conn:
+            conn.execute(_BUMP_CATALOG)
+    
+    def patch_product(self, product_id: str, changes: dict,
+                      expected_version: Optional[int] = None) -> Tuple[Optional[ProductRecord], int]:
+        """
+        Apply a partial update in one transaction. Raises VersionConflict if
+        `expected_version` is given and differs from the stored version.
+        Returns (product, new version), or (None, 0) if the product does not exist.
+        """
+        with self._transaction() as conn:
+            row = conn.execute(_PRODUCT_BY_ID, (product_id,)).fetchone()
+            if row is None:
+                return None, 0
+            if expected_version is not None and expected_version != row[6]:
+                raise VersionConflict(row[6])
+            if not changes:
+                return _to_product(row), row[6]
+            self._apply_changes(conn, product_id, changes)
+            conn.execute(_BUMP_CATALOG)
+            row = conn.execute(_PRODUCT_BY_ID, (product_id,)).fetchone()
+        return _to_product(row), row[6]
+    
+    def product_count(self) -> int:
+        with self._pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+    
+    def list_products(self, active_only: bool = True) -> List[ProductRecord]:
+        sql = f"SELECT {_PRODUCT_COLUMNS} FROM products"
+        if active_only:
+            sql += " WHERE is_active"
+        with self._pool.connection() as conn:
+            rows = conn.execute(sql + " ORDER BY rowid").fetchall()
+        return [_to_product(row) for row in rows]
+    
+    def query_products(self, sort_by: str = "name", descending: bool = False,
+                       after: Optional[tuple] = None, limit: Optional[int] = None,
+                       min_price: Optional[float] = None, max_price: Optional[float] = None,
+                       name_prefix: Optional[str] = None,
+                       in_stock: Optional[bool] = None) -> Tuple[List[ProductRecord], Optional[tuple]]:
+        """Same contract as InMemoryStorage.query_products, answered from the partial indexes."""
+        key_column = "price" if sort_by == "price" else "name_key"
+        clauses, params = ["is_active"], []
+        if min_price is not None:
+            clauses.append("price >= ?")
+            params.append(min_price)
+        if max_price is not None:
+            clauses.append("price <= ?")
+            params.append(max_price)
+        if name_prefix:
+            prefix = name_prefix.casefold()
+            clauses.append("name_key >= ? AND name_key < ?")
+            params += [prefix, prefix + _MAX_ID]
+        if in_stock is not None:
+            clauses.append("stock > 0" if in_stock else "stock = 0")
+        if after is not None:
+            clauses.append(f"({key_column}, id) {'<' if descending else '>'} (?, ?)")
+            params += list(after)
+        direction = "DESC" if descending else "ASC"
+        sql = (f"SELECT {_PRODUCT_COLUMNS} FROM products WHERE {' AND '.join(clauses)} "
+               f"ORDER BY {key_column} {direction}, id {direction}")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        with self._pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        page = [_to_product(row) for row in rows[:limit]] if limit is not None else [_to_product(r) for r in rows]
+        next_key = None
+        if limit is not None and len(rows) > limit:
+            next_key = InMemoryStorage._index_key(page[-1], sort_by)
+        return page, next_key
+    
+    def decrease_stock(self, product_id: str, qty: int) -> bool:
+        """Decrease product stock. Returns True if successful, False if insufficient stock."""
+        with self._transaction() as conn:
+            if conn.execute(_TAKE_STOCK, (qty, product_id, qty)).rowcount == 0:
+                return False
+            conn.execute(_BUMP_CATALOG)
+            return True
+    
+    def increase_stock(self, product_id: str, qty: int):
+        """Increase product stock (e.g., when order is cancelled)."""
+        with self._transaction() as conn:
+            if conn.execute(_GIVE_STOCK, (qty, product_id)).rowcount:
+                conn.execute(_BUMP_CATALOG)
+    
+    def reserve_many(self, items: Iterable[Tuple[str, int]],
+                     check: Optional[Callable[[Dict[str, Optional[ProductRecord]]], None]] = None) -> Optional[str]:
+        """
+        Atomically decrease stock for several (product_id, qty) lines (see
+        InMemoryStorage.reserve_many). `check` sees the products as read
+        inside the same write transaction.
+        """
+        wanted = InMemoryStorage._aggregate(items)
+        with self._pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                failed = self._reserve(conn, wanted, check)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("ROLLBACK" if failed is not None else "COMMIT")
+        return failed
+    
+    def reserve_batch(self, carts: List[Iterable[Tuple[str, int]]],
+                      check: Optional[Callable[[int, Dict[str, Optional[ProductRecord]]], None]] = None) -> List:
+        """
+        Reserve stock for many independent carts in one transaction, each
+        cart in its own savepoint (see InMemoryStorage.reserve_batch).
+        """
+        results = []
+        with self._transaction() as conn:
+            for index, items in enumerate(carts):
+                wanted = InMemoryStorage._aggregate(items)
+                cart_check = (lambda products, i=index: check(i, products)) if check is not None else None
+                conn.execute("SAVEPOINT cart")
+                try:
+                    failed = self._reserve(conn, wanted, cart_check)
+                except Exception as exc:
+                    failed = exc
+                if failed is not None:
+                    conn.execute("ROLLBACK TO cart")
+                conn.execute("RELEASE cart")
+                results.append(failed)
+        return results
+    
+    def release_many(self, items: Iterable[Tuple[str, int]]):
+        """Atomically give back stock for several (product_id, qty) lines."""
+        wanted = InMemoryStorage._aggregate(items)
+        with self._transaction() as conn:
+            conn.executemany(_GIVE_STOCK, ((qty, product_id) for product_id, qty in wanted.items()))
+            conn.execute(_BUMP_CATALOG)
+    
+    # ========== Orders ==========
+    def add_order(self, order: OrderRecord) -> OrderRecord:
+        with self._transaction() as conn:
+            conn.execute(_UPSERT_ORDER, _order_row(order))
+        return order
+    
+    def add_orders(self, orders: List[OrderRecord]) -> List[OrderRecord]:
+        """Insert several orders in one transaction."""
+        with self._transaction() as conn:
+            conn.executemany(_UPSERT_ORDER, (_order_row(order) for order in orders))
+        return orders
+    
+    def get_order(self, order_id: str) -> Optional[OrderRecord]:
+        return self._fetch_one(_ORDER_BY_ID, (order_id,), _to_order)
+    
+    def update_order(self, order_id: str, order: OrderRecord) -> Optional[OrderRecord]:
+        with self._transaction() as conn:
+            row = _order_row(order)
+            if conn.execute(_UPDATE_ORDER, (*row[1:], order_id)).rowcount == 0:
+                return None
+        return order
+    
+    def transition_order(self, order_id: str, from_status: OrderStatus,
+                         to_status: OrderStatus) -> Optional[OrderRecord]:
+        """
+        Same contract as InMemoryStorage.transition_order: one conditional
+        UPDATE, so only one caller in any process sees its row change.
+        """
+        with self._transaction() as conn:
+            params = (OrderStatus(to_status).value, order_id, OrderStatus(from_status).value)
+            if conn.execute(_TRANSITION_ORDER, params).rowcount == 0:
+                return None
+            row = conn.execute(_ORDER_BY_ID, (order_id,)).fetchone()
+        return _to_order(row)
+    
+    def query_orders(self, user_id: Optional[str] = None, status: Optional[str] = None,
+                     after: Optional[tuple] = None, limit: int = 20,
+                     newest_first: bool = True) -> Tuple[List[OrderRecord], Optional[tuple]]:
+        """Same contract as InMemoryStorage.query_orders, answered from the createdAt indexes."""
+        clauses, params = [], []
+        if user_id is not None:
+            clauses.append("user_id = ?")
+            params.append(user_id)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(getattr(status, "value", status))
+        if after is not None:
+            clauses.append(f"(created_at, id) {'<' if newest_first else '>'} (?, ?)")
+            params += list(after)
+        direction = "DESC" if newest_first else "ASC"
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        sql = f"SELECT {_ORDER_COLUMNS} FROM orders {where}ORDER BY created_at {direction}, id {direction} LIMIT ?"
+        params.append(limit + 1)
+        with self._pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        page = [_to_order(row) for row in rows[:limit]]
+        next_key = InMemoryStorage._order_key(page[-1]) if len(rows) > limit else None
+        return page, next_key
+    
+    # ========== Payments ==========
+    def add_payment(self, payment: PaymentRecord) -> PaymentRecord:
+        """Insert a payment; a second one for the same order raises sqlite3.IntegrityError."""
+        with self._transaction() as conn:
+            conn.execute(_INSERT_PAYMENT, _payment_row(payment))
+        return payment
+    
+    def get_payment(self, payment_id: str) -> Optional[PaymentRecord]:
+        return self._fetch_one(_PAYMENT_BY_ID, (payment_id,), _to_payment)
+    
+    def get_payment_by_order(self, order_id: str) -> Optional[PaymentRecord]:
+        """Get payment for a specific order."""
+        return self._fetch_one(_PAYMENT_BY_ORDER, (order_id,), _to_payment)
+    
+    # ========== Maintenance ==========
+    def reset(self) -> None:
+        """Delete every user, product, order and payment, e.g. between tests."""
+        with self._transaction() as conn:
+            for table in ("users", "products", "orders", "payments"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.execute(_BUMP_CATALOG)
+    
+    # ========== Helpers ==========
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction on a pooled connection; rolled back if the body raises."""
+        with self._pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+    
+    def _fetch_one(self, sql: str, params: tuple, convert: Callable):
+        with self._pool.connection() as conn:
+            row = conn.execute(sql, params).fetchone()
+        return convert(row) if row is not None else None
+    
+    @staticmethod
+    def _get_products(conn: sqlite3.Connection, product_ids: Iterable[str]) -> Dict[str, Optional[ProductRecord]]:
+        found: Dict[str, Optional[ProductRecord]] = {pid: None for pid in product_ids}
+        for product_id in found:
+            row = conn.execute(_PRODUCT_BY_ID, (product_id,)).fetchone()
+            if row is not None:
+                found[product_id] = _to_product(row)
+        return found
+    
+    def _reserve(self, conn: sqlite3.Connection, wanted: Dict[str, int], check) -> Optional[str]:
+        """Body of reserve_many; caller owns the transaction and rolls back on failure."""
+        if check is not None:
+            check(self._get_products(conn, wanted))
+        for product_id, qty in wanted.items():
+            if conn.execute(_TAKE_STOCK, (qty, product_id, qty)).rowcount == 0:
+                return product_id
+        conn.execute(_BUMP_CATALOG)
+        return None
+    
+    @staticmethod
+    def _apply_changes(conn: sqlite3.Connection, product_id: str, changes: dict) -> bool:
+        """Partial product update inside a transaction. Returns False if the product does not exist."""
+        assignments, params = ["version = version + 1"], []
+        for field, value in changes.items():
+            assignments.append(f"{_PRODUCT_FIELDS[field]} = ?")
+            params.append(value)
+            if field == "name":
+                assignments.append("name_key = ?")
+                params.append(value.casefold())
+        params.append(product_id)
+        return conn.execute(f"UPDATE products SET {', '.join(assignments)} WHERE id = ?", params).rowcount == 1
+
+
+# ========== Row conversion ==========
+def _user_row(user: UserRecord) -> tuple:
+    return (user.id, user.email, user.password_hash, user.role.value)
+
+
+def _to_user(row) -> UserRecord:
+    return UserRecord(row[0], row[1], row[2], UserRole(row[3]))
+
+
+def _product_row(product: ProductRecord) -> tuple:
+    return (product.id, product.name, product.name.casefold(), product.price,
+            product.currency, product.stock, product.isActive)
+
+
+def _to_product(row) -> ProductRecord:
+    return ProductRecord(row[0], row[1], row[2], row[3], row[4], bool(row[5]))
+
+
+def _order_row(order: OrderRecord) -> tuple:
+    items = json.dumps([{"productId": item.productId, "qty": item.qty} for item in order.items])
+    return (order.id, order.userId, items, order.totalAmount, order.currency,
+            OrderStatus(order.status).value, order.createdAt.isoformat(timespec="microseconds"))
+
+
+def _to_order(row) -> OrderRecord:
+    return OrderRecord(
+        row[0], row[1], tuple(OrderLine(item["productId"], item["qty"]) for item in json.loads(row[2])),
+        row[3], row[4], OrderStatus(row[5]), datetime.fromisoformat(row[6]),
+    )
+
+
+def _payment_row(payment: PaymentRecord) -> tuple:
+    return (payment.id, payment.orderId, payment.amount, payment.currency,
+            PaymentMethod(payment.method).value, PaymentStatus(payment.status).value,
+            payment.providerRef, payment.createdAt.isoformat(timespec="microseconds"))
+
+
+def _to_payment(row) -> PaymentRecord:
+    return PaymentRecord(
+        row[0], row[1], row[2], row[3], PaymentMethod(row[4]),
+        PaymentStatus(row[5]), row[6], datetime.fromisoformat(row[7]),
+    )
@@ -1,112 +1,798 @@
-"""In-memory storage for users, products, orders, and payments."""
+"""Storage engines for users, products, orders, and payments."""
+import bisect
+import itertools
+import os
 import threading
-from typing import Dict, Optional, List
-from api.models import UserInternal, Product, Order, Payment
+from contextlib import ExitStack, nullcontext
+from datetime import datetime
+from typing import Callable, Dict, Iterable, MutableMapping, Optional, List, Protocol, Tuple
+from api.models import OrderStatus
+from api.records import UserRecord, ProductRecord, OrderRecord, PaymentRecord
+
+
+# Configuration
+STORAGE_ENGINE = os.getenv("STORAGE_ENGINE", "memory")  # "memory" | "sharded" | "shared" | "sqlite"
+STOCK_LOCK_STRIPES = int(os.getenv("STOCK_LOCK_STRIPES", "64"))
+
+_MAX_ID = "\U0010ffff"  # sorts after any product id / name suffix
+
+
+class VersionConflict(Exception):
+    """Raised when a conditional write sees a different product version."""
+    
+    def __init__(self, current_version: int):
+        super().__init__(f"Current version is {current_version}")
+        self.current_version = current_version
+
+
+class Storage(Protocol):
+    """
+    What the API needs from a storage engine.
+    
+    Writers accept API models or records; readers return slim records
+    (api.records), which the API turns back into models with to_model()
+    when building a response. To change a stored record, call the
+    matching update method (engines other than InMemoryStorage return
+    copies, so in-place edits alone are not saved). Order status changes
+    go through transition_order, which replaces the record rather than
+    editing it: InMemoryStorage hands out its live records, and the
+    archiver must never see a status the write-ahead log has not.
+    """
+    
+    catalog_version: int
+    # True when calls wait on I/O (SQLite), so handlers must not make them on the event loop
+    blocking: bool
+    
+    # Users
+    def add_user(self, user: UserRecord) -> UserRecord: ...
+    def add_user_if_absent(self, user: UserRecord) -> bool: ...
+    def get_user_by_email(self, email: str) -> Optional[UserRecord]: ...
+    def get_user_by_id(self, user_id: str) -> Optional[UserRecord]: ...
+    
+    # Products
+    def add_product(self, product: ProductRecord) -> ProductRecord: ...
+    def get_product(self, product_id: str) -> Optional[ProductRecord]: ...
+    def get_products(self, product_ids: Iterable[str]) -> Dict[str, Optional[ProductRecord]]: ...
+    def get_product_with_version(self, product_id: str) -> Tuple[Optional[ProductRecord], int]: ...
+    def update_product(self, product_id: str, product: ProductRecord) -> Optional[ProductRecord]: ...
+    def patch_product(self, product_id: str, changes: dict,
+                      expected_version: Optional[int] = None) -> Tuple[Optional[ProductRecord], int]: ...
+    def upsert_products(self, rows: List[Tuple[str, Optional[ProductRecord], dict]],
+                        bump_version: bool = True) -> List[str]: ...
+    def load_catalog(self, products: MutableMapping): ...
+    def invalidate_catalog(self): ...
+    def product_count(self) -> int: ...
+    def list_products(self, active_only: bool = True) -> List[ProductRecord]: ...
+    def query_products(self, sort_by: str = "name", descending: bool = False,
+                       after: Optional[tuple] = None, limit: Optional[int] = None,
+                       min_price: Optional[float] = None, max_price: Optional[float] = None,
+                       name_prefix: Optional[str] = None,
+                       in_stock: Optional[bool] = None) -> Tuple[List[ProductRecord], Optional[tuple]]: ...
+    
+    # Stock
+    def decrease_stock(self, product_id: str, qty: int) -> bool: ...
+    def increase_stock(self, product_id: str, qty: int): ...
+    def reserve_many(self, items: Iterable[Tuple[str, int]],
+                     check: Optional[Callable[[Dict[str, Optional[ProductRecord]]], None]] = None) -> Optional[str]: ...
+    def reserve_batch(self, carts: List[Iterable[Tuple[str, int]]],
+                      check: Optional[Callable[[int, Dict[str, Optional[ProductRecord]]], None]] = None) -> List: ...
+    def release_many(self, items: Iterable[Tuple[str, int]]): ...
+    
+    # Orders
+    def add_order(self, order: OrderRecord) -> OrderRecord: ...
+    def add_orders(self, orders: List[OrderRecord]) -> List[OrderRecord]: ...
+    def get_order(self, order_id: str) -> Optional[OrderRecord]: ...
+    def update_order(self, order_id: str, order: OrderRecord) -> Optional[OrderRecord]: ...
+    def transition_order(self, order_id: str, from_status: OrderStatus,
+                         to_status: OrderStatus) -> Optional[OrderRecord]: ...
+    def query_orders(self, user_id: Optional[str] = None, status: Optional[str] = None,
+                     after: Optional[tuple] = None, limit: int = 20,
+                     newest_first: bool = True) -> Tuple[List[OrderRecord], Optional[tuple]]: ...
+    
+    # Payments
+    def add_payment(self, payment: PaymentRecord) -> PaymentRecord: ...
+    def get_payment(self, payment_id: str) -> Optional[PaymentRecord]: ...
+    def get_payment_by_order(self, order_id: str) -> Optional[PaymentRecord]: ...
+    
+    # Maintenance: reset() drops all data (between tests), close() releases connections at shutdown
+    def reset(self) -> None: ...
+    def close(self) -> None: ...
+
+
+def _record(obj, record_type):
+    """Stored form of an API model; records pass through unchanged."""
+    return obj if isinstance(obj, record_type) else record_type.from_model(obj)
 
 
 class InMemoryStorage:
     """Thread-safe in-memory storage."""
     
+    blocking = False
+    
     def __init__(self):
         self._lock = threading.Lock()
-        self.users: Dict[str, UserInternal] = {}  # keyed by email
-        self.products: Dict[str, Product] = {}  # keyed by id
-        self.orders: Dict[str, Order] = {}  # keyed by id
-        self.payments: Dict[str, Payment] = {}  # keyed by id
+        # Every collection shares the single lock; ShardedInMemoryStorage splits them.
+        self._users_lock = self._lock
+        self._products_lock = self._lock
+        self._orders_lock = self._lock
+        self._payments_lock = self._lock
+        self._read_lock = self._lock
+        self.users: Dict[str, UserRecord] = {}  # keyed by email
+        self.users_by_id: Dict[str, UserRecord] = {}  # id -> user (secondary index)
+        self.products: Dict[str, ProductRecord] = {}  # keyed by id
+        self.orders: Dict[str, OrderRecord] = {}  # keyed by id
+        self.payments: Dict[str, PaymentRecord] = {}  # keyed by id
         self.payment_by_order: Dict[str, str] = {}  # order_id -> payment_id
+        # Changes on every product write or stock change; readers use it to
+        # detect a stale catalog (see api.catalog_cache).
+        self._catalog_versions = itertools.count(1)
+        self.catalog_version = 0
+        # Sorted (key, id) indexes over active products for paged listings;
+        # None means "rebuild from self.products on first use" (see load_catalog)
+        self.product_versions: Dict[str, int] = {}  # id -> optimistic-concurrency version
+        self._price_index: Optional[List[Tuple[float, str]]] = []
+        self._name_index: Optional[List[Tuple[str, str]]] = []
+        # (createdAt, id) keys ordered by creation time, overall and per user
+        self._order_timeline: List[Tuple[str, str]] = []
+        self._orders_by_user: Dict[str, List[Tuple[str, str]]] = {}
+        # Write-ahead log fed by every mutation when persistence is on (see api.persistence)
+        self.journal = None
+        # Read-only tier holding archived finalized orders and payments (see api.archive)
+        self.cold = None
+    
+    def _product_lock(self, product_id: str):
+        """Lock guarding a single product's mutable fields (stock)."""
+        return self._lock
+    
+    def _product_locks(self, product_ids: Iterable[str]) -> List:
+        """Distinct locks covering all given products, in acquisition order."""
+        return [self._lock]
+    
+    def _all_locks(self) -> List:
+        """Every lock a writer can hold, in an order compatible with nested acquisition."""
+        return [self._lock]
+    
+    def _product_write_locks(self, product_ids: Iterable[str]) -> List:
+        """Locks for replacing/editing whole products: collection lock, then the products' stripes."""
+        locks = [self._products_lock]
+        for lock in self._product_locks(product_ids):
+            if lock is not self._products_lock:
+                locks.append(lock)
+        return locks
     
     # ========== Users ==========
-    def add_user(self, user: UserInternal) -> UserInternal:
-        with self._lock:
+    def add_user(self, user: UserRecord) -> UserRecord:
+        user = _record(user, UserRecord)
+        with self._users_lock:
+            previous = self.users.get(user.email)
+            if previous is not None and previous.id != user.id:
+                self.users_by_id.pop(previous.id, None)
             self.users[user.email] = user
+            self.users_by_id[user.id] = user
+            if self.journal is not None:
+                self.journal.user(user)
             return user
     
-    def get_user_by_email(self, email: str) -> Optional[UserInternal]:
-        with self._lock:
+    def add_user_if_absent(self, user: UserRecord) -> bool:
+        """Insert user unless the email is already registered. Returns True if inserted."""
+        user = _record(user, UserRecord)
+        with self._users_lock:
+            if user.email in self.users:
+                return False
+            self.users[user.email] = user
+            self.users_by_id[user.id] = user
+            if self.journal is not None:
+                self.journal.user(user)
+            return True
+    
+    def get_user_by_email(self, email: str) -> Optional[UserRecord]:
+        with self._read_lock:
             return self.users.get(email)
     
-    def get_user_by_id(self, user_id: str) -> Optional[UserInternal]:
-        with self._lock:
-            for user in self.users.values():
-                if user.id == user_id:
-                    return user
-            return None
+    def get_user_by_id(self, user_id: str) -> Optional[UserRecord]:
+        with self._read_lock:
+            return self.users_by_id.get(user_id)
     
     # ========== Products ==========
-    def add_product(self, product: Product) -> Product:
-        with self._lock:
+    def add_product(self, product: ProductRecord) -> ProductRecord:
+        product = _record(product, ProductRecord)
+        with self._acquire_all(self._product_write_locks([product.id])):
+            self._reindex_product(self.products.get(product.id), product)
             self.products[product.id] = product
+            self._touch_product(product.id)
+            self._bump_catalog_version()
+            if self.journal is not None:
+                self.journal.product(product)
             return product
     
-    def get_product(self, product_id: str) -> Optional[Product]:
-        with self._lock:
+    def get_product(self, product_id: str) -> Optional[ProductRecord]:
+        with self._read_lock:
             return self.products.get(product_id)
     
-    def update_product(self, product_id: str, product: Product) -> Optional[Product]:
-        with self._lock:
+    def update_product(self, product_id: str, product: ProductRecord) -> Optional[ProductRecord]:
+        # Expects a new object: the indexes are moved using the old one's keys.
+        product = _record(product, ProductRecord)
+        with self._acquire_all(self._product_write_locks([product_id])):
             if product_id in self.products:
+                self._reindex_product(self.products[product_id], product)
                 self.products[product_id] = product
+                self._touch_product(product_id)
+                self._bump_catalog_version()
+                if self.journal is not None:
+                    self.journal.product(product)
                 return product
             return None
     
-    def list_products(self, active_only: bool = True) -> List[Product]:
-        with self._lock:
-            if active_only:
-                return [p for p in self.products.values() if p.isActive]
-            return list(self.products.values())
+    def upsert_products(self, rows: List[Tuple[str, Optional[ProductRecord], dict]],
+                        bump_version: bool = True) -> List[str]:
+        """
+        Apply a chunk of upserts in one transaction.
+        Each row is (product_id, product_if_new, changes): an existing product
+        gets `changes` applied in place, otherwise `product_if_new` is inserted.
+        Returns "updated", "created" or "missing" per row. Pass
+        bump_version=False to defer cache invalidation (see invalidate_catalog).
+        """
+        outcomes = []
+        with self._acquire_all(self._product_write_locks(row[0] for row in rows)):
+            for product_id, new_product, changes in rows:
+                existing = self.products.get(product_id)
+                if existing is not None:
+                    self._apply_changes_locked(existing, changes)
+                    self._touch_product(product_id)
+                    if self.journal is not None:
+                        self.journal.patch(product_id, changes)
+                    outcomes.append("updated")
+                elif new_product is not None:
+                    new_product = _record(new_product, ProductRecord)
+                    self._reindex_product(None, new_product)
+                    self.products[product_id] = new_product
+                    self._touch_product(product_id)
+                    if self.journal is not None:
+                        self.journal.product(new_product)
+                    outcomes.append("created")
+                else:
+                    outcomes.append("missing")
+            if bump_version:
+                self._bump_catalog_version()
+        return outcomes
+    
+    def load_catalog(self, products: MutableMapping):
+        """
+        Replace the whole product map, e.g. with a lazily materialized
+        api.catalog_snapshot.LazyProducts. The sorted indexes are rebuilt on
+        the first paged query rather than here, so loading stays O(1).
+        """
+        with self.freeze():
+            self.products = products
+            self.product_versions = {}
+            self._price_index = None
+            self._name_index = None
+            self._bump_catalog_version()
+    
+    def invalidate_catalog(self):
+        """Mark every catalog-derived cache stale."""
+        self._bump_catalog_version()
+    
+    def get_product_with_version(self, product_id: str) -> Tuple[Optional[ProductRecord], int]:
+        """Return (product, version); version changes on every write to the product."""
+        with self._read_lock:
+            return self.products.get(product_id), self.product_versions.get(product_id, 0)
+    
+    def patch_product(self, product_id: str, changes: dict,
+                      expected_version: Optional[int] = None) -> Tuple[Optional[ProductRecord], int]:
+        """
+        Apply a partial update in place under the product's write locks.
+        If `expected_version` is given and differs from the current version,
+        raises VersionConflict and changes nothing. Returns (product, new
+        version), or (None, 0) if the product does not exist.
+        """
+        with self._acquire_all(self._product_write_locks([product_id])):
+            product = self.products.get(product_id)
+            if product is None:
+                return None, 0
+            current = self.product_versions.get(product_id, 0)
+            if expected_version is not None and expected_version != current:
+                raise VersionConflict(current)
+            if not changes:
+                return product, current
+            self._apply_changes_locked(product, changes)
+            self._touch_product(product_id)
+            self._bump_catalog_version()
+            if self.journal is not None:
+                self.journal.patch(product_id, changes)
+            return product, self.product_versions[product_id]
+    
+    def get_products(self, product_ids: Iterable[str]) -> Dict[str, Optional[ProductRecord]]:
+        """Look up several products at once (missing ids map to None)."""
+        with self._read_lock:
+            return {pid: self.products.get(pid) for pid in product_ids}
+    
+    def product_count(self) -> int:
+        return len(self.products)
+    
+    def list_products(self, active_only: bool = True) -> List[ProductRecord]:
+        with self._read_lock:
+            products = list(self.products.values())
+        if active_only:
+            return [p for p in products if p.isActive]
+        return products
+    
+    def query_products(self, sort_by: str = "name", descending: bool = False,
+                       after: Optional[tuple] = None, limit: Optional[int] = None,
+                       min_price: Optional[float] = None, max_price: Optional[float] = None,
+                       name_prefix: Optional[str] = None,
+                       in_stock: Optional[bool] = None) -> Tuple[List[ProductRecord], Optional[tuple]]:
+        """
+        Page through active products using the sorted price/name indexes.
+        
+        `sort_by` is "price" or "name" (case-insensitive). `after` is the sort
+        key of the last item of the previous page. The range filter on the
+        sort key is resolved by bisection; other filters are applied while
+        scanning, so cost is O(log n + scanned). Returns (page, next_key),
+        where next_key is None on the last page.
+        """
+        if sort_by == "price":
+            lo_key = (min_price,) if min_price is not None else None
+            hi_key = (max_price, _MAX_ID) if max_price is not None else None
+        else:
+            prefix = name_prefix.casefold() if name_prefix else None
+            lo_key = (prefix,) if prefix else None
+            hi_key = (prefix + _MAX_ID,) if prefix else None
+        
+        page: List[ProductRecord] = []
+        next_key = None
+        with self._products_lock:
+            index = self._sorted_index(sort_by)
+            lo = bisect.bisect_left(index, lo_key) if lo_key else 0
+            hi = bisect.bisect_right(index, hi_key) if hi_key else len(index)
+            if after is not None:
+                if descending:
+                    hi = min(hi, bisect.bisect_left(index, after))
+                else:
+                    lo = max(lo, bisect.bisect_right(index, after))
+            positions = range(hi - 1, lo - 1, -1) if descending else range(lo, hi)
+            for pos in positions:
+                key = index[pos]
+                product = self.products[key[1]]
+                if not self._matches(product, min_price, max_price, name_prefix, in_stock):
+                    continue
+                if limit is not None and len(page) == limit:
+                    next_key = self._index_key(page[-1], sort_by)
+                    break
+                page.append(product)
+        return page, next_key
     
     def decrease_stock(self, product_id: str, qty: int) -> bool:
         """Decrease product stock. Returns True if successful, False if insufficient stock."""
-        with self._lock:
+        with self._product_lock(product_id):
             product = self.products.get(product_id)
             if not product or product.stock < qty:
                 return False
             product.stock -= qty
+            self._touch_product(product_id)
+            self._bump_catalog_version()
+            if self.journal is not None:
+                self.journal.stock({product_id: -qty})
             return True
     
     def increase_stock(self, product_id: str, qty: int):
         """Increase product stock (e.g., when order is cancelled)."""
-        with self._lock:
+        with self._product_lock(product_id):
             product = self.products.get(product_id)
             if product:
                 product.stock += qty
+                self._touch_product(product_id)
+                self._bump_catalog_version()
+                if self.journal is not None:
+                    self.journal.stock({product_id: qty})
+    
+    def reserve_many(self, items: Iterable[Tuple[str, int]],
+                     check: Optional[Callable[[Dict[str, Optional[ProductRecord]]], None]] = None) -> Optional[str]:
+        """
+        Atomically decrease stock for several (product_id, qty) lines.
+        All lines are checked and decremented in one critical section: either
+        every line is reserved or nothing changes. Quantities for a repeated
+        product are summed. Returns None on success, otherwise the id of the
+        first product that is missing or has insufficient stock.
+        
+        `check`, if given, is called inside the critical section with a
+        {product_id: record or None} snapshot before any stock changes; it
+        may raise to abort the reservation.
+        """
+        wanted = self._aggregate(items)
+        with self._acquire_all(self._product_locks(wanted)):
+            return self._reserve_locked(wanted, check)
+    
+    def reserve_batch(self, carts: List[Iterable[Tuple[str, int]]],
+                      check: Optional[Callable[[int, Dict[str, Optional[ProductRecord]]], None]] = None) -> List:
+        """
+        Reserve stock for many independent carts in one critical section.
+        Each cart is all-or-nothing on its own and sees the stock left by the
+        carts before it. `check(cart_index, snapshot)` works like reserve_many's
+        check. Returns one result per cart: None if reserved, the failing
+        product id, or the exception raised by `check` for that cart.
+        """
+        wanted_per_cart = [self._aggregate(items) for items in carts]
+        all_ids = {pid for wanted in wanted_per_cart for pid in wanted}
+        results = []
+        with self._acquire_all(self._product_locks(all_ids)):
+            for index, wanted in enumerate(wanted_per_cart):
+                cart_check = (lambda products, i=index: check(i, products)) if check is not None else None
+                try:
+                    results.append(self._reserve_locked(wanted, cart_check))
+                except Exception as exc:
+                    results.append(exc)
+        return results
+    
+    def release_many(self, items: Iterable[Tuple[str, int]]):
+        """Atomically give back stock for several (product_id, qty) lines."""
+        wanted = self._aggregate(items)
+        with self._acquire_all(self._product_locks(wanted)):
+            released = {}
+            for product_id, qty in wanted.items():
+                product = self.products.get(product_id)
+                if product:
+                    product.stock += qty
+                    self._touch_product(product_id)
+                    released[product_id] = qty
+            self._bump_catalog_version()
+            if self.journal is not None and released:
+                self.journal.stock(released)
     
     # ========== Orders ==========
-    def add_order(self, order: Order) -> Order:
-        with self._lock:
-            self.orders[order.id] = order
+    def add_order(self, order: OrderRecord) -> OrderRecord:
+        order = _record(order, OrderRecord)
+        with self._orders_lock:
+            self._insert_order_locked(order)
             return order
     
-    def get_order(self, order_id: str) -> Optional[Order]:
-        with self._lock:
-            return self.orders.get(order_id)
+    def add_orders(self, orders: List[OrderRecord]) -> List[OrderRecord]:
+        """Insert several orders under a single lock acquisition."""
+        orders = [_record(order, OrderRecord) for order in orders]
+        with self._orders_lock:
+            for order in orders:
+                self._insert_order_locked(order)
+            return orders
     
-    def update_order(self, order_id: str, order: Order) -> Optional[Order]:
-        with self._lock:
+    def get_order(self, order_id: str) -> Optional[OrderRecord]:
+        with self._read_lock:
+            order = self.orders.get(order_id)
+        if order is None and self.cold is not None:
+            return self.cold.get_order(order_id)
+        return order
+    
+    def update_order(self, order_id: str, order: OrderRecord) -> Optional[OrderRecord]:
+        order = _record(order, OrderRecord)
+        with self._orders_lock:
             if order_id in self.orders:
                 self.orders[order_id] = order
+                if self.journal is not None:
+                    self.journal.order(order)
                 return order
             return None
     
+    def transition_order(self, order_id: str, from_status: OrderStatus,
+                         to_status: OrderStatus) -> Optional[OrderRecord]:
+        """
+        Move an order from `from_status` to `to_status` in one step under the
+        orders lock. Returns the updated order, or None if there is no such
+        order or it is no longer in `from_status` (a concurrent request
+        changed it first), so exactly one of several racing callers wins.
+        """
+        with self._orders_lock:
+            order = self.orders.get(order_id)
+            if order is None or order.status != from_status:
+                return None
+            order = OrderRecord(order.id, order.userId, order.items, order.totalAmount, order.currency,
+                                to_status, order.createdAt)
+            self.orders[order_id] = order
+            if self.journal is not None:
+                self.journal.order(order)
+            return order
+    
+    def query_orders(self, user_id: Optional[str] = None, status: Optional[str] = None,
+                     after: Optional[tuple] = None, limit: int = 20,
+                     newest_first: bool = True) -> Tuple[List[OrderRecord], Optional[tuple]]:
+        """
+        Page through orders by creation time, optionally for a single user.
+        Uses the per-user / global createdAt indexes, so cost scales with the
+        page size (plus any orders skipped by the status filter), not with the
+        total number of orders. With a cold tier attached, archived orders
+        are merged in. Returns (page, next_key).
+        """
+        page: List[OrderRecord] = []
+        next_key = None
+        with self._orders_lock:
+            index = self._orders_by_user.get(user_id, []) if user_id is not None else self._order_timeline
+            lo, hi = 0, len(index)
+            if after is not None:
+                if newest_first:
+                    hi = bisect.bisect_left(index, after)
+                else:
+                    lo = bisect.bisect_right(index, after)
+            positions = range(hi - 1, lo - 1, -1) if newest_first else range(lo, hi)
+            for pos in positions:
+                order = self.orders[index[pos][1]]
+                if status is not None and order.status != status:
+                    continue
+                if len(page) == limit:
+                    next_key = self._order_key(page[-1])
+                    break
+                page.append(order)
+        if self.cold is not None:
+            archived = self.cold.query_orders(user_id, status, after, limit + 1, newest_first)
+            if archived:
+                # An order being archived right now can be in both tiers
+                hot_ids = {order.id for order in page}
+                merged = sorted(page + [order for order in archived if order.id not in hot_ids],
+                                key=self._order_key, reverse=newest_first)
+                more = next_key is not None or len(merged) > limit
+                page = merged[:limit]
+                next_key = self._order_key(page[-1]) if more else None
+        return page, next_key
+    
     # ========== Payments ==========
-    def add_payment(self, payment: Payment) -> Payment:
-        with self._lock:
+    def add_payment(self, payment: PaymentRecord) -> PaymentRecord:
+        payment = _record(payment, PaymentRecord)
+        with self._payments_lock:
             self.payments[payment.id] = payment
             self.payment_by_order[payment.orderId] = payment.id
+            if self.journal is not None:
+                self.journal.payment(payment)
             return payment
     
-    def get_payment(self, payment_id: str) -> Optional[Payment]:
-        with self._lock:
-            return self.payments.get(payment_id)
+    def get_payment(self, payment_id: str) -> Optional[PaymentRecord]:
+        with self._read_lock:
+            payment = self.payments.get(payment_id)
+        if payment is None and self.cold is not None:
+            return self.cold.get_payment(payment_id)
+        return payment
     
-    def get_payment_by_order(self, order_id: str) -> Optional[Payment]:
+    def get_payment_by_order(self, order_id: str) -> Optional[PaymentRecord]:
         """Get payment for a specific order."""
-        with self._lock:
+        with self._read_lock:
             payment_id = self.payment_by_order.get(order_id)
             if payment_id:
                 return self.payments.get(payment_id)
-            return None
+        if self.cold is not None:
+            return self.cold.get_payment_by_order(order_id)
+        return None
+    
+    # ========== Maintenance ==========
+    def freeze(self) -> ExitStack:
+        """Block every writer until exit, e.g. to take a consistent snapshot."""
+        return self._acquire_all(self._all_locks())
+    
+    def finalized_orders(self, created_before: datetime,
+                         statuses: Iterable[str]) -> List[Tuple[OrderRecord, Optional[PaymentRecord]]]:
+        """
+        (order, payment) pairs for in-memory orders in `statuses` created
+        before the cutoff. A PAID order whose payment is not recorded yet
+        (the order is updated before its payment is added) is left out.
+        """
+        statuses = set(statuses)
+        found = []
+        with self._orders_lock:
+            end = bisect.bisect_left(self._order_timeline, (created_before.isoformat(timespec="microseconds"),))
+            for _, order_id in self._order_timeline[:end]:
+                order = self.orders[order_id]
+                if order.status in statuses:
+                    payment_id = self.payment_by_order.get(order_id)
+                    if order.status == OrderStatus.PAID and payment_id is None:
+                        continue
+                    found.append((order, self.payments.get(payment_id) if payment_id else None))
+        return found
+    
+    def drop_orders(self, order_ids: Iterable[str]) -> int:
+        """
+        Remove orders and their payments from memory and from the order
+        indexes, e.g. once they have been archived. Returns how many went.
+        """
+        order_ids = set(order_ids)
+        locks = [self._orders_lock]
+        if self._payments_lock is not self._orders_lock:
+            locks.append(self._payments_lock)
+        with self._acquire_all(locks):
+            users = set()
+            dropped = 0
+            for order_id in order_ids:
+                order = self.orders.pop(order_id, None)
+                if order is None:
+                    continue
+                dropped += 1
+                users.add(order.userId)
+                payment_id = self.payment_by_order.pop(order_id, None)
+                if payment_id:
+                    self.payments.pop(payment_id, None)
+            self._order_timeline = [key for key in self._order_timeline if key[1] not in order_ids]
+            for user_id in users:
+                self._orders_by_user[user_id] = [
+                    key for key in self._orders_by_user[user_id] if key[1] not in order_ids
+                ]
+        return dropped
+    
+    def reset(self) -> None:
+        """
+        Drop every user, product, order and payment, e.g. between tests.
+        Refused while a write-ahead log or cold tier is attached, since
+        those would keep (and later restore) what was dropped here.
+        """
+        if self.journal is not None or self.cold is not None:
+            raise ValueError("Cannot reset storage with persistence or archival attached")
+        with self.freeze():
+            self.users = {}
+            self.users_by_id = {}
+            self.products = {}
+            self.orders = {}
+            self.payments = {}
+            self.payment_by_order = {}
+            self.product_versions = {}
+            self._price_index = []
+            self._name_index = []
+            self._order_timeline = []
+            self._orders_by_user = {}
+            self._bump_catalog_version()
+    
+    def close(self) -> None:
+        """Nothing to release: the WAL and the cold tier are closed by their owners."""
+
+    # ========== Helpers ==========
+    @staticmethod
+    def _order_key(order: OrderRecord) -> Tuple[str, str]:
+        # Fixed-width ISO timestamps sort chronologically and survive a JSON cursor
+        return (order.createdAt.isoformat(timespec="microseconds"), order.id)
+    
+    @staticmethod
+    def _index_key(product: ProductRecord, sort_by: str) -> tuple:
+        if sort_by == "price":
+            return (product.price, product.id)
+        return (product.name.casefold(), product.id)
+    
+    @staticmethod
+    def _matches(product: ProductRecord, min_price: Optional[float], max_price: Optional[float],
+                 name_prefix: Optional[str], in_stock: Optional[bool]) -> bool:
+        if min_price is not None and product.price < min_price:
+            return False
+        if max_price is not None and product.price > max_price:
+            return False
+        if name_prefix and not product.name.casefold().startswith(name_prefix.casefold()):
+            return False
+        if in_stock is not None and (product.stock > 0) != in_stock:
+            return False
+        return True
+    
+    def _apply_changes_locked(self, product: ProductRecord, changes: dict):
+        """Edit a stored product in place (caller holds its write locks); keeps indexes in sync."""
+        reindex = any(field in changes for field in ("name", "price", "isActive"))
+        if reindex:
+            self._reindex_product(product, None)
+        for field, value in changes.items():
+            setattr(product, field, value)
+        if reindex:
+            self._reindex_product(None, product)
+    
+    def _reindex_product(self, old: Optional[ProductRecord], new: Optional[ProductRecord]):
+        """Move a product's entries in the sorted indexes (caller holds the products lock)."""
+        for index, sort_by in ((self._price_index, "price"), (self._name_index, "name")):
+            if index is None:
+                continue
+            if old is not None and old.isActive:
+                key = self._index_key(old, sort_by)
+                pos = bisect.bisect_left(index, key)
+                if pos < len(index) and index[pos] == key:
+                    del index[pos]
+            if new is not None and new.isActive:
+                bisect.insort(index, self._index_key(new, sort_by))
+    
+    def _sorted_index(self, sort_by: str) -> list:
+        """The price or name index, built now if it was dropped (caller holds the products lock)."""
+        attr = "_price_index" if sort_by == "price" else "_name_index"
+        index = getattr(self, attr)
+        if index is None:
+            index = sorted(self._index_key(p, sort_by) for p in self.products.values() if p.isActive)
+            setattr(self, attr, index)
+        return index
+    
+    def _touch_product(self, product_id: str):
+        # Caller holds the product's lock, so this read-modify-write is safe
+        self.product_versions[product_id] = self.product_versions.get(product_id, 0) + 1
+    
+    def _bump_catalog_version(self):
+        # next() on itertools.count is atomic, so striped writers never reuse a version
+        self.catalog_version = next(self._catalog_versions)
+    
+    def _insert_order_locked(self, order: OrderRecord):
+        if order.id not in self.orders:
+            key = self._order_key(order)
+            # Orders almost always arrive in createdAt order, so this is an append
+            bisect.insort(self._order_timeline, key)
+            bisect.insort(self._orders_by_user.setdefault(order.userId, []), key)
+        self.orders[order.id] = order
+        if self.journal is not None:
+            self.journal.order(order)
+    
+    def _reserve_locked(self, wanted: Dict[str, int], check) -> Optional[str]:
+        """Body of reserve_many; caller holds the locks for every product in `wanted`."""
+        if check is not None:
+            check({pid: self.products.get(pid) for pid in wanted})
+        for product_id, qty in wanted.items():
+            product = self.products.get(product_id)
+            if not product or product.stock < qty:
+                return product_id
+        for product_id, qty in wanted.items():
+            self.products[product_id].stock -= qty
+            self._touch_product(product_id)
+        self._bump_catalog_version()
+        if self.journal is not None:
+            self.journal.stock({product_id: -qty for product_id, qty in wanted.items()})
+        return None
+    
+    @staticmethod
+    def _aggregate(items: Iterable[Tuple[str, int]]) -> Dict[str, int]:
+        """Sum quantities per product id, keeping first-seen order."""
+        wanted: Dict[str, int] = {}
+        for product_id, qty in items:
+            wanted[product_id] = wanted.get(product_id, 0) + qty
+        return wanted
+    
+    @staticmethod
+    def _acquire_all(locks: List) -> ExitStack:
+        """Enter every lock in the given order; released together on exit."""
+        stack = ExitStack()
+        for lock in locks:
+            stack.enter_context(lock)
+        return stack
+
+
+
+class ShardedInMemoryStorage(InMemoryStorage):
+    """
+    In-memory storage with per-collection locks and striped per-product locks.
+    
+    Writers to different collections no longer wait on each other, and stock
+    changes only contend with other changes to products in the same stripe.
+    Point reads and catalog listings take no lock at all: dict lookups and
+    list(dict.values()) are atomic under the GIL, and writers only publish
+    fully-built objects.
+    """
+    
+    def __init__(self, stripes: int = STOCK_LOCK_STRIPES):
+        super().__init__()
+        self._users_lock = threading.Lock()
+        self._products_lock = threading.Lock()
+        self._orders_lock = threading.Lock()
+        self._payments_lock = threading.Lock()
+        self._read_lock = nullcontext()
+        self._stock_locks = [threading.Lock() for _ in range(stripes)]
+    
+    def _product_lock(self, product_id: str):
+        return self._stock_locks[hash(product_id) % len(self._stock_locks)]
+    
+    def _all_locks(self) -> List:
+        # Stripes are only ever taken after (or without) the products lock
+        return [self._users_lock, self._orders_lock, self._payments_lock,
+                self._products_lock, *self._stock_locks]
+    
+    def _product_locks(self, product_ids: Iterable[str]) -> List:
+        # Sorted stripe order keeps multi-product reservations deadlock-free.
+        stripes = sorted({hash(pid) % len(self._stock_locks) for pid in product_ids})
+        return [self._stock_locks[i] for i in stripes]
+
+
+def create_storage(engine: str = STORAGE_ENGINE) -> Storage:
+    """Build the storage engine selected by name ("memory", "sharded", "shared" or "sqlite")."""
+    if engine == "memory":
+        return InMemoryStorage()
+    if engine == "sharded":
+        return ShardedInMemoryStorage()
+    if engine == "shared":
+        from api.shared_stock import SharedStockStorage  # imports this module
+        return SharedStockStorage()
+    if engine == "sqlite":
+        from api.sqlite_storage import SQLiteStorage  # imports this module
+        return SQLiteStorage()
+    raise ValueError(f"Unknown storage engine: {engine}")
 
 
 # Global storage instance
-storage = InMemoryStorage()
+storage = create_storage()
@@ -0,0 +1,115 @@
+"""
+Benchmark: order archival into the cold store.
+
+Fills an in-memory storage with N orders (a share of them PAID with a
+payment or CANCELLED), archives every finalized order in one compaction
+run and reports heap held before/after (tracemalloc), compaction stats,
+point-read latency for hot vs. archived orders, and whether every archived
+order and payment reads back unchanged.
+
+Usage:
+    python -m benchmarks.bench_archive
+    python -m benchmarks.bench_archive --orders 500000 --finalized 0.9 --block-size 4096
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+from api.archive import OrderArchiver
+from api.models import OrderStatus, PaymentMethod, PaymentStatus
+from api.records import OrderRecord, OrderLine, PaymentRecord
+from api.storage import create_storage
+
+
+def fill(store, count: int, finalized: float, users: int = 1000):
+    """Deterministic for a given count, so two stores can be filled identically."""
+    rng = random.Random(42)
+
+    def new_id() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    product_ids = [new_id() for _ in range(200)]
+    user_ids = [new_id() for _ in range(users)]
+    start = datetime(2026, 1, 1)
+    for i in range(count):
+        created = start + timedelta(seconds=i)
+        lines = tuple(OrderLine(rng.choice(product_ids), rng.randint(1, 3)) for _ in range(rng.randint(1, 3)))
+        status = OrderStatus.CREATED
+        if rng.random() < finalized:
+            status = OrderStatus.PAID if rng.random() < 0.8 else OrderStatus.CANCELLED
+        order = OrderRecord(new_id(), rng.choice(user_ids), lines, 150.0 * len(lines), "TRY", status, created)
+        store.add_order(order)
+        if status == OrderStatus.PAID:
+            store.add_payment(PaymentRecord(
+                new_id(), order.id, order.totalAmount, "TRY", PaymentMethod.CARD,
+                PaymentStatus.CAPTURED, f"PAY-{new_id()[:12].upper()}", created,
+            ))
+
+
+def read_us(lookup, ids) -> float:
+    start = time.perf_counter()
+    for value in ids:
+        lookup(value)
+    return (time.perf_counter() - start) / len(ids) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--finalized", type=float, default=0.9, help="share of orders that are PAID or CANCELLED")
+    parser.add_argument("--block-size", type=int, default=1024)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Heap is measured on one store; timings come from a second, untraced one
+    tracemalloc.start()
+    traced = create_storage("memory")
+    fill(traced, args.orders, args.finalized)
+    gc.collect()
+    before, _ = tracemalloc.get_traced_memory()
+    OrderArchiver(traced, after_seconds=1, block_size=args.block_size).compact()
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del traced
+
+    store = create_storage("memory")
+    fill(store, args.orders, args.finalized)
+    archiver = OrderArchiver(store, after_seconds=1, block_size=args.block_size)
+    run = archiver.compact()
+    stats = archiver.stats()
+
+    # An identical store that keeps everything in memory is the reference
+    reference = create_storage("memory")
+    fill(reference, args.orders, args.finalized)
+    finalized = [oid for oid, order in reference.orders.items() if order.status != OrderStatus.CREATED]
+    active = [oid for oid, order in reference.orders.items() if order.status == OrderStatus.CREATED]
+    sample = random.Random(7).sample(finalized, min(args.reads, len(finalized)))
+    hot_us = read_us(store.get_order, active[:args.reads])
+    cold_us = read_us(store.get_order, sample)
+
+    def same(a, b):
+        return a is None and b is None or (a is not None and b is not None and a.to_model() == b.to_model())
+
+    intact = all(
+        same(store.get_order(oid), reference.get_order(oid))
+        and same(store.get_payment_by_order(oid), reference.get_payment_by_order(oid))
+        for oid in finalized
+    ) and all(same(store.get_payment(pid), payment) for pid, payment in reference.payments.items())
+
+    print(f"orders         : {args.orders:,} ({len(finalized):,} finalized, {len(active):,} active)")
+    print(f"compaction     : {run['orders']:,} orders, {run['payments']:,} payments in {run['seconds'] * 1000:,.0f} ms")
+    print(f"cold store     : {stats['blocks']} blocks, {stats['compressed_bytes']:,} bytes "
+          f"({stats['compressed_bytes'] / max(run['orders'], 1):,.0f} B/order, "
+          f"{stats['compression_ratio']:.1f}x vs. raw columns)")
+    print(f"heap           : {before / 2**20:,.1f} MiB -> {after / 2**20:,.1f} MiB")
+    print(f"get_order      : {hot_us:,.1f} us hot, {cold_us:,.1f} us archived")
+    print(f"archived reads : {'intact' if intact else 'DIFFER'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: sync (requests, one thread per in-flight request) vs. async (httpx pool) test clients.
+
+Sends N GET /products/{id} requests with C of them in flight at a time,
+first from C threads each owning a ProductClient, then from one event
+loop through a single AsyncAPIClient pool. Reports req/s and p50/p99.
+
+Needs a running API (same BASE_URL convention as the test suite):
+    uvicorn api.main:app --port 8000
+    python -m benchmarks.bench_async_client --requests 5000 --concurrency 10 100 1000
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+
+from tests.clients.async_api_client import async_variant
+from tests.clients.product_client import ProductClient
+
+
+BASE_URL = os.getenv("BASE_URL", "http://127.0.0.1:8000")
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_threads(product_id: str, total: int, concurrency: int):
+    latencies = []
+    per_thread = total // concurrency
+
+    def worker():
+        client = ProductClient(BASE_URL)
+        client.observers.append(lambda method, endpoint, response, seconds: latencies.append(seconds))
+        for _ in range(per_thread):
+            client.get_product(product_id)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - start
+
+
+async def run_async(product_id: str, total: int, concurrency: int):
+    latencies = []
+    async with async_variant(ProductClient)(BASE_URL) as client:
+        client.observers.append(lambda method, endpoint, response, seconds: latencies.append(seconds))
+        queue = iter(range(total))
+
+        async def worker():
+            for _ in queue:
+                await client.get_product(product_id)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    product_id = ProductClient(BASE_URL).list_products().json()[0]["id"]
+    print(f"{'in flight':>9} | {'transport':<16} | {'req/s':>8} | {'p50 ms':>7} | {'p99 ms':>7}")
+    print("-" * 60)
+    for concurrency in args.concurrency:
+        runs = (
+            ("threads+requests", lambda: run_threads(product_id, args.requests, concurrency)),
+            ("asyncio+httpx", lambda: asyncio.run(run_async(product_id, args.requests, concurrency))),
+        )
+        for name, run in runs:
+            latencies, elapsed = run()
+            print(f"{concurrency:>9} | {name:<16} | {len(latencies) / elapsed:>8,.0f} | "
+                  f"{percentile(latencies, 50) * 1000:>7.1f} | {percentile(latencies, 99) * 1000:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
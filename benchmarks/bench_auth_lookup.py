@@ -0,0 +1,70 @@
+"""
+Benchmark: auth dependency latency vs. number of registered users.
+
+Fills a fresh InMemoryStorage with N users and times get_current_user()
+for a token belonging to the last user added, both uncached (JWT decode +
+user lookup on every call) and with the verified-token cache enabled.
+
+Usage:
+    python -m benchmarks.bench_auth_lookup
+    python -m benchmarks.bench_auth_lookup --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import time
+import uuid
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from api import auth
+from api.models import UserInternal, UserRole
+from api.storage import InMemoryStorage
+
+
+def build_storage(user_count: int) -> InMemoryStorage:
+    """Create a storage with `user_count` customers (validation skipped for speed)."""
+    store = InMemoryStorage()
+    for i in range(user_count):
+        store.add_user(UserInternal.model_construct(
+            id=str(uuid.uuid4()),
+            email=f"user{i}@example.com",
+            password_hash="x",
+            role=UserRole.CUSTOMER,
+        ))
+    return store
+
+
+def time_auth_dependency(store: InMemoryStorage, user_id: str, iterations: int, cache_size: int) -> float:
+    """Return mean microseconds per get_current_user() call."""
+    original_storage, original_cache = auth.storage, auth.token_cache
+    auth.storage = store
+    auth.token_cache = auth.TokenCache(max_size=cache_size)
+    try:
+        token = auth.create_access_token(user_id, UserRole.CUSTOMER.value)
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            auth.get_current_user(credentials)
+        elapsed = time.perf_counter() - start
+    finally:
+        auth.storage, auth.token_cache = original_storage, original_cache
+    return elapsed / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--iterations", type=int, default=2_000)
+    args = parser.parse_args()
+
+    print(f"{'users':>10} | {'uncached (us/call)':>20} | {'cached (us/call)':>18}")
+    print("-" * 54)
+    for size in args.sizes:
+        store = build_storage(size)
+        last_user = next(reversed(store.users.values()))
+        uncached_us = time_auth_dependency(store, last_user.id, args.iterations, cache_size=0)
+        cached_us = time_auth_dependency(store, last_user.id, args.iterations, cache_size=1024)
+        print(f"{size:>10} | {uncached_us:>20.2f} | {cached_us:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
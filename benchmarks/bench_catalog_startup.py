@@ -0,0 +1,87 @@
+"""
+Benchmark: replica startup, building Product objects vs. mapping a catalog snapshot.
+
+The eager path is what startup_event does today for each product: build a
+validated Product and add_product it. The mapped path opens a snapshot file
+written by api.catalog_snapshot and installs it with storage.load_catalog;
+products are materialized on first access. Reports time-to-ready, the cost
+of the first product lookups, and the first paged query (which builds the
+sorted indexes).
+
+Usage:
+    python -m benchmarks.bench_catalog_startup
+    python -m benchmarks.bench_catalog_startup --skus 1000000 --skip-eager
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from api.catalog_snapshot import MappedCatalog, LazyProducts, write_catalog_snapshot
+from api.models import Product
+from api.storage import create_storage
+
+
+def make_rows(count: int):
+    rng = random.Random(42)
+    return [
+        {"id": str(uuid.UUID(int=rng.getrandbits(128))), "name": f"Product {i}",
+         "price": round(rng.uniform(1, 5000), 2), "currency": "TRY", "stock": rng.randint(0, 500), "isActive": True}
+        for i in range(count)
+    ]
+
+
+def eager_startup(rows) -> float:
+    store = create_storage("memory")
+    start = time.perf_counter()
+    for row in rows:
+        store.add_product(Product(**row))
+    return time.perf_counter() - start
+
+
+def mapped_startup(path: str, lookup_ids):
+    store = create_storage("memory")
+    start = time.perf_counter()
+    store.load_catalog(LazyProducts(MappedCatalog(path)))
+    ready = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for product_id in lookup_ids:
+        assert store.get_product(product_id) is not None
+    lookups = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store.query_products(sort_by="price", limit=20)
+    first_query = time.perf_counter() - start
+    return ready, lookups, first_query
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skus", type=int, default=200_000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--skip-eager", action="store_true", help="only time the mapped snapshot")
+    args = parser.parse_args()
+
+    rows = make_rows(args.skus)
+    lookup_ids = [row["id"] for row in random.Random(7).sample(rows, min(args.lookups, len(rows)))]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.bin")
+        start = time.perf_counter()
+        write_catalog_snapshot(path, (Product.model_construct(**row) for row in rows))
+        written = time.perf_counter() - start
+        size_mb = os.path.getsize(path) / 1e6
+
+        print(f"catalog: {args.skus:,} SKUs, snapshot {size_mb:.1f} MB written in {written:.2f} s")
+        if not args.skip_eager:
+            print(f"eager startup  : {eager_startup(rows) * 1000:>10.1f} ms")
+        ready, lookups, first_query = mapped_startup(path, lookup_ids)
+        print(f"mapped startup : {ready * 1000:>10.3f} ms")
+        print(f"first lookups  : {lookups * 1e6 / len(lookup_ids):>10.1f} us/product ({len(lookup_ids)} ids)")
+        print(f"first page     : {first_query * 1000:>10.1f} ms (builds the price index)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark: cost of the test clients' request/response logging.
+
+Runs the test suite (pytest in a subprocess, in-process app, pytest.ini's
+live log at INFO) once per logging mode and reports its wall time: client
+logging on, off (API_LOG_LEVEL=WARNING), on without body truncation,
+sampled, and on with the async writer. Each mode is run --repeats times
+with the same TEST_SEED and the fastest run is kept; the live log goes to
+/dev/null with the rest of pytest's output.
+
+--per-call additionally times ProductClient.list_products on a bulk-loaded
+catalog of N products (one large response per call) in each mode. It needs
+a running API (same BASE_URL convention as the test suite):
+    uvicorn api.main:app --port 8000
+
+Usage:
+    python -m benchmarks.bench_client_logging
+    python -m benchmarks.bench_client_logging --repeats 5 tests/test_orders.py
+    python -m benchmarks.bench_client_logging --per-call --products 5000 --calls 50
+"""
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+from tests.clients import api_client
+from tests.clients.auth_client import AuthClient
+from tests.clients.product_client import ProductClient
+
+
+BASE_URL = os.getenv("BASE_URL", "http://127.0.0.1:8000")
+PASSWORD = "password123"
+
+# name -> (root level, body limit, sample rate, async writer)
+MODES = {
+    "off": (logging.WARNING, 4000, 1.0, False),
+    "on": (logging.INFO, 4000, 1.0, False),
+    "on, full bodies": (logging.INFO, 0, 1.0, False),
+    "on, 10% sampled": (logging.INFO, 4000, 0.1, False),
+    "on, async writer": (logging.INFO, 4000, 1.0, True),
+}
+
+
+def suite_env(level: int, body_limit: int, sample_rate: float, use_async: bool) -> dict:
+    """The same mode as environment settings for a pytest subprocess."""
+    return dict(os.environ, TEST_SEED=os.getenv("TEST_SEED", "1"), API_LOG_LEVEL=logging.getLevelName(level),
+                API_LOG_BODY_LIMIT=str(body_limit), API_LOG_SAMPLE_RATE=str(sample_rate),
+                API_LOG_ASYNC="1" if use_async else "0")
+
+
+def run_suite(paths: list, repeats: int, *mode) -> float:
+    """Fastest wall time, in seconds, of `repeats` pytest runs over paths."""
+    command = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", *paths]
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run(command, env=suite_env(*mode), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            raise SystemExit(f"pytest exited with {result.returncode}; run it directly to see the failures")
+        best = min(best, elapsed)
+    return best
+
+
+def seed_catalog(count: int):
+    auth = AuthClient(BASE_URL)
+    email = f"bench_{uuid.uuid4().hex[:8]}@example.com"
+    auth.register(email, PASSWORD, role="admin").raise_for_status()
+    token = auth.login(email, PASSWORD).json()["accessToken"]
+    rows = [{"name": f"Bench product {i}", "price": 10.0 + i, "currency": "TRY", "stock": 100, "isActive": True}
+            for i in range(count)]
+    ProductClient(BASE_URL).bulk_upsert(token, rows, ndjson=True).raise_for_status()
+
+
+def run(calls: int, level: int, body_limit: int, sample_rate: float, use_async: bool) -> float:
+    logging.getLogger().setLevel(level)
+    api_client.API_LOG_BODY_LIMIT = body_limit
+    api_client.API_LOG_SAMPLE_RATE = sample_rate
+    api_client.API_LOG_ASYNC = use_async
+    client = ProductClient(BASE_URL)  # async writer is attached per client logger
+    client.list_products()  # warm-up
+    start = time.perf_counter()
+    for _ in range(calls):
+        client.list_products()
+    elapsed = time.perf_counter() - start
+    if use_async:
+        client.logger.removeHandler(api_client._async_log_handler())
+        client.logger.propagate = True
+    return elapsed / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", default=["tests"], help="what pytest runs (default: tests)")
+    parser.add_argument("--repeats", type=int, default=3, help="suite runs per mode; the fastest counts")
+    parser.add_argument("--per-call", action="store_true", help="also time list_products against BASE_URL")
+    parser.add_argument("--products", type=int, default=5000, help="products to bulk-load first (0 = skip)")
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+
+    baseline = None
+    for name, mode in MODES.items():
+        elapsed = run_suite(args.paths, args.repeats, *mode)
+        baseline = baseline or elapsed
+        print(f"{name:<18}: {elapsed:>8.2f} s suite wall time ({elapsed / baseline - 1:+.1%} vs off)")
+    if not args.per_call:
+        return
+
+    sink = open(os.devnull, "w")
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)8s] %(message)s"))
+    logging.getLogger().addHandler(handler)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    if args.products:
+        seed_catalog(args.products)
+    size = len(ProductClient(BASE_URL).list_products().content)
+    print(f"catalog response: {size:,} bytes")
+    for name, mode in MODES.items():
+        print(f"{name:<18}: {run(args.calls, *mode):>8.2f} ms per list_products call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: login throughput and latency of unrelated endpoints during a login storm.
+
+Registers a few customers, then hammers POST /auth/login from several
+threads while a probe thread keeps calling GET /health and GET /products.
+Reports logins/sec and p50/p99 probe latency. With bcrypt on the event loop
+the probes queue behind every hash; with the worker pool they stay fast.
+
+Needs a running API (same BASE_URL convention as the test suite):
+    uvicorn api.main:app --port 8000
+    python -m benchmarks.bench_login_storm --threads 8 --duration 10
+Try BCRYPT_ROUNDS / PASSWORD_HASH_WORKERS on the server side to compare.
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+import uuid
+
+import requests
+
+
+BASE_URL = os.getenv("BASE_URL", "http://127.0.0.1:8000")
+PASSWORD = "password123"
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def register_users(count: int):
+    emails = []
+    with requests.Session() as session:
+        for _ in range(count):
+            email = f"storm_{uuid.uuid4().hex[:8]}@example.com"
+            r = session.post(f"{BASE_URL}/auth/register", json={"email": email, "password": PASSWORD})
+            r.raise_for_status()
+            emails.append(email)
+    return emails
+
+
+def login_worker(emails, stop: threading.Event, counts: list, index: int):
+    with requests.Session() as session:
+        i = index
+        while not stop.is_set():
+            r = session.post(f"{BASE_URL}/auth/login", json={"email": emails[i % len(emails)], "password": PASSWORD})
+            if r.status_code == 200:
+                counts[index] += 1
+            i += 1
+
+
+def probe_worker(stop: threading.Event, latencies: list):
+    with requests.Session() as session:
+        while not stop.is_set():
+            for path in ("/health", "/products"):
+                start = time.perf_counter()
+                session.get(f"{BASE_URL}{path}")
+                latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8, help="concurrent login clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--users", type=int, default=4)
+    args = parser.parse_args()
+
+    emails = register_users(args.users)
+    stop = threading.Event()
+    counts = [0] * args.threads
+    latencies = []
+
+    threads = [threading.Thread(target=login_worker, args=(emails, stop, counts, i)) for i in range(args.threads)]
+    threads.append(threading.Thread(target=probe_worker, args=(stop, latencies)))
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    print(f"login clients      : {args.threads}")
+    print(f"logins/sec         : {sum(counts) / args.duration:.1f}")
+    print(f"probe requests     : {len(latencies)}")
+    if latencies:
+        print(f"probe p50 (ms)     : {statistics.median(latencies):.1f}")
+        print(f"probe p99 (ms)     : {percentile(latencies, 99):.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark: order creation throughput, POST /orders vs. POST /orders:batch.
+
+Creates a well-stocked product, then places the same number of orders
+one request at a time and in batches, and reports orders/sec for each.
+
+Needs a running API (same BASE_URL convention as the test suite):
+    uvicorn api.main:app --port 8000
+    python -m benchmarks.bench_order_batch --orders 500 --batch-size 50
+"""
+import argparse
+import os
+import time
+import uuid
+
+import requests
+
+
+BASE_URL = os.getenv("BASE_URL", "http://127.0.0.1:8000")
+
+
+def token_for(session: requests.Session, role: str) -> str:
+    email = f"bench_{uuid.uuid4().hex[:8]}@example.com"
+    session.post(f"{BASE_URL}/auth/register", json={"email": email, "password": "password123", "role": role}).raise_for_status()
+    r = session.post(f"{BASE_URL}/auth/login", json={"email": email, "password": "password123"})
+    r.raise_for_status()
+    return r.json()["accessToken"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    session = requests.Session()
+    admin = {"Authorization": f"Bearer {token_for(session, 'admin')}"}
+    customer = {"Authorization": f"Bearer {token_for(session, 'customer')}"}
+    product = session.post(
+        f"{BASE_URL}/products", headers=admin,
+        json={"name": "BenchItem", "price": 100.0, "currency": "TRY", "stock": 10 * args.orders},
+    ).json()
+    cart = {"items": [{"productId": product["id"], "qty": 1}]}
+
+    start = time.perf_counter()
+    for _ in range(args.orders):
+        session.post(f"{BASE_URL}/orders", headers=customer, json=cart).raise_for_status()
+    single = args.orders / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for offset in range(0, args.orders, args.batch_size):
+        size = min(args.batch_size, args.orders - offset)
+        r = session.post(f"{BASE_URL}/orders:batch", headers=customer, json={"orders": [cart] * size})
+        r.raise_for_status()
+        assert all(res["status"] == 201 for res in r.json()["results"])
+    batched = args.orders / (time.perf_counter() - start)
+
+    print(f"orders             : {args.orders}")
+    print(f"POST /orders       : {single:,.0f} orders/s")
+    print(f"POST /orders:batch : {batched:,.0f} orders/s (batch size {args.batch_size})")
+    print(f"speedup            : {batched / single:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: write-ahead log overhead and restore time.
+
+Runs the checkout-like mix from bench_storage_contention against a storage
+engine with and without persistence, then restores the persisted directory
+into a fresh storage and checks that it holds the same data.
+
+Usage:
+    python -m benchmarks.bench_persistence
+    python -m benchmarks.bench_persistence --engine sharded --threads 4 --ops 20000 --fsync-ms 5
+"""
+import argparse
+import tempfile
+import threading
+import time
+
+from api.persistence import StoragePersistence
+from api.storage import create_storage
+from benchmarks.bench_storage_contention import seed_products, worker
+
+
+def run(engine: str, threads: int, ops: int, catalog_size: int, persist_dir: str = "",
+        fsync_ms: float = 10, snapshot_every: int = 100_000):
+    store = create_storage(engine)
+    persistence = StoragePersistence(store, persist_dir, fsync_ms, snapshot_every)
+    if persistence.enabled:
+        persistence.open()
+    product_ids = seed_products(store, catalog_size)
+    barrier = threading.Barrier(threads + 1)
+    pool = [
+        threading.Thread(target=worker, args=(store, product_ids, product_ids[t % len(product_ids)], ops, barrier))
+        for t in range(threads)
+    ]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stats = None
+    if persistence.enabled:
+        persistence.close()
+        stats = persistence.stats()
+    return store, threads * ops / elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engine", choices=["memory", "sharded"], default="memory")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--ops", type=int, default=20_000, help="operations per thread")
+    parser.add_argument("--catalog-size", type=int, default=200)
+    parser.add_argument("--fsync-ms", type=float, default=10)
+    parser.add_argument("--snapshot-every", type=int, default=50_000)
+    args = parser.parse_args()
+
+    _, plain, _ = run(args.engine, args.threads, args.ops, args.catalog_size)
+    with tempfile.TemporaryDirectory() as directory:
+        store, persisted, stats = run(args.engine, args.threads, args.ops, args.catalog_size,
+                                      directory, args.fsync_ms, args.snapshot_every)
+
+        restored = create_storage(args.engine)
+        start = time.perf_counter()
+        restorer = StoragePersistence(restored, directory)
+        restorer.open()
+        restore_ms = (time.perf_counter() - start) * 1000
+        restorer.close()
+
+    print(f"in-memory      : {plain:>12,.0f} ops/s")
+    print(f"with WAL       : {persisted:>12,.0f} ops/s ({persisted / plain - 1:+.1%})")
+    print(f"log stats      : {stats['fsyncs']} fsyncs, {stats['snapshots']} snapshots")
+    print(f"restore        : {restore_ms:>9.1f} ms for {len(restored.orders):,} orders, "
+          f"{len(restored.products):,} products")
+    same_stock = all(restored.products[pid].stock == p.stock for pid, p in store.products.items())
+    same_orders = restored.orders.keys() == store.orders.keys()
+    print(f"restored state : {'matches' if same_stock and same_orders else 'DIFFERS'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: memory held per stored order and payment.
+
+Builds N orders and N payments the way the API does (validated pydantic
+models) and measures with tracemalloc how much memory stays allocated when
+they are kept as models (the previous storage layout) versus converted to
+the slim records the storage engines keep now.
+
+Usage:
+    python -m benchmarks.bench_record_memory
+    python -m benchmarks.bench_record_memory --count 200000 --items 3
+"""
+import argparse
+import gc
+import tracemalloc
+import uuid
+from datetime import datetime
+
+from api.models import Order, OrderItem, OrderStatus, Payment, PaymentMethod, PaymentStatus
+from api.records import OrderRecord, PaymentRecord
+
+
+def make_orders(count: int, items: int):
+    product_ids = [str(uuid.uuid4()) for _ in range(50)]
+    return [
+        Order(
+            id=str(uuid.uuid4()),
+            userId=str(uuid.uuid4()),
+            items=[OrderItem(productId=product_ids[(i + j) % len(product_ids)], qty=1 + j) for j in range(items)],
+            totalAmount=100.0 * items,
+            currency="TRY",
+            status=OrderStatus.CREATED,
+            createdAt=datetime.utcnow(),
+        )
+        for i in range(count)
+    ]
+
+
+def make_payments(count: int):
+    return [
+        Payment(
+            id=str(uuid.uuid4()),
+            orderId=str(uuid.uuid4()),
+            amount=200.0,
+            currency="TRY",
+            method=PaymentMethod.CARD,
+            status=PaymentStatus.CAPTURED,
+            providerRef=f"PAY-{uuid.uuid4().hex[:12].upper()}",
+            createdAt=datetime.utcnow(),
+        )
+        for _ in range(count)
+    ]
+
+
+def measure(build) -> int:
+    """Bytes still allocated after build() returns, with its result kept alive."""
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--items", type=int, default=2, help="line items per order")
+    args = parser.parse_args()
+
+    # Both layouts are built the way the API builds them (validated models),
+    # so ids and timestamps are counted once per object either way.
+    rows = (
+        ("order", lambda: make_orders(args.count, args.items),
+         lambda: [OrderRecord.from_model(o) for o in make_orders(args.count, args.items)]),
+        ("payment", lambda: make_payments(args.count),
+         lambda: [PaymentRecord.from_model(p) for p in make_payments(args.count)]),
+    )
+    for name, as_models, as_records in rows:
+        model_bytes = measure(as_models) / args.count
+        record_bytes = measure(as_records) / args.count
+        print(f"{name:<8}: {model_bytes:>7,.0f} B as model, {record_bytes:>7,.0f} B as record "
+              f"({record_bytes / model_bytes - 1:+.0%})")
+
+
+if __name__ == "__main__":
+    main()
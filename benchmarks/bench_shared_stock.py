@@ -0,0 +1,88 @@
+"""
+Benchmark: checkout throughput across worker processes with shared stock counters.
+
+Each process plays a uvicorn worker: it opens its own SharedStockStorage
+on one SQLite file and one shared-memory segment, both seeded with the
+catalog beforehand, then reserves random carts until the ops budget is
+spent. Reports aggregate
+reservations/sec per process count and checks that units sold plus units
+left equals the starting stock, i.e. nothing was oversold.
+
+Usage:
+    python -m benchmarks.bench_shared_stock
+    python -m benchmarks.bench_shared_stock --processes 1 2 4 8 --ops 20000
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from api.models import Product
+from api.shared_stock import SharedStockCounters, SharedStockStorage
+
+
+def catalog(size: int, stock: int):
+    return [Product(id=f"sku-{i}", name=f"P{i}", price=100.0, stock=stock) for i in range(size)]
+
+
+def worker(name: str, path: str, catalog_size: int, ops: int, barrier, results) -> None:
+    store = SharedStockStorage(SharedStockCounters(name, slots=4096, stripes=64), path)
+    rng = random.Random(os.getpid())
+    sold = 0
+    barrier.wait()
+    start = time.perf_counter()
+    for _ in range(ops):
+        cart = [(f"sku-{rng.randrange(catalog_size)}", rng.randint(1, 3)) for _ in range(rng.randint(1, 3))]
+        if store.reserve_many(cart) is None:
+            sold += sum(qty for _, qty in cart)
+    results.put((sold, time.perf_counter() - start))
+    store.close()
+
+
+def run(processes: int, ops: int, catalog_size: int, stock: int):
+    name = f"bench-stock-{os.getpid()}-{processes}"
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-stock-"), "ecommerce.db")
+    seeder = SharedStockStorage(SharedStockCounters(name, slots=4096, stripes=64), path)
+    seeder.upsert_products([(product.id, product, {}) for product in catalog(catalog_size, stock)])
+    # Spawned like uvicorn workers, so each has its own resource tracker
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(processes)
+    results = context.Queue()
+    pool = [context.Process(target=worker, args=(name, path, catalog_size, ops, barrier, results))
+            for _ in range(processes)]
+    for p in pool:
+        p.start()
+    outcomes = [results.get() for _ in pool]
+    for p in pool:
+        p.join()
+    sold = sum(s for s, _ in outcomes)
+    elapsed = max(t for _, t in outcomes)
+    left = sum(p.stock for p in seeder.list_products())
+    seeder.counters.unlink()
+    seeder.close()
+    shutil.rmtree(os.path.dirname(path))
+    return processes * ops / elapsed, sold, left
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--ops", type=int, default=20_000, help="cart reservations per process")
+    parser.add_argument("--catalog-size", type=int, default=1000)
+    parser.add_argument("--stock", type=int, default=50, help="starting units per product")
+    args = parser.parse_args()
+
+    total = args.catalog_size * args.stock
+    print(f"{'processes':>9} | {'carts/s':>12} | {'sold':>8} | {'left':>8} | check")
+    print("-" * 58)
+    for processes in args.processes:
+        rate, sold, left = run(processes, args.ops, args.catalog_size, args.stock)
+        verdict = "ok" if sold + left == total and left >= 0 else "OVERSOLD"
+        print(f"{processes:>9} | {rate:>12,.0f} | {sold:>8,} | {left:>8,} | {verdict}")
+
+
+if __name__ == "__main__":
+    main()
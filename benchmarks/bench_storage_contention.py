@@ -0,0 +1,88 @@
+"""
+Benchmark: storage lock contention, single-lock vs. sharded engine.
+
+N worker threads run a checkout-like mix against one storage instance:
+catalog listing, product reads, stock decrement/increment on a thread-local
+product, order insert/read and payment lookup. Reports total ops/sec.
+
+Usage:
+    python -m benchmarks.bench_storage_contention
+    python -m benchmarks.bench_storage_contention --threads 1 2 4 8 --ops 20000
+"""
+import argparse
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from api.models import Product, Order, OrderItem, OrderStatus
+from api.storage import create_storage, InMemoryStorage
+
+
+def seed_products(store: InMemoryStorage, count: int):
+    ids = []
+    for i in range(count):
+        product = Product(id=str(uuid.uuid4()), name=f"P{i}", price=100.0, stock=10**9)
+        store.add_product(product)
+        ids.append(product.id)
+    return ids
+
+
+def worker(store: InMemoryStorage, product_ids, own_product: str, ops: int, barrier):
+    barrier.wait()
+    for i in range(ops):
+        step = i % 6
+        if step == 0:
+            store.list_products()
+        elif step == 1:
+            store.get_product(product_ids[i % len(product_ids)])
+        elif step == 2:
+            store.decrease_stock(own_product, 1)
+        elif step == 3:
+            store.increase_stock(own_product, 1)
+        elif step == 4:
+            order = Order.model_construct(
+                id=str(uuid.uuid4()), userId="bench", items=[OrderItem.model_construct(productId=own_product, qty=1)],
+                totalAmount=100.0, currency="TRY", status=OrderStatus.CREATED, createdAt=datetime.utcnow(),
+            )
+            store.add_order(order)
+            store.get_order(order.id)
+        else:
+            store.get_payment_by_order(own_product)
+
+
+def run(engine: str, threads: int, ops: int, catalog_size: int) -> float:
+    store = create_storage(engine)
+    product_ids = seed_products(store, catalog_size)
+    barrier = threading.Barrier(threads + 1)
+    pool = [
+        threading.Thread(target=worker, args=(store, product_ids, product_ids[t % len(product_ids)], ops, barrier))
+        for t in range(threads)
+    ]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return threads * ops / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ops", type=int, default=20_000, help="operations per thread")
+    parser.add_argument("--catalog-size", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'threads':>7} | {'memory ops/s':>14} | {'sharded ops/s':>14} | {'speedup':>7}")
+    print("-" * 52)
+    for threads in args.threads:
+        single = run("memory", threads, args.ops, args.catalog_size)
+        sharded = run("sharded", threads, args.ops, args.catalog_size)
+        print(f"{threads:>7} | {single:>14,.0f} | {sharded:>14,.0f} | {sharded / single:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
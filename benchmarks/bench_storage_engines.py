@@ -0,0 +1,97 @@
+"""
+Benchmark: in-memory vs. SQLite storage engine.
+
+Runs the checkout-like mix from bench_storage_contention against each
+engine with N threads, and additionally races N processes reserving stock
+of one shared product in the SQLite engine to show that the conditional
+UPDATE never oversells across processes.
+
+Usage:
+    python -m benchmarks.bench_storage_engines
+    python -m benchmarks.bench_storage_engines --threads 1 4 --ops 5000 --processes 4
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from api.models import Product
+from api.sqlite_storage import SQLiteStorage
+from api.storage import create_storage
+from benchmarks.bench_storage_contention import seed_products, worker
+
+
+def run(store, threads: int, ops: int, catalog_size: int) -> float:
+    product_ids = seed_products(store, catalog_size)
+    barrier = threading.Barrier(threads + 1)
+    pool = [
+        threading.Thread(target=worker, args=(store, product_ids, product_ids[t % len(product_ids)], ops, barrier))
+        for t in range(threads)
+    ]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return threads * ops / elapsed
+
+
+def reserve_until_empty(path: str, product_id: str, results) -> None:
+    store = SQLiteStorage(path, pool_size=1)
+    taken = 0
+    while store.reserve_many([(product_id, 1)]) is None:
+        taken += 1
+    results.put(taken)
+    store.close()
+
+
+def oversell_check(directory: str, processes: int, stock: int):
+    path = os.path.join(directory, "race.db")
+    store = SQLiteStorage(path)
+    store.add_product(Product(id="race", name="Race", price=1.0, stock=stock))
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=reserve_until_empty, args=(path, "race", results))
+               for _ in range(processes)]
+    start = time.perf_counter()
+    for p in workers:
+        p.start()
+    taken = sum(results.get() for _ in workers)
+    for p in workers:
+        p.join()
+    elapsed = time.perf_counter() - start
+    left = store.get_product("race").stock
+    store.close()
+    return taken, left, taken / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--ops", type=int, default=5_000, help="operations per thread")
+    parser.add_argument("--catalog-size", type=int, default=200)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--stock", type=int, default=2_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'threads':>7} | {'memory ops/s':>14} | {'sqlite ops/s':>14} | {'ratio':>7}")
+        print("-" * 52)
+        for threads in args.threads:
+            memory = run(create_storage("memory"), threads, args.ops, args.catalog_size)
+            sqlite_store = SQLiteStorage(os.path.join(directory, f"bench-{threads}.db"))
+            sqlite = run(sqlite_store, threads, args.ops, args.catalog_size)
+            sqlite_store.close()
+            print(f"{threads:>7} | {memory:>14,.0f} | {sqlite:>14,.0f} | {sqlite / memory:>6.2f}x")
+
+        taken, left, rate = oversell_check(directory, args.processes, args.stock)
+        verdict = "ok" if taken == args.stock and left == 0 else "OVERSOLD"
+        print(f"\n{args.processes} processes reserved {taken:,}/{args.stock:,} units "
+              f"({rate:,.0f} reservations/s), {left} left: {verdict}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,80 +1,181 @@
 """Base API client with request/response logging."""
+import atexit
 import json
 import logging
-from typing import Optional, Dict, Any
+import os
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import requests
 from requests import Response
 
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Logging configuration (the level itself comes from pytest.ini / the root logger)
+API_LOG_LEVEL = os.getenv("API_LOG_LEVEL", "")  # e.g. "WARNING" to silence the clients only
+API_LOG_BODY_LIMIT = int(os.getenv("API_LOG_BODY_LIMIT", "4000"))  # characters per logged body, 0 = no limit
+API_LOG_SAMPLE_RATE = float(os.getenv("API_LOG_SAMPLE_RATE", "1.0"))  # share of exchanges logged; errors always are
+API_LOG_ASYNC = os.getenv("API_LOG_ASYNC", "0") == "1"  # format and write log records on a background thread
+
+SENSITIVE_HEADERS = {"authorization", "idempotency-key"}
+
+
+class _LazyHeaders:
+    """Headers rendered with sensitive values masked, only when a handler formats the record."""
+    
+    def __init__(self, headers):
+        self.headers = headers
+    
+    def __str__(self) -> str:
+        safe_headers = {k: ('***' if k.lower() in SENSITIVE_HEADERS else v) for k, v in self.headers.items()}
+        return json.dumps(safe_headers, indent=2)
+
+
+class _LazyBody:
+    """A request body or a response, pretty-printed and truncated only when formatted."""
+    
+    def __init__(self, body: Any, limit: Optional[int] = None):
+        self.body = body
+        self.limit = API_LOG_BODY_LIMIT if limit is None else limit
+    
+    def __str__(self) -> str:
+        body = self.body
+        # Compact text first (C encoder, no parsing of responses); only bodies
+        # that fit the limit are pretty-printed, which is the slow part
+        if isinstance(body, str):
+            text = body
+        elif isinstance(body, (dict, list)):
+            text = json.dumps(body)
+        else:
+            # A response (requests or httpx); .text could sniff the charset
+            text = body.content.decode("utf-8", "replace")
+        if self.limit and len(text) > self.limit:
+            return f"{text[:self.limit]}... [{len(text) - self.limit} more characters]"
+        try:
+            return json.dumps(json.loads(text), indent=2)
+        except ValueError:
+            return text
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queues records unformatted, so the lazy arguments are rendered by the writer thread."""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _ForwardToRoot(logging.Handler):
+    """Hands records to whatever handlers the root logger has at that moment (pytest swaps them per test)."""
+    
+    def emit(self, record: logging.LogRecord):
+        logging.getLogger().handle(record)
+
+
+_async_handler: Optional[QueueHandler] = None
+
+
+def _async_log_handler() -> QueueHandler:
+    """The shared queue handler, starting its writer thread on first use."""
+    global _async_handler
+    if _async_handler is None:
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        listener = QueueListener(log_queue, _ForwardToRoot())
+        listener.start()
+        atexit.register(listener.stop)  # drains the queue
+        _async_handler = _DeferredQueueHandler(log_queue)
+    return _async_handler
+
+
+def client_logger(name: str) -> logging.Logger:
+    """Logger for a client class, with the API_LOG_LEVEL / API_LOG_ASYNC settings applied."""
+    logger = logging.getLogger(name)
+    if API_LOG_LEVEL:
+        logger.setLevel(API_LOG_LEVEL)
+    if API_LOG_ASYNC and not logger.handlers:
+        logger.addHandler(_async_log_handler())
+        logger.propagate = False
+    return logger
 
 
 class APIClient:
     """Base API client with logging and common functionality."""
     
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(self, base_url: str = "http://localhost:8000", session: Optional[requests.Session] = None):
         self.base_url = base_url
-        self.logger = logging.getLogger(self.__class__.__name__)
-        self.session = requests.Session()
+        self.logger = client_logger(self.__class__.__name__)
+        # Anything with requests.Session's request() signature, e.g. an in-process ASGISession
+        self.session = session if session is not None else requests.Session()
+        # Called as observer(method, endpoint, response, seconds) after every request (see tests.load)
+        self.observers: List[Callable[[str, str, Response, float], None]] = []
     
-    def _log_request(self, method: str, url: str, headers: Optional[Dict] = None, 
+    def _log_request(self, method: str, url: str, headers: Optional[Dict] = None,
                      body: Optional[Any] = None):
-        """Log HTTP request details."""
-        self.logger.info(f"\n{'='*80}")
-        self.logger.info(f"REQUEST: {method} {url}")
+        """Log HTTP request details (formatted lazily, only if a handler emits the record)."""
+        self.logger.info("\n%s\nREQUEST: %s %s", "=" * 80, method, url)
         if headers:
-            # Mask sensitive headers
-            safe_headers = {k: ('***' if k.lower() in ['authorization', 'idempotency-key'] else v) 
-                           for k, v in headers.items()}
-            self.logger.info(f"Headers: {json.dumps(safe_headers, indent=2)}")
+            self.logger.info("Headers: %s", _LazyHeaders(headers))
         if body:
-            self.logger.info(f"Body: {json.dumps(body, indent=2)}")
+            self.logger.info("Body: %s", _LazyBody(body))
     
     def _log_response(self, response: Response):
-        """Log HTTP response details."""
-        self.logger.info(f"\nRESPONSE: {response.status_code}")
-        self.logger.info(f"Headers: {dict(response.headers)}")
-        try:
-            response_json = response.json()
-            self.logger.info(f"Body: {json.dumps(response_json, indent=2)}")
-        except:
-            self.logger.info(f"Body: {response.text}")
-        self.logger.info(f"{'='*80}\n")
+        """Log HTTP response details (formatted lazily, only if a handler emits the record)."""
+        self.logger.info("\nRESPONSE: %s", response.status_code)
+        self.logger.info("Headers: %s", response.headers)
+        self.logger.info("Body: %s\n%s\n", _LazyBody(response), "=" * 80)
     
     def request(self, method: str, endpoint: str, headers: Optional[Dict] = None,
-                json_data: Optional[Dict] = None, params: Optional[Dict] = None) -> Response:
+                json_data: Optional[Dict] = None, params: Optional[Dict] = None,
+                data: Optional[bytes] = None) -> Response:
         """Make HTTP request with logging."""
         url = f"{self.base_url}{endpoint}"
+        body = json_data if data is None else data.decode("utf-8", "replace")
         
         # Log request
-        self._log_request(method, url, headers, json_data)
+        log_enabled, sampled = self._log_decision()
+        if sampled:
+            self._log_request(method, url, headers, body)
         
         # Make request
+        start = time.perf_counter()
         response = self.session.request(
             method=method,
             url=url,
             headers=headers,
             json=json_data,
-            params=params
+            params=params,
+            data=data
         )
         
-        # Log response
-        self._log_response(response)
-        
+        self._after_response(method, endpoint, url, headers, body, response,
+                             time.perf_counter() - start, log_enabled, sampled)
         return response
     
+    def _log_decision(self) -> Tuple[bool, bool]:
+        """(INFO enabled, this exchange sampled). Level check first: when disabled nothing allocates or formats."""
+        log_enabled = self.logger.isEnabledFor(logging.INFO)
+        sampled = log_enabled and (API_LOG_SAMPLE_RATE >= 1 or random.random() < API_LOG_SAMPLE_RATE)
+        return log_enabled, sampled
+    
+    def _after_response(self, method: str, endpoint: str, url: str, headers: Optional[Dict], body: Any,
+                        response, seconds: float, log_enabled: bool, sampled: bool):
+        for observer in self.observers:
+            observer(method, endpoint, response, seconds)
+        # Failures are logged even when the exchange was sampled out
+        if sampled:
+            self._log_response(response)
+        elif log_enabled and response.status_code >= 400:
+            self._log_request(method, url, headers, body)
+            self._log_response(response)
+    
     def get(self, endpoint: str, headers: Optional[Dict] = None, params: Optional[Dict] = None) -> Response:
         """HTTP GET request."""
         return self.request("GET", endpoint, headers=headers, params=params)
     
-    def post(self, endpoint: str, json_data: Optional[Dict] = None, 
-             headers: Optional[Dict] = None) -> Response:
+    def post(self, endpoint: str, json_data: Optional[Dict] = None,
+             headers: Optional[Dict] = None, data: Optional[bytes] = None) -> Response:
         """HTTP POST request."""
-        return self.request("POST", endpoint, headers=headers, json_data=json_data)
+        return self.request("POST", endpoint, headers=headers, json_data=json_data, data=data)
     
     def patch(self, endpoint: str, json_data: Optional[Dict] = None,
               headers: Optional[Dict] = None) -> Response:
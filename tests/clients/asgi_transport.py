@@ -0,0 +1,29 @@
+"""In-process transport: clients call the ASGI app directly, with no server and no sockets."""
+from typing import Any, Dict, Optional
+import httpx
+from starlette.testclient import TestClient
+
+
+ASGI_BASE_URL = "http://testserver"
+
+
+class ASGISession(TestClient):
+    """
+    Stand-in for requests.Session in APIClient that dispatches into an ASGI
+    app in this process (Starlette's TestClient: httpx over an in-memory
+    transport). Use it as a context manager so the app's startup/shutdown
+    handlers run and one event loop serves every request.
+    
+    Unhandled server errors come back as 500 responses, as they would over
+    HTTP, instead of being raised into the test.
+    """
+    
+    def __init__(self, app, base_url: str = ASGI_BASE_URL):
+        super().__init__(app, base_url=base_url, raise_server_exceptions=False)
+    
+    def request(self, method: str, url: Any, headers: Optional[Dict] = None, json: Optional[Any] = None,
+                params: Optional[Dict] = None, data: Optional[Any] = None, **kwargs) -> httpx.Response:
+        # requests' data=<bytes> is httpx's content=
+        if isinstance(data, bytes):
+            kwargs["content"], data = data, None
+        return super().request(method, url, headers=headers, json=json, params=params, data=data, **kwargs)
@@ -0,0 +1,98 @@
+"""Asynchronous API client (httpx) with the same surface as APIClient."""
+import functools
+import os
+import time
+from typing import Any, Dict, Optional, Type
+import httpx
+from tests.clients.api_client import APIClient, client_logger
+
+
+# Connection pool configuration
+ASYNC_MAX_CONNECTIONS = int(os.getenv("ASYNC_MAX_CONNECTIONS", "512"))  # open sockets per pool
+ASYNC_MAX_KEEPALIVE = int(os.getenv("ASYNC_MAX_KEEPALIVE", "256"))  # idle sockets kept for reuse
+ASYNC_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("ASYNC_KEEPALIVE_EXPIRY_SECONDS", "30"))
+ASYNC_TIMEOUT_SECONDS = float(os.getenv("ASYNC_TIMEOUT_SECONDS", "30"))
+ASYNC_POOL_TIMEOUT_SECONDS = float(os.getenv("ASYNC_POOL_TIMEOUT_SECONDS", "60"))  # wait for a free connection
+
+
+def create_async_session(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """An httpx.AsyncClient with the pool limits above; share one between clients to share the pool."""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=ASYNC_MAX_CONNECTIONS,
+            max_keepalive_connections=ASYNC_MAX_KEEPALIVE,
+            keepalive_expiry=ASYNC_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(ASYNC_TIMEOUT_SECONDS, pool=ASYNC_POOL_TIMEOUT_SECONDS),
+        transport=transport,
+    )
+
+
+class AsyncAPIClient(APIClient):
+    """
+    APIClient on httpx/asyncio: request, get, post, patch and delete return
+    awaitables of httpx.Response (same status_code/json()/headers surface
+    as requests.Response); logging and observers work as in APIClient.
+    
+    Concurrency comes from the connection pool: up to ASYNC_MAX_CONNECTIONS
+    requests are in flight at once over keep-alive HTTP/1.1 connections
+    (one request per connection at a time; httpx does not pipeline), and
+    further requests wait up to ASYNC_POOL_TIMEOUT_SECONDS for a free one.
+    Pass `session` to share one pool between several clients.
+    """
+    
+    def __init__(self, base_url: str = "http://localhost:8000", session: Optional[httpx.AsyncClient] = None):
+        self.base_url = base_url
+        self.logger = client_logger(self.__class__.__name__)
+        self.session = session if session is not None else create_async_session()
+        self.observers = []
+    
+    async def request(self, method: str, endpoint: str, headers: Optional[Dict] = None,
+                      json_data: Optional[Any] = None, params: Optional[Dict] = None,
+                      data: Optional[bytes] = None) -> httpx.Response:
+        """Make HTTP request with logging."""
+        url = f"{self.base_url}{endpoint}"
+        body = json_data if data is None else data.decode("utf-8", "replace")
+        
+        # Log request
+        log_enabled, sampled = self._log_decision()
+        if sampled:
+            self._log_request(method, url, headers, body)
+        
+        # Make request
+        start = time.perf_counter()
+        response = await self.session.request(
+            method=method,
+            url=url,
+            headers=headers,
+            json=json_data,
+            params=params,
+            content=data
+        )
+        
+        self._after_response(method, endpoint, url, headers, body, response,
+                             time.perf_counter() - start, log_enabled, sampled)
+        return response
+    
+    async def aclose(self):
+        """Close the connection pool."""
+        await self.session.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+@functools.lru_cache(maxsize=None)
+def async_variant(client_class: Type[APIClient]) -> Type[AsyncAPIClient]:
+    """
+    The given domain client on the async transport, e.g.
+    `async_variant(OrderClient)(base_url)`: every endpoint method then
+    returns an awaitable, since the domain clients just return what
+    get/post/patch/delete return.
+    """
+    if issubclass(client_class, AsyncAPIClient):
+        return client_class
+    return type(f"Async{client_class.__name__}", (client_class, AsyncAPIClient), {})
@@ -1,5 +1,5 @@
 """Order API client."""
-from typing import List, Dict
+from typing import List, Dict, Optional
 from requests import Response
 from tests.clients.api_client import APIClient
 
@@ -14,6 +14,17 @@ class OrderClient(APIClient):
         }
         return self.post("/orders", json_data=data, headers=self.auth_headers(token))
     
+    def create_orders_batch(self, token: str, carts: List[List[Dict[str, any]]]) -> Response:
+        """Create several orders in one request (customer only)."""
+        data = {
+            "orders": [{"items": items} for items in carts]
+        }
+        return self.post("/orders:batch", json_data=data, headers=self.auth_headers(token))
+    
+    def list_orders(self, token: str, params: Optional[Dict] = None) -> Response:
+        """List orders, newest first (own orders for customers, all for admins)."""
+        return self.get("/orders", headers=self.auth_headers(token), params=params)
+    
     def get_order(self, token: str, order_id: str) -> Response:
         """Get an order by ID."""
         return self.get(f"/orders/{order_id}", headers=self.auth_headers(token))
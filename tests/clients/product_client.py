@@ -1,5 +1,6 @@
 """Product API client."""
-from typing import Optional, Dict
+import json
+from typing import Optional, Dict, List
 from requests import Response
 from tests.clients.api_client import APIClient
 
@@ -7,9 +8,9 @@ from tests.clients.api_client import APIClient
 class ProductClient(APIClient):
     """Client for product endpoints."""
     
-    def list_products(self) -> Response:
-        """List all active products (no auth required)."""
-        return self.get("/products")
+    def list_products(self, headers: Optional[Dict] = None, params: Optional[Dict] = None) -> Response:
+        """List active products (no auth required); params filter, sort and page."""
+        return self.get("/products", headers=headers, params=params)
     
     def get_product(self, product_id: str) -> Response:
         """Get a specific product by ID (no auth required)."""
@@ -26,4 +27,20 @@ class ProductClient(APIClient):
             "isActive": is_active
         }
         return self.post("/products", json_data=data, headers=self.auth_headers(token))
-    
\ No newline at end of file
+    
+    def update_product(self, token: str, product_id: str, changes: Dict,
+                       if_match: Optional[str] = None) -> Response:
+        """Partially update a product (admin only), optionally conditional on an ETag."""
+        headers = self.auth_headers(token)
+        if if_match:
+            headers["If-Match"] = if_match
+        return self.patch(f"/products/{product_id}", json_data=changes, headers=headers)
+    
+    def bulk_upsert(self, token: str, rows: List[Dict], ndjson: bool = False) -> Response:
+        """Bulk import/upsert products (admin only), as a JSON array or NDJSON."""
+        if not ndjson:
+            return self.post("/products:bulk", json_data=rows, headers=self.auth_headers(token))
+        headers = self.auth_headers(token)
+        headers["Content-Type"] = "application/x-ndjson"
+        body = "\n".join(json.dumps(row) for row in rows).encode("utf-8")
+        return self.post("/products:bulk", data=body, headers=headers)
@@ -1,44 +1,160 @@
 """Pytest configuration and fixtures."""
 import os
+import random
+import shutil
+import sys
+import tempfile
 import pytest
 from tests.clients.auth_client import AuthClient
 from tests.clients.product_client import ProductClient
 from tests.clients.order_client import OrderClient
 from tests.clients.payment_client import PaymentClient
+from tests.clients.api_client import APIClient
+from tests.clients.asgi_transport import ASGI_BASE_URL, ASGISession
+from tests.data.test_data import seed_test_data
 
 
-# Base URL configuration
+# Transport configuration
+# "asgi": clients dispatch into api.main.app in this process (no server needed)
+# "http": clients go over TCP to BASE_URL, which must already be serving the API
+API_TRANSPORT = os.getenv("API_TRANSPORT", "asgi")
 BASE_URL = os.getenv("BASE_URL", "http://127.0.0.1:8000")
 
+if API_TRANSPORT not in ("asgi", "http"):
+    raise pytest.UsageError(f"API_TRANSPORT must be 'asgi' or 'http', not {API_TRANSPORT!r}")
+
+# Parallel runs (pytest -n N, pytest-xdist): every worker is its own process
+# and drives its own app instance, in-process or (http) a uvicorn thread on a
+# free port, so BASE_URL's shared server is only used by serial http runs
+WORKER_ID = os.getenv("PYTEST_XDIST_WORKER", "")  # "gw0", "gw1", ... or "" when serial
+OWN_APP = API_TRANSPORT == "asgi" or bool(WORKER_ID)
+
+# Seed for generated test data. Set before xdist starts its workers, which
+# inherit it; pass TEST_SEED=<value from the report header> to replay a run
+TEST_SEED = os.environ.setdefault("TEST_SEED", str(random.randrange(1_000_000)))
+
+if OWN_APP:
+    # The app is configured by this process: bcrypt's minimum cost keeps the
+    # register/login in nearly every fixture from dominating the run
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    # STORAGE_ENGINE=sqlite or shared runs the suite against a database file
+    # and stock segment of this process's own, so parallel workers never
+    # reset each other's data
+    STATE_DIR = tempfile.mkdtemp(prefix="ecommerce-tests-")
+    os.environ["SQLITE_PATH"] = os.path.join(STATE_DIR, "ecommerce.db")
+    os.environ["SHARED_STOCK_NAME"] = f"ecommerce-tests-{os.getpid()}"
+
+
+def pytest_report_header(config):
+    engine = os.getenv("STORAGE_ENGINE", "memory")
+    return f"transport: {API_TRANSPORT}, storage engine: {engine}, test data seed: TEST_SEED={TEST_SEED}"
+
+
+def pytest_unconfigure(config):
+    if OWN_APP:
+        shutil.rmtree(STATE_DIR, ignore_errors=True)
+        storage = getattr(sys.modules.get("api.storage"), "storage", None)
+        if hasattr(storage, "counters"):
+            storage.counters.unlink()
+
 
 @pytest.fixture(scope="session")
 def base_url():
-    """Base URL for API."""
-    return BASE_URL
+    """Base URL for API: the in-process app, this worker's own server, or BASE_URL."""
+    if API_TRANSPORT == "asgi":
+        yield ASGI_BASE_URL
+    elif WORKER_ID:
+        from tests.load.runner import local_server
+        
+        with local_server() as url:
+            yield url
+    else:
+        yield BASE_URL
+
+
+@pytest.fixture(scope="session")
+def api_session():
+    """Session shared by the clients: the in-process app (with startup run) or None for real HTTP."""
+    if API_TRANSPORT == "http":
+        yield None
+        return
+    from api.main import app
+    
+    with ASGISession(app) as session:
+        yield session
 
 
 @pytest.fixture(scope="session")
-def auth_client(base_url):
+def async_transport(api_session):
+    """httpx transport for AsyncAPIClient sessions: the in-process app, or None for real HTTP."""
+    if api_session is None:
+        return None
+    import httpx
+    
+    return httpx.ASGITransport(app=api_session.app)
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(request, base_url, api_session):
+    """
+    Before every test: reseed the test data from TEST_SEED and the test id
+    and, when this process runs the app, reset its storage to just the
+    sample products, so results do not depend on which worker ran which
+    tests in what order.
+    """
+    seed_test_data(f"{TEST_SEED}:{request.node.nodeid}")
+    if OWN_APP:
+        reset_app_state()
+
+
+def reset_app_state():
+    """
+    Empty the storage of the app in this process (any engine, through
+    Storage.reset()) and the caches and limiters built on top of it, then
+    seed the sample products again.
+    """
+    from api.main import storage, seed_sample_products
+    from api.auth import token_cache
+    from api.catalog_cache import catalog_cache
+    from api.idempotency import payment_idempotency
+    from api.rate_limit import login_limiter
+    
+    storage.reset()
+    catalog_cache.invalidate()
+    token_cache.clear()
+    payment_idempotency.clear()
+    login_limiter.clear()
+    seed_sample_products()
+
+
+@pytest.fixture(scope="session")
+def api_client(base_url, api_session):
+    """Plain API client, for endpoints without a domain client."""
+    return APIClient(base_url, session=api_session)
+
+
+@pytest.fixture(scope="session")
+def auth_client(base_url, api_session):
     """Auth API client."""
-    return AuthClient(base_url)
+    return AuthClient(base_url, session=api_session)
 
 
 @pytest.fixture(scope="session")
-def product_client(base_url):
+def product_client(base_url, api_session):
     """Product API client."""
-    return ProductClient(base_url)
+    return ProductClient(base_url, session=api_session)
 
 
 @pytest.fixture(scope="session")
-def order_client(base_url):
+def order_client(base_url, api_session):
     """Order API client."""
-    return OrderClient(base_url)
+    return OrderClient(base_url, session=api_session)
 
 
 @pytest.fixture(scope="session")
-def payment_client(base_url):
+def payment_client(base_url, api_session):
     """Payment API client."""
-    return PaymentClient(base_url)
+    return PaymentClient(base_url, session=api_session)
 
 
 @pytest.fixture(scope="function")
@@ -79,7 +195,7 @@ def customer_token(auth_client, test_customer_user):
 def test_admin_user(auth_client):
     """Create a test admin user and return credentials."""
     from tests.data.test_data import generate_admin_data
-
+    
     user_data = generate_admin_data()
     response = auth_client.register(
         email=user_data["email"],
@@ -87,7 +203,7 @@ def test_admin_user(auth_client):
         role=user_data["role"],
     )
     assert response.status_code == 201, response.text
-
+    
     return {
         "email": user_data["email"],
         "password": user_data["password"],
@@ -1,13 +1,30 @@
 """Test data generators and constants."""
+import base64
+import json
 import math 
-import uuid
+import random
 from typing import List, Dict
 
 
+# Random source for generated data; tests/conftest.py reseeds it before every
+# test from TEST_SEED and the test id, so a run can be replayed exactly
+_rng = random.Random()
+
+
+def seed_test_data(seed: str) -> None:
+    """Restart the generators' random stream: the same seed yields the same data."""
+    _rng.seed(seed)
+
+
+def unique_token(length: int = 8) -> str:
+    """Random hex string for unique emails, names and keys."""
+    return f"{_rng.getrandbits(length * 4):0{length}x}"
+
+
 # User data
 def generate_test_email() -> str:
     """Generate unique test email."""
-    return f"test_{uuid.uuid4().hex[:8]}@example.com"
+    return f"test_{unique_token()}@example.com"
 
 
 def generate_customer_data() -> Dict[str, str]:
@@ -32,7 +49,7 @@ def generate_admin_data() -> Dict[str, str]:
 def generate_product_data(name: str = None, price: float = 100.0, stock: int = 10) -> Dict:
     """Generate product creation data."""
     if name is None:
-        name = f"Product_{uuid.uuid4().hex[:8]}"
+        name = f"Product_{unique_token()}"
     
     return {
         "name": name,
@@ -56,6 +73,13 @@ def create_order_items(product_id: str, qty: int = 1) -> List[Dict]:
     """Create order items list."""
     return [create_order_item(product_id, qty)]
 
+
+# Listing cursors
+def forge_cursor(kind: str, key: list) -> str:
+    """Build an X-Next-Cursor value by hand (the API's own encoding), e.g. with a malformed key."""
+    raw = json.dumps([kind, key]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
     
 # Payment data
 PAYMENT_METHOD_CARD = "CARD"
@@ -0,0 +1 @@
+# Load-test package: the domain clients driven by concurrent virtual users
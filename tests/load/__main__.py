@@ -0,0 +1,54 @@
+"""
+Load-test mode: drive the API with concurrent virtual users built on the test clients.
+
+Runs weighted scenarios (SMK-01 `purchase`, `browse`) and reports
+throughput, p50/p95/p99 latency per endpoint and error-code breakdowns.
+
+Usage:
+    python -m tests.load --in-process --users 20 --duration 30
+    python -m tests.load --base-url http://127.0.0.1:8000 --weights purchase=1,browse=4
+"""
+import argparse
+import contextlib
+import os
+
+from tests.clients.auth_client import AuthClient
+from tests.clients.product_client import ProductClient
+from tests.load.runner import local_server, run_load
+from tests.load.scenarios import seed_catalog
+
+
+def parse_weights(text: str):
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default=os.getenv("BASE_URL", "http://127.0.0.1:8000"))
+    target.add_argument("--in-process", action="store_true", help="serve api.main:app from a thread in this process")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--iterations", type=int, default=None, help="scenarios per user (default: until --duration)")
+    parser.add_argument("--ramp-up", type=float, default=0, help="seconds over which users start")
+    parser.add_argument("--weights", type=parse_weights, default={"purchase": 1.0}, help="e.g. purchase=1,browse=4")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for scenario and product choice")
+    parser.add_argument("--seed-products", type=int, default=50, help="products to bulk-load first (0 = skip)")
+    parser.add_argument("--stock", type=int, default=1_000_000, help="stock per seeded product")
+    args = parser.parse_args()
+    
+    server = local_server() if args.in_process else contextlib.nullcontext(args.base_url)
+    with server as base_url:
+        if args.seed_products:
+            seed_catalog(AuthClient(base_url), ProductClient(base_url), args.seed_products, args.stock)
+        report = run_load(base_url, args.users, args.weights, args.duration, args.iterations,
+                          args.ramp_up, args.seed)
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Concurrent virtual users over the domain clients, with per-endpoint latency and error-code reporting."""
+import contextlib
+import random
+import re
+import socket
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import httpx
+import requests
+
+from tests.clients.auth_client import AuthClient
+from tests.clients.product_client import ProductClient
+from tests.clients.order_client import OrderClient
+from tests.clients.payment_client import PaymentClient
+from tests.load.scenarios import SCENARIOS, ScenarioFailed, error_code
+
+
+_ID_SEGMENT = re.compile(r"/[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+
+def endpoint_name(method: str, endpoint: str) -> str:
+    """Label like `GET /orders/{id}`, so requests for different ids aggregate."""
+    return f"{method} {_ID_SEGMENT.sub('/{id}', endpoint.split('?', 1)[0])}"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Recorder:
+    """Client observer collecting latencies and error codes per endpoint for one virtual user."""
+    
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Counter = Counter()  # (endpoint, error code) -> count
+    
+    def __call__(self, method: str, endpoint: str, response, seconds: float):
+        name = endpoint_name(method, endpoint)
+        self.latencies.setdefault(name, []).append(seconds)
+        if response.status_code >= 400:
+            self.errors[(name, error_code(response))] += 1
+
+
+class VirtualUser:
+    """
+    One simulated user: its own clients (and so its own connection pool,
+    unless a shared `session` such as an in-process ASGISession is given)
+    and random stream, running weighted scenarios back to back.
+    Everything it records is private to it and merged after the run.
+    """
+    
+    def __init__(self, index: int, base_url: str, seed: int = 0, session=None):
+        self.index = index
+        self.rng = random.Random(seed * 1_000_003 + index)
+        self.auth = AuthClient(base_url, session=session)
+        self.products = ProductClient(base_url, session=session)
+        self.orders = OrderClient(base_url, session=session)
+        self.payments = PaymentClient(base_url, session=session)
+        self.recorder = Recorder()
+        for client in (self.auth, self.products, self.orders, self.payments):
+            client.observers.append(self.recorder)
+        self.completed: Counter = Counter()  # scenario -> count
+        self.failed: Counter = Counter()  # (scenario, code) -> count
+    
+    def run(self, weights: Dict[str, float], deadline: float, iterations: Optional[int] = None):
+        names, shares = list(weights), list(weights.values())
+        done = 0
+        while time.perf_counter() < deadline and (iterations is None or done < iterations):
+            name = self.rng.choices(names, shares)[0]
+            try:
+                SCENARIOS[name](self)
+                self.completed[name] += 1
+            except ScenarioFailed as exc:
+                self.failed[(name, exc.code)] += 1
+            except (requests.RequestException, httpx.HTTPError) as exc:
+                self.failed[(name, type(exc).__name__)] += 1
+            except AssertionError:
+                # pick_valid_product_and_qty found nothing purchasable
+                self.failed[(name, "NO_VALID_PRODUCT")] += 1
+            done += 1
+
+
+class LoadReport:
+    """Merged results of a run."""
+    
+    def __init__(self, users: List[VirtualUser], elapsed: float):
+        self.users = len(users)
+        self.elapsed = elapsed
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Counter = Counter()
+        self.completed: Counter = Counter()
+        self.failed: Counter = Counter()
+        for user in users:
+            for name, samples in user.recorder.latencies.items():
+                self.latencies.setdefault(name, []).extend(samples)
+            self.errors.update(user.recorder.errors)
+            self.completed.update(user.completed)
+            self.failed.update(user.failed)
+    
+    @property
+    def requests(self) -> int:
+        return sum(len(samples) for samples in self.latencies.values())
+    
+    def endpoint_stats(self) -> List[Tuple[str, int, int, float, float, float]]:
+        """(endpoint, count, errors, p50 ms, p95 ms, p99 ms), busiest endpoint first."""
+        errors_by_endpoint: Counter = Counter()
+        for (name, _), count in self.errors.items():
+            errors_by_endpoint[name] += count
+        rows = [
+            (name, len(samples), errors_by_endpoint[name],
+             percentile(samples, 50) * 1000, percentile(samples, 95) * 1000, percentile(samples, 99) * 1000)
+            for name, samples in self.latencies.items()
+        ]
+        return sorted(rows, key=lambda row: -row[1])
+    
+    def format(self) -> str:
+        scenarios = sum(self.completed.values()) + sum(self.failed.values())
+        lines = [
+            f"{self.users} users, {self.elapsed:.1f} s: {self.requests / self.elapsed:,.1f} req/s, "
+            f"{scenarios / self.elapsed:,.2f} scenarios/s",
+            "",
+            f"{'scenario':<12}{'ok':>8}{'failed':>8}",
+        ]
+        for name in sorted(set(self.completed) | {scenario for scenario, _ in self.failed}):
+            failed = sum(count for (scenario, _), count in self.failed.items() if scenario == name)
+            lines.append(f"{name:<12}{self.completed[name]:>8}{failed:>8}")
+        lines += ["", f"{'endpoint':<28}{'count':>8}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"]
+        for name, count, errors, p50, p95, p99 in self.endpoint_stats():
+            lines.append(f"{name:<28}{count:>8}{errors:>8}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}")
+        if self.errors:
+            lines += ["", "errors by endpoint (error.code):"]
+            for (name, code), count in self.errors.most_common():
+                lines.append(f"  {name:<26}{code:<24}{count:>6}")
+        if self.failed:
+            lines += ["", "failed scenarios:"]
+            for (scenario, code), count in self.failed.most_common():
+                lines.append(f"  {scenario:<26}{code:<24}{count:>6}")
+        return "\n".join(lines)
+
+
+def run_load(base_url: str, users: int, weights: Dict[str, float], duration: float = 30.0,
+             iterations: Optional[int] = None, ramp_up: float = 0.0, seed: int = 0, session=None) -> LoadReport:
+    """
+    Run `users` virtual users in threads until `duration` seconds have
+    passed (or each has run `iterations` scenarios). With `ramp_up`, user
+    starts are spread evenly over that many seconds. `session` is handed
+    to every user's clients (see VirtualUser).
+    """
+    unknown = set(weights) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    pool = [VirtualUser(i, base_url, seed, session) for i in range(users)]
+    start = time.perf_counter()
+    deadline = start + duration
+    
+    def start_user(user: VirtualUser):
+        delay = ramp_up * user.index / users
+        if delay:
+            time.sleep(delay)
+        user.run(weights, deadline, iterations)
+    
+    threads = [threading.Thread(target=start_user, args=(user,), name=f"vu-{user.index}") for user in pool]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return LoadReport(pool, time.perf_counter() - start)
+
+
+@contextlib.contextmanager
+def local_server(app: str = "api.main:app") -> Iterator[str]:
+    """Serve the API from a uvicorn thread in this process on a free port; yields its base URL."""
+    import uvicorn  # only needed for in-process runs
+    
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn failed to start")
+        time.sleep(0.05)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
@@ -0,0 +1,80 @@
+"""Load-test scenarios built from the domain clients; each runs one iteration for a virtual user."""
+import uuid
+from typing import Callable, Dict
+
+from tests.data.test_data import generate_customer_data, generate_admin_data, create_order_items, \
+    pick_valid_product_and_qty
+
+
+class ScenarioFailed(Exception):
+    """A step returned an unexpected status; `code` is the API error code (or HTTP_<status>)."""
+    
+    def __init__(self, step: str, code: str):
+        super().__init__(f"{step}: {code}")
+        self.step = step
+        self.code = code
+
+
+def error_code(response) -> str:
+    """The `error.code` of an error envelope, or HTTP_<status> when there is none."""
+    try:
+        return response.json()["error"]["code"]
+    except (ValueError, KeyError, TypeError):
+        return f"HTTP_{response.status_code}"
+
+
+def expect(response, status: int, step: str):
+    if response.status_code != status:
+        raise ScenarioFailed(step, error_code(response))
+    return response.json()
+
+
+def purchase_flow(user) -> None:
+    """
+    SMK-01 as a load scenario: register -> login -> list products ->
+    create order -> create payment -> verify order PAID.
+    The product is picked from a per-user shuffled catalog so virtual users
+    spread over the seeded products instead of all draining the first one.
+    """
+    customer = generate_customer_data()
+    expect(user.auth.register(customer["email"], customer["password"], role="customer"), 201, "register")
+    token = expect(user.auth.login(customer["email"], customer["password"]), 200, "login")["accessToken"]
+    
+    products = expect(user.products.list_products(), 200, "list_products")
+    user.rng.shuffle(products)
+    product_id, qty = pick_valid_product_and_qty(products)
+    
+    order = expect(user.orders.create_order(token, create_order_items(product_id, qty)), 201, "create_order")
+    payment = expect(user.payments.create_payment(token, order["id"], method="CARD"), 201, "create_payment")
+    if payment["status"] != "CAPTURED":
+        raise ScenarioFailed("create_payment", f"PAYMENT_{payment['status']}")
+    
+    order = expect(user.orders.get_order(token, order["id"]), 200, "get_order")
+    if order["status"] != "PAID":
+        raise ScenarioFailed("get_order", f"ORDER_{order['status']}")
+
+
+def browse(user) -> None:
+    """Anonymous catalog browsing: list products, then open one of them."""
+    products = expect(user.products.list_products(), 200, "list_products")
+    if products:
+        expect(user.products.get_product(user.rng.choice(products)["id"]), 200, "get_product")
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "purchase": purchase_flow,
+    "browse": browse,
+}
+
+
+def seed_catalog(auth_client, product_client, count: int, stock: int) -> int:
+    """Register an admin and bulk-load `count` purchasable products. Returns how many were created."""
+    admin = generate_admin_data()
+    expect(auth_client.register(admin["email"], admin["password"], role="admin"), 201, "register admin")
+    token = expect(auth_client.login(admin["email"], admin["password"]), 200, "login admin")["accessToken"]
+    run = uuid.uuid4().hex[:6]
+    rows = [
+        {"name": f"Load {run} {i}", "price": 50.0 + (i % 50) * 10, "currency": "TRY", "stock": stock, "isActive": True}
+        for i in range(count)
+    ]
+    return expect(product_client.bulk_upsert(token, rows, ndjson=True), 200, "bulk_upsert")["created"]
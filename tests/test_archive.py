@@ -0,0 +1,203 @@
+"""
+ARC-01..06: cold tier for finalized orders (api.archive)
+"""
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from api.archive import ColdStore, OrderArchiver
+from api.models import OrderStatus, PaymentMethod, PaymentStatus
+from api.persistence import StoragePersistence
+from api.records import OrderRecord, OrderLine, PaymentRecord, ProductRecord
+from api.storage import create_storage
+
+NOW = datetime(2026, 3, 1, 12, 0, 0)
+
+
+def make_order(user_id: str, status: OrderStatus, minutes_ago: float) -> OrderRecord:
+    return OrderRecord(str(uuid.uuid4()), user_id, (OrderLine("product-1", 2),), 120.0, "TRY", status,
+                       NOW - timedelta(minutes=minutes_ago))
+
+
+def make_payment(order: OrderRecord) -> PaymentRecord:
+    return PaymentRecord(str(uuid.uuid4()), order.id, order.totalAmount, order.currency, PaymentMethod.CARD,
+                         PaymentStatus.CAPTURED, f"PROV-{order.id[:8]}", order.createdAt + timedelta(seconds=30))
+
+
+def fields(record) -> tuple:
+    return tuple(getattr(record, slot) for slot in record.__slots__)
+
+
+@pytest.fixture(params=["memory", "sharded"])
+def store(request):
+    return create_storage(request.param)
+
+
+def add_orders(store, user_id: str, statuses, first_minutes_ago: float = 120):
+    """One order per status, a minute apart and oldest first; PAID ones get their payment."""
+    orders, payments = [], {}
+    for n, status in enumerate(statuses):
+        order = store.add_order(make_order(user_id, status, first_minutes_ago - n))
+        orders.append(order)
+        if status == OrderStatus.PAID:
+            payments[order.id] = store.add_payment(make_payment(order))
+    return orders, payments
+
+
+def test_arc_01_compaction_moves_old_finalized_orders(store):
+    """
+    Test ID: ARC-01
+    Type: Archive
+    Scenario: Old PAID/CANCELLED/CREATED orders plus recent PAID ones; compact with a 1 hour threshold
+    Expected: Only the old finalized orders (and their payments) leave memory; a second run moves nothing
+    """
+    old, old_payments = add_orders(store, "u1", [OrderStatus.PAID, OrderStatus.CANCELLED, OrderStatus.CREATED,
+                                                 OrderStatus.PAID, OrderStatus.CANCELLED])
+    recent, _ = add_orders(store, "u1", [OrderStatus.PAID, OrderStatus.CANCELLED], first_minutes_ago=10)
+    archiver = OrderArchiver(store, after_seconds=3600, block_size=2)
+    
+    run = archiver.compact(NOW)
+    assert (run["orders"], run["payments"]) == (4, 2)
+    assert sorted(store.orders) == sorted([old[2].id] + [order.id for order in recent])
+    assert not set(old_payments) & set(store.payment_by_order)
+    stats = archiver.stats()
+    assert (stats["hot_orders"], stats["cold_orders"], stats["cold_payments"], stats["blocks"]) == (3, 4, 2, 2)
+    assert stats["compression_ratio"] > 1
+    
+    assert archiver.compact(NOW)["orders"] == 0
+    assert archiver.stats()["cold_orders"] == 4
+
+
+def test_arc_02_reads_fall_back_to_the_cold_tier(store):
+    """
+    Test ID: ARC-02
+    Type: Archive
+    Scenario: Archive paid and cancelled orders, then read them back by id
+    Expected: get_order, get_payment and get_payment_by_order return copies equal to what was stored
+    """
+    orders, payments = add_orders(store, "u2", [OrderStatus.PAID, OrderStatus.CANCELLED, OrderStatus.PAID])
+    OrderArchiver(store, after_seconds=60, block_size=2).compact(NOW)
+    assert store.orders == {}
+    
+    for order in orders:
+        archived = store.get_order(order.id)
+        assert archived is not order and fields(archived) == fields(order)
+    for order_id, payment in payments.items():
+        assert fields(store.get_payment(payment.id)) == fields(payment)
+        assert fields(store.get_payment_by_order(order_id)) == fields(payment)
+    assert store.get_payment_by_order(orders[1].id) is None
+    assert store.get_order("no-such-order") is None and store.get_payment("no-such-payment") is None
+
+
+def test_arc_03_decoded_blocks_are_cached_lru(store):
+    """
+    Test ID: ARC-03
+    Type: Archive
+    Scenario: Archive 8 orders into 4 blocks with a 2-block cache, then read orders from different blocks
+    Expected: Re-reading a cached block reuses its decoded form; the least recently read block is evicted
+    """
+    orders, _ = add_orders(store, "u3", [OrderStatus.CANCELLED] * 8)
+    archiver = OrderArchiver(store, after_seconds=60, block_size=2)
+    archiver.cold = ColdStore(cache_blocks=2)
+    archiver.compact(NOW)
+    cold = archiver.cold
+    assert cold.block_count == 4
+    
+    store.get_order(orders[0].id)
+    first_block = cold._cache[0]
+    store.get_order(orders[1].id)  # same block
+    assert list(cold._cache) == [0] and cold._cache[0] is first_block
+    store.get_order(orders[2].id)
+    store.get_order(orders[0].id)  # block 0 becomes most recent
+    store.get_order(orders[4].id)  # evicts block 1, the least recent
+    assert list(cold._cache) == [0, 2]
+    assert cold._cache[0] is first_block
+    
+    uncached = ColdStore(cache_blocks=0)
+    uncached.add(list(cold.rows()), block_size=2)
+    assert fields(uncached.get_order(orders[5].id)) == fields(orders[5])
+    assert len(uncached._cache) == 0
+
+
+def test_arc_04_listings_merge_archived_and_in_memory_orders(store):
+    """
+    Test ID: ARC-04
+    Type: Archive
+    Scenario: Two users with orders spread over the cold and hot tiers; page through query_orders
+    Expected: Every order appears exactly once, newest first (or oldest first), per user or overall,
+              and the status filter applies to archived orders too
+    """
+    statuses = [OrderStatus.PAID, OrderStatus.CANCELLED, OrderStatus.CREATED, OrderStatus.PAID] * 3
+    mine, _ = add_orders(store, "u4", statuses)
+    theirs, _ = add_orders(store, "u5", statuses, first_minutes_ago=90)
+    archiver = OrderArchiver(store, after_seconds=60, block_size=3)
+    archiver.compact(NOW - timedelta(minutes=100))  # u4's finalized orders go cold, u5's stay in memory
+    assert 0 < archiver.stats()["cold_orders"] < len(mine)
+    archiver.compact(NOW - timedelta(minutes=70))
+    
+    def all_pages(**filters):
+        seen, after = [], None
+        while True:
+            page, after = store.query_orders(after=after, limit=4, **filters)
+            seen += [order.id for order in page]
+            if after is None:
+                return seen
+    
+    def newest_first(orders):
+        return [order.id for order in sorted(orders, key=lambda o: o.createdAt, reverse=True)]
+    
+    assert all_pages(user_id="u4") == newest_first(mine)
+    assert all_pages() == newest_first(mine + theirs)
+    assert all_pages(newest_first=False) == newest_first(mine + theirs)[::-1]
+    assert all_pages(user_id="u5", status=OrderStatus.PAID) == newest_first(
+        [order for order in theirs if order.status == OrderStatus.PAID])
+    assert all_pages(user_id="nobody") == []
+
+
+def test_arc_05_paid_order_waits_for_its_payment(store):
+    """
+    Test ID: ARC-05
+    Type: Archive
+    Scenario: An old order is already PAID but its payment has not been added yet; compact, add it, compact
+    Expected: The first run leaves the order in memory; once the payment is recorded both are archived together
+    """
+    order = store.add_order(make_order("u6", OrderStatus.CREATED, 120))
+    order.status = OrderStatus.PAID
+    store.update_order(order.id, order)
+    archiver = OrderArchiver(store, after_seconds=60)
+    
+    assert archiver.compact(NOW)["orders"] == 0
+    assert order.id in store.orders
+    
+    payment = store.add_payment(make_payment(order))
+    assert (archiver.compact(NOW)["orders"], archiver.last_run["payments"]) == (1, 1)
+    assert fields(store.get_payment_by_order(order.id)) == fields(payment)
+
+
+def test_arc_06_cancellation_is_logged_before_the_archiver_can_see_it(store, tmp_path):
+    """
+    Test ID: ARC-06
+    Type: Archive
+    Scenario: With persistence on, cancel an old order through transition_order, archive it, then restart
+    Expected: The record read before the cancel is left untouched, the archived order is CANCELLED, and after
+              the restart it is still CANCELLED with its stock given back once, so it cannot be cancelled again
+    """
+    persistence = StoragePersistence(store, str(tmp_path), fsync_ms=60_000, snapshot_every=10**9)
+    persistence.open()
+    product = store.add_product(ProductRecord(str(uuid.uuid4()), "Lamp", 60.0, "TRY", 10, True))
+    assert store.reserve_many([(product.id, 2)]) is None
+    order = store.add_order(OrderRecord(str(uuid.uuid4()), "u7", (OrderLine(product.id, 2),), 120.0, "TRY",
+                                        OrderStatus.CREATED, NOW - timedelta(minutes=120)))
+    
+    assert store.transition_order(order.id, OrderStatus.CREATED, OrderStatus.CANCELLED) is not None
+    store.release_many(order.items)
+    assert order.status == OrderStatus.CREATED
+    assert OrderArchiver(store, after_seconds=60).compact(NOW)["orders"] == 1
+    assert store.get_order(order.id).status == OrderStatus.CANCELLED
+    persistence.close()
+    
+    restored = StoragePersistence(type(store)(), str(tmp_path), fsync_ms=60_000, snapshot_every=10**9)
+    restored.open()
+    assert restored.store.get_order(order.id).status == OrderStatus.CANCELLED
+    assert restored.store.get_product(product.id).stock == 10
+    assert restored.store.transition_order(order.id, OrderStatus.CREATED, OrderStatus.CANCELLED) is None
+    restored.close()
@@ -0,0 +1,69 @@
+"""
+ASYNC-01..02: domain clients on the async (httpx) transport
+"""
+import asyncio
+import pytest
+from tests.clients.async_api_client import AsyncAPIClient, async_variant, create_async_session
+from tests.clients.auth_client import AuthClient
+from tests.clients.product_client import ProductClient
+from tests.clients.order_client import OrderClient
+from tests.clients.payment_client import PaymentClient
+from tests.assertions.response_assertions import assert_status_code, assert_field_value
+from tests.data.test_data import generate_customer_data, create_order_items, pick_valid_product_and_qty
+
+
+@pytest.mark.smoke
+def test_async_01_purchase_flow_on_async_transport(base_url, async_transport):
+    """
+    Test ID: ASYNC-01
+    Type: E2E
+    Scenario: SMK-01 purchase flow through the domain clients on AsyncAPIClient
+    Expected: Same responses as the sync transport; order ends up PAID
+    """
+    async def flow():
+        async with create_async_session(async_transport) as session:
+            auth = async_variant(AuthClient)(base_url, session=session)
+            products = async_variant(ProductClient)(base_url, session=session)
+            orders = async_variant(OrderClient)(base_url, session=session)
+            payments = async_variant(PaymentClient)(base_url, session=session)
+            assert isinstance(orders, AsyncAPIClient)
+            
+            customer = generate_customer_data()
+            assert_status_code(await auth.register(customer["email"], customer["password"]), 201)
+            login = await auth.login(customer["email"], customer["password"])
+            assert_status_code(login, 200)
+            token = login.json()["accessToken"]
+            
+            catalog = await products.list_products()
+            assert_status_code(catalog, 200)
+            product_id, qty = pick_valid_product_and_qty(catalog.json())
+            order = await orders.create_order(token, create_order_items(product_id, qty))
+            assert_status_code(order, 201)
+            payment = await payments.create_payment(token, order.json()["id"])
+            assert_status_code(payment, 201)
+            
+            check = await orders.get_order(token, order.json()["id"])
+            assert_status_code(check, 200)
+            assert_field_value(check.json(), "status", "PAID")
+    
+    asyncio.run(flow())
+
+
+@pytest.mark.products
+def test_async_02_concurrent_requests_share_one_pool(base_url, async_transport):
+    """
+    Test ID: ASYNC-02
+    Type: Concurrency
+    Scenario: 200 concurrent product reads in flight over one connection pool
+    Expected: All succeed and return the same product
+    """
+    async def burst():
+        session = create_async_session(async_transport)
+        async with async_variant(ProductClient)(base_url, session=session) as products:
+            catalog = await products.list_products()
+            product_id = catalog.json()[0]["id"]
+            responses = await asyncio.gather(*(products.get_product(product_id) for _ in range(200)))
+        assert all(r.status_code == 200 for r in responses)
+        assert {r.json()["id"] for r in responses} == {product_id}
+    
+    asyncio.run(burst())
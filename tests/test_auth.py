@@ -1,4 +1,10 @@
+import asyncio
+import threading
+import time
 import pytest
+from tests.conftest import OWN_APP
+from tests.clients.async_api_client import async_variant, create_async_session
+from tests.clients.auth_client import AuthClient
 from tests.assertions.response_assertions import assert_status_code
 from tests.assertions.schema_validator import (
     validate_user_public_schema,
@@ -47,3 +53,80 @@ def test_auth_05_login_wrong_password_returns_401(auth_client, test_customer_use
     body = r.json()
     validate_error_response_schema(body)
     assert body["error"]["code"] == "UNAUTHORIZED"
+
+@pytest.mark.auth
+def test_auth_06_invalid_token_returns_401(order_client):
+    r = order_client.get_order("not-a-valid-jwt", "any-order-id")
+    assert_status_code(r, 401)
+    body = r.json()
+    validate_error_response_schema(body)
+    assert body["error"]["code"] == "UNAUTHORIZED"
+
+@pytest.mark.auth
+def test_auth_07_repeated_bad_passwords_return_429(auth_client, test_customer_user):
+    email = test_customer_user["email"]
+    for _ in range(5):
+        assert_status_code(auth_client.login(email=email, password="wrong-password"), 401)
+
+    # Further attempts are rejected before the password is even checked
+    r = auth_client.login(email=email, password=test_customer_user["password"])
+    assert_status_code(r, 429)
+    body = r.json()
+    validate_error_response_schema(body)
+    assert body["error"]["code"] == "TOO_MANY_REQUESTS"
+    assert int(r.headers["Retry-After"]) > 0
+
+@pytest.mark.auth
+@pytest.mark.skipif(not OWN_APP, reason="slows down bcrypt inside the app, so the app must run in this process")
+def test_auth_08_password_hashing_runs_off_the_event_loop(base_url, async_transport, monkeypatch):
+    import api.auth
+
+    lock, running, peak = threading.Lock(), [0], [0]
+    real_hash_password = api.auth.hash_password
+
+    def slow_hash_password(password):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.2)
+        with lock:
+            running[0] -= 1
+        return real_hash_password(password)
+
+    monkeypatch.setattr(api.auth, "hash_password", slow_hash_password)
+
+    async def flow():
+        async with create_async_session(async_transport) as session:
+            auth = async_variant(AuthClient)(base_url, session=session)
+            registrations = [
+                asyncio.ensure_future(auth.register(data["email"], data["password"]))
+                for data in (generate_customer_data() for _ in range(api.auth.PASSWORD_HASH_WORKERS + 2))
+            ]
+            await asyncio.sleep(0.05)
+
+            # Hashes are in flight, yet the loop still serves other requests right away
+            started = time.perf_counter()
+            health = await session.get(f"{base_url}/health")
+            assert_status_code(health, 200)
+            assert time.perf_counter() - started < 0.15
+            assert not all(task.done() for task in registrations)
+
+            for response in await asyncio.gather(*registrations):
+                assert_status_code(response, 201)
+
+    asyncio.run(flow())
+    # Never more bcrypt calls at once than the pool allows
+    assert peak[0] == api.auth.PASSWORD_HASH_WORKERS
+
+@pytest.mark.auth
+def test_auth_09_concurrent_bad_passwords_cannot_outrun_the_limiter(base_url, async_transport, test_customer_user):
+    email = test_customer_user["email"]
+
+    async def storm():
+        async with create_async_session(async_transport) as session:
+            auth = async_variant(AuthClient)(base_url, session=session)
+            return await asyncio.gather(*(auth.login(email=email, password="wrong-password") for _ in range(20)))
+
+    # Every attempt is counted as it arrives, not once its bcrypt check has failed
+    codes = sorted(r.status_code for r in asyncio.run(storm()))
+    assert codes == [401] * 5 + [429] * 15
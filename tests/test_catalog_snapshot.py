@@ -0,0 +1,103 @@
+"""
+SNAP-01..03: memory-mapped catalog snapshots (api.catalog_snapshot)
+"""
+import uuid
+import pytest
+from api.catalog_snapshot import MappedCatalog, LazyProducts, write_catalog_snapshot
+from api.models import Product
+from api.records import ProductRecord
+from api.storage import InMemoryStorage
+
+PRODUCTS = [
+    Product(id=str(uuid.uuid4()), name=name, price=price, currency=currency, stock=stock, isActive=active)
+    for name, price, currency, stock, active in [
+        ("Laptop", 15000.0, "TRY", 10, True),
+        ("Çay Bardağı", 12.5, "TRY", 0, True),      # non-ASCII name, out of stock
+        ("Laptop", 999.99, "EUR", 3, True),          # repeated name shares a string-table entry
+        ("Retired Lamp", 45.0, "TRY", 7, False),
+    ]
+]
+
+
+def fields(product) -> tuple:
+    return (product.id, product.name, product.price, product.currency, product.stock, product.isActive)
+
+
+@pytest.fixture
+def snapshot_path(tmp_path) -> str:
+    path = str(tmp_path / "catalog.bin")
+    assert write_catalog_snapshot(path, PRODUCTS) == len(PRODUCTS)
+    return path
+
+
+def test_snap_01_written_catalog_maps_back_record_for_record(snapshot_path):
+    """
+    Test ID: SNAP-01
+    Type: Catalog snapshot
+    Scenario: Write products to a snapshot, then open it with MappedCatalog
+    Expected: Every id is found and decodes to the product that was written; unknown ids are not found
+    """
+    catalog = MappedCatalog(snapshot_path)
+    assert len(catalog) == len(PRODUCTS)
+    for product in PRODUCTS:
+        slot = catalog.find(product.id)
+        assert slot is not None
+        assert catalog.id_at(slot) == product.id
+        assert fields(catalog.product_at(slot)) == fields(product)
+    assert catalog.find("no-such-product") is None
+    catalog.close()
+
+
+def test_snap_02_lazy_products_equal_the_originals(snapshot_path):
+    """
+    Test ID: SNAP-02
+    Type: Catalog snapshot
+    Scenario: Serve the snapshot as a storage's product map, read it, change it, add to it
+    Expected: Nothing is decoded up front; lookups and listings equal the originals; writes stick
+    """
+    products = LazyProducts(MappedCatalog(snapshot_path))
+    store = InMemoryStorage()
+    store.load_catalog(products)
+    assert products._loaded == {}
+    
+    first = PRODUCTS[0]
+    assert fields(store.get_product(first.id)) == fields(first)
+    assert store.get_product(first.id) is store.get_product(first.id)
+    assert len(products._loaded) == 1
+    
+    assert sorted(products) == sorted(p.id for p in PRODUCTS)
+    assert sorted(fields(p) for p in store.list_products(active_only=False)) == sorted(fields(p) for p in PRODUCTS)
+    page, _ = store.query_products(sort_by="price")
+    assert [p.price for p in page] == sorted(p.price for p in PRODUCTS if p.isActive)
+    
+    assert store.reserve_many([(first.id, 4)]) is None
+    assert store.get_product(first.id).stock == 6
+    added = store.add_product(ProductRecord(str(uuid.uuid4()), "New Desk", 300.0, "TRY", 2, True))
+    assert len(products) == len(PRODUCTS) + 1 and added.id in products
+
+
+@pytest.mark.parametrize("damage", ["bad magic", "other version", "records cut", "strings cut", "empty"])
+def test_snap_03_corrupt_or_truncated_snapshot_is_rejected(snapshot_path, damage):
+    """
+    Test ID: SNAP-03
+    Type: Catalog snapshot
+    Scenario: Open a snapshot whose header was overwritten, or that lost its tail
+    Expected: MappedCatalog raises ValueError instead of serving garbage
+    """
+    with open(snapshot_path, "rb") as f:
+        data = bytearray(f.read())
+    if damage == "bad magic":
+        data[:4] = b"JUNK"
+    elif damage == "other version":
+        data[4] = 1
+    elif damage == "records cut":
+        del data[40:]
+    elif damage == "strings cut":
+        del data[-3:]
+    else:
+        data.clear()
+    with open(snapshot_path, "wb") as f:
+        f.write(data)
+    
+    with pytest.raises(ValueError):
+        MappedCatalog(snapshot_path)
@@ -0,0 +1,27 @@
+"""
+ISO-01: every test starts from freshly seeded storage when the suite runs its own app
+"""
+import pytest
+from tests.conftest import OWN_APP
+from tests.assertions.response_assertions import assert_status_code
+from tests.data.test_data import create_order_items
+
+SAMPLE_STOCK = {"Laptop": 10, "Mouse": 50, "Keyboard": 30, "Monitor": 20}
+
+
+@pytest.mark.orders
+@pytest.mark.skipif(not OWN_APP, reason="storage of an external BASE_URL server is never reset")
+@pytest.mark.parametrize("run", [1, 2])
+def test_iso_01_stock_is_reset_between_tests(run, product_client, order_client, customer_token):
+    """
+    Test ID: ISO-01
+    Type: Isolation
+    Scenario: Each run sees the seeded catalog, then buys 10 Keyboards
+    Expected: Both runs start from the sample products' seeded stock
+    """
+    products = {p["name"]: p for p in product_client.list_products().json()}
+    assert {name: p["stock"] for name, p in products.items()} == SAMPLE_STOCK
+    
+    r = order_client.create_order(customer_token, create_order_items(products["Keyboard"]["id"], qty=10))
+    assert_status_code(r, 201)
+    assert product_client.get_product(products["Keyboard"]["id"]).json()["stock"] == 20
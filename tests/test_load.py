@@ -0,0 +1,24 @@
+"""
+LOAD-01: the load-test runner drives the SMK-01 purchase flow concurrently
+"""
+import pytest
+from tests.load.runner import run_load
+
+
+@pytest.mark.load
+def test_load_01_concurrent_purchase_flow(base_url, api_session):
+    """
+    Test ID: LOAD-01
+    Type: Load (short)
+    Scenario: 3 virtual users each run the SMK-01 purchase flow once
+    Expected: Every scenario succeeds and each endpoint reports latencies
+    """
+    report = run_load(base_url, users=3, weights={"purchase": 1}, duration=120, iterations=1,
+                      session=api_session)
+    
+    assert report.completed["purchase"] == 3, report.format()
+    assert not report.failed, report.format()
+    endpoints = {row[0] for row in report.endpoint_stats()}
+    assert {"POST /auth/register", "POST /auth/login", "GET /products", "POST /orders",
+            "POST /payments", "GET /orders/{id}"} <= endpoints
+    assert report.requests == 3 * 6
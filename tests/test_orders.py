@@ -1,7 +1,8 @@
 import pytest
+from tests.conftest import OWN_APP
 from tests.assertions.response_assertions import assert_status_code
 from tests.assertions.schema_validator import validate_order_schema, validate_error_response_schema
-from tests.data.test_data import create_order_items
+from tests.data.test_data import create_order_item, create_order_items, forge_cursor
 
 def _get_by_name(products, name):
     for p in products:
@@ -137,3 +138,126 @@ def test_ord_cancel_paid_order_returns_409(product_client, order_client, payment
     body = cancel_r.json()
     validate_error_response_schema(body)
     assert body["error"]["code"] == "CONFLICT"
+
+@pytest.mark.orders
+def test_ord_19_multi_item_insufficient_stock_reserves_nothing(product_client, order_client, admin_token, customer_token):
+    """ORD-19: a cart failing on its last line must not reserve stock for earlier lines"""
+    plenty = product_client.create_product(admin_token, name="PlentyStock", price=100.0, stock=5).json()
+    scarce = product_client.create_product(admin_token, name="ScarceStock", price=100.0, stock=1).json()
+
+    items = [create_order_item(plenty["id"], 2), create_order_item(scarce["id"], 2)]
+    r = order_client.create_order(customer_token, items)
+    assert_status_code(r, 409)
+    validate_error_response_schema(r.json())
+
+    assert product_client.get_product(plenty["id"]).json()["stock"] == 5
+    assert product_client.get_product(scarce["id"]).json()["stock"] == 1
+
+@pytest.mark.orders
+def test_ord_20_repeated_product_lines_checked_against_total_qty(product_client, order_client, admin_token, customer_token):
+    """ORD-20: repeated lines for one product are reserved as a whole (3+3 > stock 5 -> 409)"""
+    p = product_client.create_product(admin_token, name="RepeatedLine", price=100.0, stock=5).json()
+
+    items = [create_order_item(p["id"], 3), create_order_item(p["id"], 3)]
+    r = order_client.create_order(customer_token, items)
+    assert_status_code(r, 409)
+    validate_error_response_schema(r.json())
+    assert product_client.get_product(p["id"]).json()["stock"] == 5
+
+@pytest.mark.orders
+def test_ord_21_list_own_orders_paginated(product_client, order_client, customer_token, admin_token, test_customer_user):
+    """ORD-21: GET /orders pages a customer's own orders newest first; admins can filter by user"""
+    products = product_client.list_products().json()
+    mouse = _get_by_name(products, "Mouse")
+    first = order_client.create_order(customer_token, create_order_items(mouse["id"], qty=1)).json()
+    second = order_client.create_order(customer_token, create_order_items(mouse["id"], qty=1)).json()
+
+    page1 = order_client.list_orders(customer_token, params={"limit": 1})
+    assert_status_code(page1, 200)
+    assert [o["id"] for o in page1.json()] == [second["id"]]
+
+    page2 = order_client.list_orders(customer_token, params={"limit": 1, "cursor": page1.headers["X-Next-Cursor"]})
+    assert_status_code(page2, 200)
+    assert [o["id"] for o in page2.json()] == [first["id"]]
+    assert "X-Next-Cursor" not in page2.headers
+
+    user_id = test_customer_user["user_data"]["id"]
+    admin_view = order_client.list_orders(admin_token, params={"userId": user_id})
+    assert_status_code(admin_view, 200)
+    assert [o["id"] for o in admin_view.json()] == [second["id"], first["id"]]
+
+@pytest.mark.orders
+def test_ord_22_list_other_users_orders_forbidden(order_client, customer_token):
+    """ORD-22: customers cannot list another user's orders"""
+    r = order_client.list_orders(customer_token, params={"userId": "someone-else"})
+    assert_status_code(r, 403)
+    body = r.json()
+    validate_error_response_schema(body)
+    assert body["error"]["code"] == "FORBIDDEN"
+
+@pytest.mark.orders
+def test_ord_23_batch_create_orders_independent_results(product_client, order_client, admin_token, customer_token):
+    """ORD-23: POST /orders:batch returns a result per order; failures don't affect the others"""
+    p = product_client.create_product(admin_token, name="BatchProduct", price=100.0, stock=3).json()
+
+    carts = [
+        create_order_items(p["id"], qty=2),        # ok, leaves 1
+        create_order_items(p["id"], qty=2),        # 409: only 1 left
+        create_order_items("does-not-exist", qty=1),  # 404
+        create_order_items(p["id"], qty=1),        # ok, leaves 0
+    ]
+    r = order_client.create_orders_batch(customer_token, carts)
+    assert_status_code(r, 200)
+    results = r.json()["results"]
+    assert [res["status"] for res in results] == [201, 409, 404, 201]
+    assert results[1]["error"]["code"] == "CONFLICT"
+    assert results[2]["error"]["code"] == "NOT_FOUND"
+    validate_order_schema(results[0]["order"])
+
+    fetched = order_client.get_order(customer_token, results[3]["order"]["id"])
+    assert_status_code(fetched, 200)
+    assert product_client.get_product(p["id"]).json()["stock"] == 0
+
+@pytest.mark.orders
+@pytest.mark.parametrize("key", [
+    [1700000000, "x"],                  # createdAt must be an ISO timestamp string
+    ["2026-01-01T00:00:00.000000"],     # missing id
+    [None, None],
+    ["2026-01-01T00:00:00.000000", "x", "extra"],
+])
+def test_ord_24_cursor_with_malformed_key_returns_400(order_client, customer_token, key):
+    """ORD-24: a forged GET /orders cursor is rejected with 400, never a 500"""
+    r = order_client.list_orders(customer_token, params={"limit": 1, "cursor": forge_cursor("orders", key)})
+    assert_status_code(r, 400)
+    validate_error_response_schema(r.json())
+
+    r = order_client.list_orders(customer_token, params={"limit": 1, "cursor": forge_cursor("orders", ["2026-01-01T00:00:00.000000", "x"])})
+    assert_status_code(r, 200)
+
+@pytest.mark.orders
+@pytest.mark.skipif(not OWN_APP, reason="injects a failure into the app, so the app must run in this process")
+def test_ord_25_batch_failing_mid_way_releases_every_reservation(product_client, order_client, admin_token, customer_token, monkeypatch):
+    """ORD-25: an unexpected error in one cart of a batch gives back the stock reserved for the carts before it"""
+    import api.business_logic
+
+    p = product_client.create_product(admin_token, name="BatchRollback", price=100.0, stock=5).json()
+    broken = product_client.create_product(admin_token, name="BatchBroken", price=100.0, stock=5).json()
+    real_price_items = api.business_logic._price_items
+
+    def price_items(items, products):
+        if items[0].productId == broken["id"]:
+            raise RuntimeError("pricing backend unavailable")
+        return real_price_items(items, products)
+
+    monkeypatch.setattr(api.business_logic, "_price_items", price_items)
+    carts = [
+        create_order_items(p["id"], qty=2),
+        create_order_items(broken["id"], qty=1),
+        create_order_items(p["id"], qty=1),
+    ]
+    r = order_client.create_orders_batch(customer_token, carts)
+    assert_status_code(r, 500)
+
+    assert product_client.get_product(p["id"]).json()["stock"] == 5
+    assert product_client.get_product(broken["id"]).json()["stock"] == 5
+    assert order_client.list_orders(customer_token).json() == []
@@ -1,7 +1,7 @@
 import pytest
 from tests.assertions.response_assertions import assert_status_code
 from tests.assertions.schema_validator import validate_payment_schema, validate_order_schema, validate_error_response_schema
-from tests.data.test_data import create_order_items, generate_customer_data, pick_valid_product_and_qty
+from tests.data.test_data import create_order_items, generate_customer_data, pick_valid_product_and_qty, unique_token
 
 @pytest.mark.payments
 def test_pay_02_create_payment_success(auth_client, product_client, order_client, payment_client, customer_token):
@@ -46,3 +46,23 @@ def test_pay_07_payment_for_other_users_order_forbidden(auth_client, product_cli
     body = pay_r.json()
     validate_error_response_schema(body)
     assert body["error"]["code"] == "FORBIDDEN"
+
+@pytest.mark.payments
+def test_pay_08_idempotency_key_replays_first_response(product_client, order_client, payment_client, customer_token):
+    products = product_client.list_products().json()
+    pid, qty = pick_valid_product_and_qty(products)
+    order = order_client.create_order(customer_token, create_order_items(pid, qty=qty)).json()
+    key = f"pay-{unique_token(32)}"
+
+    first = payment_client.create_payment(customer_token, order_id=order["id"], method="CARD", idempotency_key=key)
+    assert_status_code(first, 201)
+    validate_payment_schema(first.json())
+
+    retry = payment_client.create_payment(customer_token, order_id=order["id"], method="CARD", idempotency_key=key)
+    assert_status_code(retry, 201)
+    assert retry.content == first.content
+
+    # Same key, different request body
+    mismatch = payment_client.create_payment(customer_token, order_id=order["id"], method="TRANSFER", idempotency_key=key)
+    assert_status_code(mismatch, 422)
+    validate_error_response_schema(mismatch.json())
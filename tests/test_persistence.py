@@ -0,0 +1,151 @@
+"""
+PERS-01..04: write-ahead log and snapshots of the in-memory storage (api.persistence)
+"""
+import json
+import os
+import uuid
+from datetime import datetime
+from api.models import UserRole, OrderStatus, PaymentMethod, PaymentStatus
+from api.persistence import StoragePersistence, SNAPSHOT_FILE
+from api.records import UserRecord, ProductRecord, OrderRecord, OrderLine, PaymentRecord
+from api.storage import InMemoryStorage
+
+
+def open_persistence(directory) -> StoragePersistence:
+    """Persistence over a fresh storage; the flusher never fires on its own, close() makes writes durable."""
+    persistence = StoragePersistence(InMemoryStorage(), str(directory), fsync_ms=60_000, snapshot_every=10**9)
+    persistence.open()
+    return persistence
+
+
+def write_sample(store: InMemoryStorage) -> str:
+    """A user with a product, a paid order and its payment. Returns the product id."""
+    user = store.add_user(UserRecord(str(uuid.uuid4()), "pers@example.com", "hash", UserRole.CUSTOMER))
+    product = store.add_product(ProductRecord(str(uuid.uuid4()), "Lamp", 120.0, "TRY", 10, True))
+    assert store.reserve_many([(product.id, 3)]) is None
+    order = store.add_order(OrderRecord(str(uuid.uuid4()), user.id, (OrderLine(product.id, 3),), 360.0, "TRY",
+                                        OrderStatus.CREATED, datetime(2026, 1, 2, 3, 4, 5, 678901)))
+    order.status = OrderStatus.PAID
+    store.update_order(order.id, order)
+    store.add_payment(PaymentRecord(str(uuid.uuid4()), order.id, 360.0, "TRY", PaymentMethod.CARD,
+                                    PaymentStatus.CAPTURED, "ref-1", datetime(2026, 1, 2, 3, 5)))
+    return product.id
+
+
+def state(store: InMemoryStorage) -> dict:
+    """Every stored field, for comparing two storages."""
+    def rows(records):
+        return sorted(tuple(getattr(record, slot) for slot in record.__slots__) for record in records)
+    
+    return {
+        "users": rows(store.users.values()),
+        "products": rows(store.products.values()),
+        "orders": rows(store.orders.values()),
+        "payments": rows(store.payments.values()),
+    }
+
+
+def segment_files(directory) -> list:
+    return sorted(name for name in os.listdir(directory) if name.startswith("wal-"))
+
+
+def test_pers_01_restore_loads_the_snapshot_then_replays_the_log(tmp_path):
+    """
+    Test ID: PERS-01
+    Type: Persistence
+    Scenario: Write data, snapshot, keep writing (patch, stock, order), restart
+    Expected: The restored storage equals the one that was shut down, with only post-snapshot records replayed
+    """
+    persistence = open_persistence(tmp_path)
+    store = persistence.store
+    product_id = write_sample(store)
+    persistence.snapshot()
+    
+    store.patch_product(product_id, {"price": 99.5, "name": "Desk Lamp"})
+    store.release_many([(product_id, 1)])
+    store.add_user(UserRecord(str(uuid.uuid4()), "late@example.com", "hash", UserRole.ADMIN))
+    persistence.close()
+    
+    restored = open_persistence(tmp_path)
+    assert state(restored.store) == state(store)
+    assert restored.replayed == 3
+    assert restored.store.get_product(product_id).stock == 8
+    assert restored.store.get_user_by_email("late@example.com").role is UserRole.ADMIN
+    restored.close()
+
+
+def test_pers_02_snapshot_rotates_the_log_and_drops_old_segments(tmp_path):
+    """
+    Test ID: PERS-02
+    Type: Persistence
+    Scenario: Take two snapshots with writes before and between them
+    Expected: Each snapshot switches to a new segment and deletes the ones it covers
+    """
+    persistence = open_persistence(tmp_path)
+    assert segment_files(tmp_path) == ["wal-00000001.log"]
+    
+    product_id = write_sample(persistence.store)
+    persistence.snapshot()
+    assert segment_files(tmp_path) == ["wal-00000002.log"]
+    with open(tmp_path / SNAPSHOT_FILE) as f:
+        assert json.load(f)["segment"] == 2
+    
+    persistence.store.release_many([(product_id, 2)])
+    persistence.snapshot()
+    assert segment_files(tmp_path) == ["wal-00000003.log"]
+    assert persistence.stats()["snapshots"] == 2
+    persistence.close()
+    
+    restored = open_persistence(tmp_path)
+    assert restored.replayed == 0
+    assert restored.store.get_product(product_id).stock == 9
+    # A restart journals into a fresh segment after the newest one on disk
+    assert segment_files(tmp_path) == ["wal-00000003.log", "wal-00000004.log"]
+    restored.close()
+
+
+def test_pers_03_torn_tail_of_the_log_is_ignored(tmp_path):
+    """
+    Test ID: PERS-03
+    Type: Persistence
+    Scenario: The process dies halfway through writing a log record
+    Expected: Every complete record is restored, the partial one is skipped, and journaling resumes
+    """
+    persistence = open_persistence(tmp_path)
+    product_id = write_sample(persistence.store)
+    persistence.store.release_many([(product_id, 1)])
+    persistence.close()
+    with open(tmp_path / "wal-00000001.log", "ab") as f:
+        f.write(b'{"op":"stock","v":{"%s":-' % product_id.encode())
+    
+    restored = open_persistence(tmp_path)
+    assert restored.replayed == 7
+    assert restored.store.get_product(product_id).stock == 8
+    
+    restored.store.release_many([(product_id, 2)])
+    restored.close()
+    reopened = open_persistence(tmp_path)
+    assert reopened.store.get_product(product_id).stock == 10
+    reopened.close()
+
+
+def test_pers_04_log_lines_of_the_model_format_still_replay(tmp_path):
+    """
+    Test ID: PERS-04
+    Type: Persistence
+    Scenario: A segment written with whole API models per line (the original log format)
+    Expected: It replays into the same records as the row format
+    """
+    product_id = str(uuid.uuid4())
+    lines = [
+        {"op": "product", "v": {"id": product_id, "name": "Chair", "price": 45.0, "currency": "TRY",
+                                "stock": 4, "isActive": True}},
+        {"op": "stock", "v": {product_id: -1}},
+    ]
+    with open(tmp_path / "wal-00000001.log", "w") as f:
+        f.write("".join(json.dumps(line) + "\n" for line in lines))
+    
+    restored = open_persistence(tmp_path)
+    product = restored.store.get_product(product_id)
+    assert (product.name, product.price, product.stock, product.isActive) == ("Chair", 45.0, 3, True)
+    restored.close()
@@ -1,6 +1,7 @@
 import pytest
 from tests.assertions.response_assertions import assert_status_code
 from tests.assertions.schema_validator import validate_product_schema, validate_error_response_schema
+from tests.data.test_data import unique_token, create_order_items, forge_cursor
 
 @pytest.mark.products
 def test_prod_01_list_products(product_client):
@@ -38,3 +39,148 @@ def test_prod_03_create_product_admin_only(product_client, customer_token, admin
     r2 = product_client.create_product(admin_token, name="CheapItem", price=10.0, stock=10)
     assert_status_code(r2, 201)
     validate_product_schema(r2.json())
+
+@pytest.mark.products
+def test_prod_05_list_products_etag_not_modified(product_client, admin_token):
+    r1 = product_client.list_products()
+    assert_status_code(r1, 200)
+    etag = r1.headers["ETag"]
+
+    r2 = product_client.list_products(headers={"If-None-Match": etag})
+    assert_status_code(r2, 304)
+    assert r2.headers["ETag"] == etag
+
+    # Any catalog write invalidates the cached listing
+    created = product_client.create_product(admin_token, name="EtagProbe", price=75.0, stock=3)
+    assert_status_code(created, 201)
+    r3 = product_client.list_products(headers={"If-None-Match": etag})
+    assert_status_code(r3, 200)
+    assert r3.headers["ETag"] != etag
+    assert created.json()["id"] in [p["id"] for p in r3.json()]
+
+@pytest.mark.products
+def test_prod_06_paginated_listing_with_filters_and_sort(product_client, admin_token):
+    prefix = f"Page{unique_token()}"
+    for price in (300.0, 100.0, 200.0):
+        r = product_client.create_product(admin_token, name=f"{prefix}-{int(price)}", price=price, stock=1)
+        assert_status_code(r, 201)
+    product_client.create_product(admin_token, name=f"{prefix}-empty", price=150.0, stock=0)
+
+    params = {"namePrefix": prefix, "inStock": "true", "sort": "price", "limit": 2}
+    page1 = product_client.list_products(params=params)
+    assert_status_code(page1, 200)
+    assert [p["price"] for p in page1.json()] == [100.0, 200.0]
+    cursor = page1.headers["X-Next-Cursor"]
+
+    page2 = product_client.list_products(params={**params, "cursor": cursor})
+    assert_status_code(page2, 200)
+    assert [p["price"] for p in page2.json()] == [300.0]
+    assert "X-Next-Cursor" not in page2.headers
+
+    ranged = product_client.list_products(params={"namePrefix": prefix, "minPrice": 150, "maxPrice": 300, "sort": "-price"})
+    assert [p["price"] for p in ranged.json()] == [300.0, 200.0, 150.0]
+
+@pytest.mark.products
+def test_prod_07_invalid_cursor_returns_400(product_client):
+    r = product_client.list_products(params={"limit": 1, "cursor": "not-a-cursor"})
+    assert_status_code(r, 400)
+    validate_error_response_schema(r.json())
+
+@pytest.mark.products
+@pytest.mark.parametrize("ndjson", [False, True])
+def test_prod_08_bulk_upsert_reports_row_errors(product_client, admin_token, ndjson):
+    existing = product_client.create_product(admin_token, name="BulkExisting", price=100.0, stock=1).json()
+    rows = [
+        {"name": "BulkNewA", "price": 10.0, "currency": "TRY", "stock": 5},
+        {"id": existing["id"], "price": 120.0, "stock": 7},          # partial update
+        {"name": "BulkBadPrice", "price": -1, "currency": "TRY", "stock": 1},
+        {"id": "missing-product-id", "price": 1.0},                  # unknown id, not a full product
+    ]
+    r = product_client.bulk_upsert(admin_token, rows, ndjson=ndjson)
+    assert_status_code(r, 200)
+    body = r.json()
+    assert (body["created"], body["updated"], body["failed"]) == (1, 1, 2)
+    assert [e["index"] for e in body["errors"]] == [2, 3]
+    assert body["errors"][0]["error"]["code"] == "VALIDATION_ERROR"
+    assert body["errors"][1]["error"]["code"] == "NOT_FOUND"
+
+    updated = product_client.get_product(existing["id"]).json()
+    assert (updated["price"], updated["stock"], updated["name"]) == (120.0, 7, "BulkExisting")
+
+@pytest.mark.products
+def test_prod_09_bulk_upsert_admin_only(product_client, customer_token):
+    r = product_client.bulk_upsert(customer_token, [{"name": "X", "price": 1.0, "currency": "TRY", "stock": 1}])
+    assert_status_code(r, 403)
+    validate_error_response_schema(r.json())
+
+@pytest.mark.products
+def test_prod_10_patch_product_with_if_match(product_client, admin_token):
+    p = product_client.create_product(admin_token, name="PatchMe", price=100.0, stock=5).json()
+    etag = product_client.get_product(p["id"]).headers["ETag"]
+
+    r1 = product_client.update_product(admin_token, p["id"], {"stock": 8}, if_match=etag)
+    assert_status_code(r1, 200)
+    validate_product_schema(r1.json())
+    assert (r1.json()["stock"], r1.json()["price"], r1.json()["name"]) == (8, 100.0, "PatchMe")
+    assert r1.headers["ETag"] != etag
+
+    # A second writer still holding the old ETag is rejected
+    r2 = product_client.update_product(admin_token, p["id"], {"stock": 2}, if_match=etag)
+    assert_status_code(r2, 412)
+    validate_error_response_schema(r2.json())
+    assert r2.json()["error"]["code"] == "PRECONDITION_FAILED"
+    assert product_client.get_product(p["id"]).json()["stock"] == 8
+
+@pytest.mark.products
+def test_prod_11_patch_product_admin_only_and_missing(product_client, customer_token, admin_token):
+    p = product_client.create_product(admin_token, name="PatchGuard", price=100.0, stock=5).json()
+    assert_status_code(product_client.update_product(customer_token, p["id"], {"price": 1.0}), 403)
+    assert_status_code(product_client.update_product(admin_token, "does-not-exist", {"price": 1.0}), 404)
+    assert_status_code(product_client.update_product(admin_token, p["id"], {"price": -1}), 422)
+
+@pytest.mark.products
+def test_prod_12_cached_listing_follows_patches_and_stock_changes(product_client, order_client, admin_token, customer_token):
+    p = product_client.create_product(admin_token, name="CacheProbe", price=60.0, stock=5).json()
+
+    def listed_after(write):
+        etag = product_client.list_products().headers["ETag"]
+        assert_status_code(product_client.list_products(headers={"If-None-Match": etag}), 304)
+        write()
+        r = product_client.list_products(headers={"If-None-Match": etag})
+        assert_status_code(r, 200)
+        assert r.headers["ETag"] != etag
+        return next(item for item in r.json() if item["id"] == p["id"])
+
+    patched = listed_after(lambda: product_client.update_product(admin_token, p["id"], {"price": 70.0}))
+    assert patched["price"] == 70.0
+
+    orders = []
+    ordered = listed_after(lambda: orders.append(order_client.create_order(customer_token, create_order_items(p["id"], qty=2))))
+    assert_status_code(orders[0], 201)
+    assert ordered["stock"] == 3
+
+    cancelled = listed_after(lambda: order_client.cancel_order(customer_token, orders[0].json()["id"]))
+    assert cancelled["stock"] == 5
+
+    imported = listed_after(lambda: product_client.bulk_upsert(admin_token, [{"id": p["id"], "stock": 9}]))
+    assert imported["stock"] == 9
+
+@pytest.mark.products
+@pytest.mark.parametrize("sort, key", [
+    ("price", ["abc", "x"]),            # price must be a number
+    ("price", [10.0]),                  # missing id
+    ("price", [float("nan"), "x"]),
+    ("price", [True, "x"]),
+    ("name", [1, 2]),
+    ("name", ["laptop", "x", "extra"]),
+    ("-name", [["nested"], "x"]),
+])
+def test_prod_13_cursor_with_malformed_key_returns_400(product_client, sort, key):
+    r = product_client.list_products(params={"sort": sort, "limit": 1, "cursor": forge_cursor(f"products:{sort}", key)})
+    assert_status_code(r, 400)
+    validate_error_response_schema(r.json())
+
+    # The same cursor shape with well-typed values is accepted
+    valid_key = [10.0, "x"] if sort == "price" else ["laptop", "x"]
+    r = product_client.list_products(params={"sort": sort, "limit": 1, "cursor": forge_cursor(f"products:{sort}", valid_key)})
+    assert_status_code(r, 200)
@@ -0,0 +1,58 @@
+"""
+REC-01..02: slim storage records and their API models (api.records)
+"""
+import uuid
+from datetime import datetime
+import pytest
+from api.models import (
+    UserInternal, UserRole, Product, Order, OrderItem, OrderStatus, Payment, PaymentMethod, PaymentStatus
+)
+from api.records import UserRecord, ProductRecord, OrderRecord, OrderLine, PaymentRecord
+from api.storage import create_storage
+
+ORDER = Order(id=str(uuid.uuid4()), userId=str(uuid.uuid4()),
+              items=[OrderItem(productId="p-1", qty=2), OrderItem(productId="p-2", qty=1)],
+              totalAmount=360.5, currency="TRY", status=OrderStatus.CREATED,
+              createdAt=datetime(2026, 1, 2, 3, 4, 5, 678901))
+MODELS = [
+    (UserRecord, UserInternal(id=str(uuid.uuid4()), email="rec@example.com", password_hash="hash",
+                              role=UserRole.ADMIN)),
+    (ProductRecord, Product(id=str(uuid.uuid4()), name="Çay Bardağı", price=12.5, currency="TRY",
+                            stock=3, isActive=False)),
+    (OrderRecord, ORDER),
+    (PaymentRecord, Payment(id=str(uuid.uuid4()), orderId=ORDER.id, amount=360.5, currency="TRY",
+                            method=PaymentMethod.CARD, status=PaymentStatus.CAPTURED, providerRef="PROV-1",
+                            createdAt=datetime(2026, 1, 2, 3, 5))),
+]
+
+
+@pytest.mark.parametrize("record_type, model", MODELS, ids=["user", "product", "order", "payment"])
+def test_rec_01_records_round_trip_to_identical_models(record_type, model):
+    """
+    Test ID: REC-01
+    Type: Records
+    Scenario: Convert each API model to its record and back
+    Expected: The record keeps only __slots__ fields, and the rebuilt model equals the original and serializes to the same JSON
+    """
+    record = record_type.from_model(model)
+    assert not hasattr(record, "__dict__")
+    rebuilt = record.to_model()
+    assert type(rebuilt) is type(model)
+    assert rebuilt.model_dump() == model.model_dump()
+    assert rebuilt.model_dump_json() == model.model_dump_json()
+
+
+@pytest.mark.parametrize("engine", ["memory", "sharded"])
+def test_rec_02_storage_keeps_records_whatever_it_is_given(engine):
+    """
+    Test ID: REC-02
+    Type: Records
+    Scenario: Write an order to the storage as an API model, then read it back
+    Expected: The storage holds and returns an OrderRecord with its items as OrderLine tuples
+    """
+    store = create_storage(engine)
+    store.add_order(ORDER)
+    stored = store.get_order(ORDER.id)
+    assert isinstance(stored, OrderRecord)
+    assert stored.items == (OrderLine("p-1", 2), OrderLine("p-2", 1))
+    assert stored.to_model() == ORDER
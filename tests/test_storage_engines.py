@@ -0,0 +1,312 @@
+"""
+Storage engine behavior, checked against every engine through the Storage protocol (api.storage)
+"""
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+import pytest
+from api.models import UserRole, OrderStatus, PaymentMethod, PaymentStatus
+from api.records import UserRecord, ProductRecord, OrderRecord, OrderLine, PaymentRecord
+from api.shared_stock import SharedStockCounters, SharedStockStorage
+from api.sqlite_storage import SQLiteStorage
+from api.storage import VersionConflict, create_storage
+
+ENGINES = ["memory", "sharded", "sqlite", "shared"]
+
+
+@pytest.fixture(params=ENGINES)
+def store(request, tmp_path):
+    """A fresh, empty storage engine of each kind."""
+    path = str(tmp_path / "store.db")
+    if request.param == "sqlite":
+        engine = SQLiteStorage(path)
+    elif request.param == "shared":
+        engine = SharedStockStorage(SharedStockCounters(f"test-stock-{uuid.uuid4().hex[:12]}", slots=256, stripes=8), path)
+    else:
+        yield create_storage(request.param)
+        return
+    yield engine
+    if request.param == "shared":
+        engine.counters.unlink()
+    engine.close()
+
+
+def make_user(email: str, user_id: str = None) -> UserRecord:
+    return UserRecord(user_id or str(uuid.uuid4()), email, "hash", UserRole.CUSTOMER)
+
+
+def test_sto_01_user_id_index_follows_every_user_write(store):
+    """
+    Test ID: STO-01
+    Type: Storage
+    Scenario: Users arrive via add_user and add_user_if_absent; an email is re-registered under a new id
+    Expected: get_user_by_id finds each live user and forgets the replaced id
+    """
+    first = make_user("a@example.com")
+    assert store.add_user_if_absent(first)
+    assert not store.add_user_if_absent(make_user("a@example.com"))
+    assert store.get_user_by_id(first.id).email == "a@example.com"
+    
+    replacement = make_user("a@example.com")
+    store.add_user(replacement)
+    assert store.get_user_by_id(first.id) is None
+    assert store.get_user_by_id(replacement.id).email == "a@example.com"
+    assert store.get_user_by_email("a@example.com").id == replacement.id
+    
+    assert store.get_user_by_id("no-such-user") is None
+
+
+def make_product(stock: int, price: float = 10.0, name: str = None) -> ProductRecord:
+    product_id = str(uuid.uuid4())
+    return ProductRecord(product_id, name or f"Item-{product_id[:8]}", price, "TRY", stock, True)
+
+
+def run_threads(count: int, target):
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_sto_02_concurrent_reservations_never_oversell(store):
+    """
+    Test ID: STO-02
+    Type: Storage
+    Scenario: 8 threads race 400 single-unit reservations across two products with 50 units each
+    Expected: Exactly 100 reservations succeed and both products end at 0 stock
+    """
+    products = [store.add_product(make_product(stock=50)) for _ in range(2)]
+    reserved = []
+    
+    def buy(worker):
+        for n in range(50):
+            product = products[(worker + n) % 2]
+            if store.reserve_many([(product.id, 1)]) is None:
+                reserved.append(product.id)
+    
+    run_threads(8, buy)
+    assert len(reserved) == 100
+    assert [store.get_product(p.id).stock for p in products] == [0, 0]
+
+
+def test_sto_03_reserve_many_is_all_or_nothing(store):
+    """
+    Test ID: STO-03
+    Type: Storage
+    Scenario: Reserve a cart whose repeated lines exceed one product's stock, then one that fits
+    Expected: The first reserves nothing and names the short product; the second takes every line
+    """
+    first, second = store.add_product(make_product(stock=5)), store.add_product(make_product(stock=5))
+    
+    assert store.reserve_many([(first.id, 2), (second.id, 3), (second.id, 3)]) == second.id
+    assert (store.get_product(first.id).stock, store.get_product(second.id).stock) == (5, 5)
+    
+    assert store.reserve_many([(first.id, 2), (second.id, 3)]) is None
+    assert (store.get_product(first.id).stock, store.get_product(second.id).stock) == (3, 2)
+    
+    store.release_many([(first.id, 2), (second.id, 3)])
+    assert (store.get_product(first.id).stock, store.get_product(second.id).stock) == (5, 5)
+
+
+def test_sto_04_product_versions_count_every_write(store):
+    """
+    Test ID: STO-04
+    Type: Storage
+    Scenario: Re-add a product from one thread while others reserve its stock
+    Expected: Its version went up once per write, with no increment lost between the two lock paths
+    """
+    product = store.add_product(make_product(stock=10_000))
+    reserved = []
+    
+    def write(worker):
+        for _ in range(200):
+            if worker == 0:
+                current = store.get_product(product.id)
+                store.add_product(ProductRecord(product.id, current.name, current.price,
+                                                current.currency, current.stock, True))
+            elif store.reserve_many([(product.id, 1)]) is None:
+                reserved.append(1)
+    
+    run_threads(4, write)
+    _, version = store.get_product_with_version(product.id)
+    assert version == 1 + 200 + len(reserved)
+
+
+def test_sto_05_patch_checks_the_expected_version(store):
+    """
+    Test ID: STO-05
+    Type: Storage
+    Scenario: Patch a product with its current version, then again with the stale one
+    Expected: The first patch applies and bumps the version; the stale one raises VersionConflict
+    """
+    product = store.add_product(make_product(stock=1, price=10.0))
+    _, version = store.get_product_with_version(product.id)
+    
+    patched, new_version = store.patch_product(product.id, {"price": 12.5}, expected_version=version)
+    assert patched.price == 12.5 and new_version == version + 1
+    
+    with pytest.raises(VersionConflict) as conflict:
+        store.patch_product(product.id, {"price": 99.0}, expected_version=version)
+    assert conflict.value.current_version == new_version
+    assert store.get_product(product.id).price == 12.5
+    assert store.patch_product("no-such-product", {"price": 1.0}) == (None, 0)
+
+
+def test_sto_06_reset_empties_the_engine(store):
+    """
+    Test ID: STO-06
+    Type: Storage
+    Scenario: Store a user and a product, reset, then store the same product id again
+    Expected: Nothing survives the reset, the catalog version moves, and the product starts from its new stock
+    """
+    user = store.add_user(make_user("reset@example.com"))
+    product = store.add_product(make_product(stock=5))
+    version = store.catalog_version
+    
+    store.reset()
+    assert store.get_user_by_id(user.id) is None and store.get_user_by_email("reset@example.com") is None
+    assert store.get_product(product.id) is None
+    assert store.catalog_version != version
+    
+    product.stock = 2
+    store.add_product(product)
+    assert store.get_product(product.id).stock == 2
+
+
+def test_sto_07_sqlite_engines_on_one_file_share_state(tmp_path):
+    """
+    Test ID: STO-07
+    Type: Storage
+    Scenario: Two SQLiteStorage instances (as two workers would) open the same file; each writes
+    Expected: Each reads the other's users, products and stock, and sees the catalog version move
+    """
+    path = str(tmp_path / "shared.db")
+    first, second = SQLiteStorage(path), SQLiteStorage(path)
+    
+    user = first.add_user(make_user("shared@example.com"))
+    product = first.add_product(make_product(stock=3))
+    assert second.get_user_by_id(user.id).email == "shared@example.com"
+    assert second.get_product(product.id).stock == 3
+    
+    version = first.catalog_version
+    assert second.reserve_many([(product.id, 2)]) is None
+    assert first.get_product(product.id).stock == 1
+    assert first.catalog_version != version
+    assert first.reserve_many([(product.id, 2)]) == product.id
+    first.close()
+    second.close()
+
+
+def test_sto_08_shared_stock_workers_share_everything(tmp_path):
+    """
+    Test ID: STO-08
+    Type: Storage
+    Scenario: Two SharedStockStorage instances (as two workers would) share a database and a stock segment
+    Expected: Users and products written by one are read by the other; stock sold by either is counted once,
+              filtered on by inStock, and written back to the database on close
+    """
+    path, name = str(tmp_path / "shared.db"), f"test-stock-{uuid.uuid4().hex[:12]}"
+    first = SharedStockStorage(SharedStockCounters(name, slots=256, stripes=8), path)
+    second = SharedStockStorage(SharedStockCounters(name, slots=256, stripes=8), path)
+    
+    user = first.add_user(make_user("worker@example.com"))
+    assert second.get_user_by_id(user.id).email == "worker@example.com"
+    scarce, plenty = first.add_product(make_product(stock=2, name="A")), first.add_product(make_product(stock=9, name="B"))
+    
+    assert second.reserve_many([(scarce.id, 1)]) is None
+    assert first.reserve_many([(scarce.id, 1)]) is None
+    assert second.reserve_many([(scarce.id, 1)]) == scarce.id
+    assert first.get_product(scarce.id).stock == 0
+    page, _ = second.query_products(in_stock=True, limit=1)
+    assert [p.id for p in page] == [plenty.id]
+    
+    second.close()
+    assert SQLiteStorage.get_product(first, scarce.id).stock == 0
+    first.counters.unlink()
+    first.close()
+
+
+def make_order(product: ProductRecord, qty: int) -> OrderRecord:
+    return OrderRecord(str(uuid.uuid4()), "buyer", (OrderLine(product.id, qty),), product.price * qty, "TRY",
+                       OrderStatus.CREATED, datetime.utcnow())
+
+
+def make_payment(order: OrderRecord) -> PaymentRecord:
+    return PaymentRecord(str(uuid.uuid4()), order.id, order.totalAmount, order.currency, PaymentMethod.CARD,
+                         PaymentStatus.CAPTURED, f"PROV-{uuid.uuid4()}", datetime.utcnow())
+
+
+def test_sto_09_an_order_changes_status_once_under_concurrency(store):
+    """
+    Test ID: STO-09
+    Type: Storage
+    Scenario: 16 threads race to cancel one order (releasing its stock if they win); 16 more race to pay
+              (recording the payment if they win) or cancel a second order
+    Expected: Each order leaves CREATED exactly once: stock comes back once and at most one payment is stored;
+              SQLite refuses a second payment for the same order
+    """
+    product = store.add_product(make_product(stock=30))
+    assert store.reserve_many([(product.id, 1)]) is None
+    cancelled_order = store.add_order(make_order(product, 1))
+    winners = []
+    
+    def cancel(worker):
+        if store.transition_order(cancelled_order.id, OrderStatus.CREATED, OrderStatus.CANCELLED) is not None:
+            winners.append(worker)
+            store.release_many([(product.id, 1)])
+    
+    run_threads(16, cancel)
+    assert len(winners) == 1
+    assert store.get_order(cancelled_order.id).status == OrderStatus.CANCELLED
+    assert store.get_product(product.id).stock == 30
+    
+    contested = store.add_order(make_order(product, 1))
+    outcomes = []
+    
+    def pay_or_cancel(worker):
+        target = OrderStatus.PAID if worker % 2 else OrderStatus.CANCELLED
+        if store.transition_order(contested.id, OrderStatus.CREATED, target) is not None:
+            outcomes.append(target)
+            if target == OrderStatus.PAID:
+                store.add_payment(make_payment(contested))
+    
+    run_threads(16, pay_or_cancel)
+    assert len(outcomes) == 1
+    assert store.get_order(contested.id).status == outcomes[0]
+    assert (store.get_payment_by_order(contested.id) is not None) == (outcomes[0] == OrderStatus.PAID)
+    assert store.transition_order(contested.id, OrderStatus.CREATED, OrderStatus.PAID) is None
+    assert store.transition_order("no-such-order", OrderStatus.CREATED, OrderStatus.PAID) is None
+    
+    if isinstance(store, SQLiteStorage):
+        store.add_payment(make_payment(cancelled_order))
+        with pytest.raises(sqlite3.IntegrityError):
+            store.add_payment(make_payment(cancelled_order))
+
+
+def test_sto_10_shared_stock_checks_the_products_it_reserves(tmp_path):
+    """
+    Test ID: STO-10
+    Type: Storage
+    Scenario: On the shared engine, a price change lands just before a reservation takes its stripes
+    Expected: The reservation's check sees the new price, i.e. the products it validates and prices
+              are read under the same stripes as the stock it takes
+    """
+    store = SharedStockStorage(SharedStockCounters(f"test-stock-{uuid.uuid4().hex[:12]}", slots=256, stripes=8),
+                               str(tmp_path / "shared.db"))
+    product = store.add_product(make_product(stock=5, price=10.0))
+    take_stripes = store.counters._locked
+    
+    def locked_after_a_price_change(slots):
+        store.counters._locked = take_stripes
+        store.patch_product(product.id, {"price": 99.0})
+        return take_stripes(slots)
+    
+    seen = {}
+    store.counters._locked = locked_after_a_price_change
+    assert store.reserve_many([(product.id, 2)], check=lambda products: seen.update(products)) is None
+    assert seen[product.id].price == 99.0 and seen[product.id].stock == 5
+    assert store.get_product(product.id).stock == 3
+    store.counters.unlink()
+    store.close()
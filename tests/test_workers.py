@@ -0,0 +1,201 @@
+"""
+WRK-01..02: several uvicorn worker processes sharing one storage (STORAGE_ENGINE=shared)
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import requests
+from tests.assertions.response_assertions import assert_status_code, assert_field_value
+from tests.clients.auth_client import AuthClient
+from tests.clients.product_client import ProductClient
+from tests.clients.order_client import OrderClient
+from tests.clients.payment_client import PaymentClient
+from tests.data.test_data import generate_customer_data, generate_admin_data, create_order_items
+
+WORKERS = 2
+
+
+class Worker:
+    """Domain clients bound to one worker process."""
+    
+    def __init__(self, base_url: str):
+        self.auth = AuthClient(base_url)
+        self.products = ProductClient(base_url)
+        self.orders = OrderClient(base_url)
+        self.payments = PaymentClient(base_url)
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def wait_until_serving(url: str, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with {process.returncode}")
+        try:
+            if requests.get(f"{url}/health", timeout=1).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"uvicorn at {url} did not start")
+
+
+@pytest.fixture(scope="module")
+def workers(tmp_path_factory):
+    """
+    Separate uvicorn processes on their own ports, sharing one SQLite file
+    and one stock segment exactly as `uvicorn --workers N` processes do;
+    separate ports let a test pick which worker serves each request.
+    """
+    state = tmp_path_factory.mktemp("workers")
+    segment = f"test-workers-{uuid.uuid4().hex[:12]}"
+    env = dict(os.environ, STORAGE_ENGINE="shared", SQLITE_PATH=str(state / "ecommerce.db"),
+               SHARED_STOCK_NAME=segment, SHARED_STOCK_SLOTS="1024", BCRYPT_ROUNDS="4")
+    processes, urls = [], []
+    try:
+        for index in range(WORKERS):
+            port = free_port()
+            with open(state / f"worker-{index}.log", "wb") as log:
+                processes.append(subprocess.Popen(
+                    [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+                    env=env, stdout=log, stderr=subprocess.STDOUT,
+                ))
+            urls.append(f"http://127.0.0.1:{port}")
+            # One at a time: the first seeds the sample products, the others find them
+            wait_until_serving(urls[-1], processes[-1])
+        yield [Worker(url) for url in urls]
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+        from api.shared_stock import SharedStockCounters
+        
+        counters = SharedStockCounters(segment, slots=1024)
+        counters.unlink()
+        counters.close()
+        os.remove(os.path.join(tempfile.gettempdir(), f"{segment}.lock"))
+
+
+def register_and_login(worker_for_register: Worker, worker_for_login: Worker, user_data: dict) -> str:
+    r = worker_for_register.auth.register(user_data["email"], user_data["password"], user_data["role"])
+    assert_status_code(r, 201)
+    r = worker_for_login.auth.login(user_data["email"], user_data["password"])
+    assert_status_code(r, 200)
+    return r.json()["accessToken"]
+
+
+@pytest.mark.smoke
+def test_wrk_01_purchase_flow_across_workers(workers):
+    """
+    Test ID: WRK-01
+    Type: E2E
+    Scenario: SMK-01 with every step served by a different worker process than the one before
+    Expected: Each worker sees the user, order and payment the other one stored; the order ends PAID
+    """
+    first, second = workers
+    token = register_and_login(first, second, generate_customer_data())
+    
+    products = first.products.list_products().json()
+    product = next(p for p in products if 50 <= p["price"] <= 5000 and p["stock"] > 0)
+    r = second.orders.create_order(token, create_order_items(product["id"], qty=1))
+    assert_status_code(r, 201)
+    order = r.json()
+    
+    r = first.payments.create_payment(token, order["id"], method="CARD")
+    assert_status_code(r, 201)
+    payment = r.json()
+    assert_field_value(payment, "status", "CAPTURED")
+    
+    r = second.orders.get_order(token, order["id"])
+    assert_status_code(r, 200)
+    assert_field_value(r.json(), "status", "PAID")
+    assert_status_code(second.payments.get_payment(token, payment["id"]), 200)
+    assert [o["id"] for o in first.orders.list_orders(token).json()] == [order["id"]]
+    assert first.products.get_product(product["id"]).json()["stock"] == product["stock"] - 1
+
+
+def test_wrk_02_workers_never_oversell(workers):
+    """
+    Test ID: WRK-02
+    Type: Concurrency
+    Scenario: 40 single-unit orders for a product with 10 units, spread over both workers concurrently
+    Expected: Exactly 10 orders are created, the rest get 409, and both workers report 0 units left
+    """
+    first, second = workers
+    admin_token = register_and_login(first, second, generate_admin_data())
+    r = second.products.create_product(admin_token, name=f"Scarce-{uuid.uuid4().hex[:8]}", price=100.0, stock=10)
+    assert_status_code(r, 201)
+    product_id = r.json()["id"]
+    tokens = [register_and_login(workers[i % WORKERS], workers[(i + 1) % WORKERS], generate_customer_data())
+              for i in range(4)]
+    
+    def order(attempt: int) -> int:
+        worker = workers[attempt % WORKERS]
+        return worker.orders.create_order(tokens[attempt % len(tokens)], create_order_items(product_id, qty=1)).status_code
+    
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        statuses = list(pool.map(order, range(40)))
+    
+    assert statuses.count(201) == 10
+    assert statuses.count(409) == 30
+    for worker in workers:
+        assert worker.products.get_product(product_id).json()["stock"] == 0
+    created = sum(len(first.orders.list_orders(token).json()) for token in tokens)
+    assert created == 10
+
+
+def test_wrk_03_cancel_and_pay_take_effect_once_across_workers(workers):
+    """
+    Test ID: WRK-03
+    Type: Concurrency
+    Scenario: 5 rounds of 20 concurrent cancels of one order, then of 20 concurrent payments of another,
+              spread over both workers
+    Expected: One cancel per order returns 200 and gives the stock back once; one payment per order is captured;
+              every other request gets 409
+    """
+    first, second = workers
+    token = register_and_login(first, second, generate_customer_data())
+    product = next(p for p in first.products.list_products().json() if 50 <= p["price"] <= 5000 and p["stock"] > 5)
+    
+    def race(call) -> list:
+        start = threading.Barrier(20)  # release all 20 requests at once
+        
+        def attempt(n: int) -> int:
+            start.wait()
+            return call(workers[n % WORKERS]).status_code
+        
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            return list(pool.map(attempt, range(20)))
+    
+    def new_order() -> str:
+        r = first.orders.create_order(token, create_order_items(product["id"], qty=1))
+        assert_status_code(r, 201)
+        return r.json()["id"]
+    
+    for _ in range(5):
+        order_id = new_order()
+        statuses = race(lambda worker: worker.orders.cancel_order(token, order_id))
+        assert (statuses.count(200), statuses.count(409)) == (1, 19)
+    for worker in workers:
+        assert worker.products.get_product(product["id"]).json()["stock"] == product["stock"]
+    
+    for _ in range(5):
+        order_id = new_order()
+        statuses = race(lambda worker: worker.payments.create_payment(token, order_id, method="CARD"))
+        assert (statuses.count(201), statuses.count(409)) == (1, 19)
+        for worker in workers:
+            assert_field_value(worker.orders.get_order(token, order_id).json(), "status", "PAID")
+    assert second.products.get_product(product["id"]).json()["stock"] == product["stock"] - 5